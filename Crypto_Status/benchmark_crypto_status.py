@@ -0,0 +1,294 @@
+"""
+Benchmarks for crypto_status: paged refreshes, filters, indexes, the tick store and price streaming.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from crypto_status import create_session, fetch_all_assets, filter_name, filter_value, np, AssetTable, AssetIndex
+from crypto_status import TickStore, PriceStream, websockets
+
+def synthetic_assets(num_assets, seed=0):
+    """
+    Function: synthetic_assets
+    Params: num_assets (int), seed (int)
+    Brief: Generate CoinCap-shaped asset dicts with string-encoded numbers.
+    """
+    rng = random.Random(seed)
+    return [{"id": f"coin-{i}", "rank": str(i + 1), "symbol": f"C{i}", "name": f"Coin {i}",
+             "priceUsd": str(1000.0 / (i + 1)), "marketCapUsd": str(1e9 / (i + 1)),
+             "volumeUsd24Hr": str(rng.uniform(0, 1e8)), "changePercent24Hr": str(rng.uniform(-10, 10))}
+            for i in range(num_assets)]
+
+def start_mock_coincap(num_assets, delay):
+    """
+    Function: start_mock_coincap
+    Params: num_assets (int), delay (float) - seconds per page request
+    Brief: Start a local CoinCap /v2/assets stand-in serving offset/limit pages.
+    """
+    assets = synthetic_assets(num_assets)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+            time.sleep(delay)
+            body = json.dumps({"data": assets[offset:offset + limit], "timestamp": 0}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v2/assets"
+
+def refresh_latency(session, url, page_size, concurrency, rounds):
+    """
+    Function: refresh_latency
+    Params: session (requests.Session or module), url (str), page_size (int), concurrency (int), rounds (int)
+    Brief: Return (assets, best seconds) of a full-universe refresh.
+    """
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        assets = fetch_all_assets(session, url, page_size, concurrency)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return assets, best
+
+def bench_refresh(num_assets, page_size, delay, concurrency_levels, rounds):
+    """
+    Function: bench_refresh
+    Params: num_assets (int), page_size (int), delay (float), concurrency_levels (list), rounds (int)
+    Brief: Compare full refresh latency of fresh connections per page and pooled concurrent paging.
+    """
+    server, url = start_mock_coincap(num_assets, delay)
+    try:
+        assets, seconds = refresh_latency(requests, url, page_size, 1, rounds)
+        print(f"requests.get per page, sequential: {len(assets)} assets in {seconds * 1000:.0f} ms")
+        for concurrency in concurrency_levels:
+            session = create_session(concurrency)
+            try:
+                assets, seconds = refresh_latency(session, url, page_size, concurrency, rounds)
+            finally:
+                session.close()
+            print(f"pooled session, {concurrency} pages in flight: {len(assets)} assets in {seconds * 1000:.0f} ms")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def best_time(function, rounds):
+    """
+    Function: best_time
+    Params: function (callable), rounds (int)
+    Brief: Return (result, best seconds) over rounds calls.
+    """
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+def bench_filters(num_assets, rounds):
+    """
+    Function: bench_filters
+    Params: num_assets (int), rounds (int)
+    Brief: Compare list-comprehension filters with vectorized AssetTable masks on one snapshot.
+    """
+    if np is None:
+        print("numpy is not installed, skipping AssetTable benchmarks")
+        return
+    assets = synthetic_assets(num_assets)
+    table, seconds = best_time(lambda: AssetTable(assets), rounds)
+    print(f"AssetTable build for {num_assets} assets: {seconds * 1000:.1f} ms (once per snapshot)")
+    candidates = {
+        "filter_name": (lambda: filter_name(assets, "coin 1"), lambda: filter_name(table, "coin 1")),
+        "filter_value": (lambda: filter_value(assets, 0.5), lambda: filter_value(table, 0.5)),
+        "name AND price AND change": (
+            lambda: [a for a in filter_name(assets, "coin 1") if float(a["priceUsd"]) > 0.5
+                     and float(a["changePercent24Hr"]) < 0],
+            lambda: table.select(table.name_contains("coin 1") & table.where("price", above=0.5)
+                                 & table.where("change", below=0))),
+        "top 10 by volume": (
+            lambda: sorted(assets, key=lambda a: float(a["volumeUsd24Hr"]), reverse=True)[:10],
+            lambda: table.top("volume", 10)),
+    }
+    with patch("builtins.print"):
+        results = {name: (best_time(lists, rounds), best_time(vectorized, rounds))
+                   for name, (lists, vectorized) in candidates.items()}
+    for name, ((expected, list_seconds), (actual, table_seconds)) in results.items():
+        assert [a["id"] for a in expected] == [a["id"] for a in actual], name
+        print(f"{name}: lists {list_seconds * 1000:.2f} ms, AssetTable {table_seconds * 1000:.2f} ms "
+              f"({list_seconds / table_seconds:.1f}x), {len(actual)} assets")
+
+def bench_indexes(num_assets, rounds, queries=1000):
+    """
+    Function: bench_indexes
+    Params: num_assets (int), rounds (int), queries (int)
+    Brief: Time AssetIndex builds, incremental updates and per-query latency against list scans.
+    """
+    assets = synthetic_assets(num_assets)
+    index, seconds = best_time(lambda: AssetIndex(assets), rounds)
+    print(f"AssetIndex build for {num_assets} assets: {seconds * 1000:.1f} ms")
+    rng = random.Random(1)
+    moved = [dict(asset) for asset in assets]
+    for asset in rng.sample(moved, num_assets // 100):
+        asset["priceUsd"] = str(float(asset["priceUsd"]) * rng.uniform(0.9, 1.1))
+    start = time.perf_counter()
+    stats = index.update(moved)
+    print(f"incremental update, {stats['repriced']} repriced: {(time.perf_counter() - start) * 1000:.2f} ms")
+    thresholds = [rng.uniform(1, 50) for _ in range(queries)]
+    names = [f"coin {rng.randrange(num_assets)}" for _ in range(queries)]
+    candidates = {
+        "price > x": (lambda i: filter_value(moved, thresholds[i]), lambda i: index.price_above(thresholds[i])),
+        "name contains": (lambda i: filter_name(moved, names[i]), lambda i: index.name_contains(names[i])),
+    }
+    results = {}
+    with patch("builtins.print"):
+        for name, (scan, indexed) in candidates.items():
+            for label, query, count in (("scan", scan, max(1, queries // 50)), ("index", indexed, queries)):
+                start = time.perf_counter()
+                for i in range(count):
+                    query(i)
+                results[name, label] = (time.perf_counter() - start) / count
+    for name in candidates:
+        print(f"{name}: list scan {results[name, 'scan'] * 1e6:,.0f} us/query, "
+              f"AssetIndex {results[name, 'index'] * 1e6:,.1f} us/query")
+
+def bench_ticks(days, rounds):
+    """
+    Function: bench_ticks
+    Params: days (int), rounds (int)
+    Brief: Ingest a synthetic random walk of 1-second ticks and time window queries over it.
+    """
+    if np is None:
+        print("numpy is not installed, skipping TickStore benchmarks")
+        return
+    rng = np.random.default_rng(0)
+    num_ticks = days * 86400
+    start_time = 1700000000.0
+    timestamps = start_time + np.arange(num_ticks, dtype=np.float64)
+    prices = np.round(40000 * np.exp(np.cumsum(rng.normal(0, 0.0002, num_ticks))), 2)
+    volumes = rng.uniform(1e9, 5e10, num_ticks)
+    end_time = timestamps[-1]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = TickStore(tmp_dir)
+        start = time.perf_counter()
+        store.append_many("bitcoin", timestamps, prices, volumes)
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(store.path("bitcoin"))
+        print(f"append_many {num_ticks:,} ticks ({days} days): {seconds:.2f}s, {num_ticks / seconds:,.0f} ticks/sec, "
+              f"{size / 2**20:.1f} MiB on disk vs {num_ticks * 24 / 2**20:.1f} MiB as float64 columns")
+        hour = 3600
+        start = time.perf_counter()
+        for i in range(hour):
+            store.append("live", timestamps[i], prices[i], volumes[i])
+        store.flush()
+        seconds = time.perf_counter() - start
+        print(f"append, one call per tick: {hour / seconds:,.0f} ticks/sec")
+        reader = TickStore(tmp_dir)
+        queries = {
+            "read last 24h": lambda: reader.read("bitcoin", end_time - 86400, end_time),
+            "OHLC 1h bars over last 7d": lambda: reader.ohlc("bitcoin", hour, end_time - 7 * 86400, end_time),
+            "OHLC 1d bars over everything": lambda: reader.ohlc("bitcoin", 86400),
+            "rolling 1h mean/volatility over last 24h": lambda: reader.rolling("bitcoin", hour, end_time - 86400,
+                                                                                end_time),
+        }
+        for name, query in queries.items():
+            _, seconds = best_time(query, rounds)
+            print(f"{name}: {seconds * 1000:.1f} ms")
+
+def bench_stream(num_assets, num_messages, updates_per_message, poll_interval=5.0):
+    """
+    Function: bench_stream
+    Params: num_assets (int), num_messages (int), updates_per_message (int), poll_interval (float)
+    Brief: Push price messages through a local WebSocket stub into a live AssetIndex and report
+           receive-to-visible and send-to-visible latency next to the staleness of polling.
+    """
+    if websockets is None:
+        print("websockets is not installed, skipping stream benchmarks")
+        return
+    index = AssetIndex(synthetic_assets(num_assets))
+    rng = random.Random(2)
+    sent = deque()
+    end_to_end = []
+
+    async def feed(connection):
+        for _ in range(num_messages):
+            prices = {f"coin-{rng.randrange(num_assets)}": str(rng.uniform(0.01, 1000))
+                      for _ in range(updates_per_message)}
+            sent.append(time.perf_counter())
+            await connection.send(json.dumps(prices))
+            await asyncio.sleep(0.001)
+        await connection.wait_closed()
+
+    def visible(prices, applied):
+        end_to_end.append(time.perf_counter() - sent.popleft())
+
+    async def scenario():
+        async with websockets.serve(feed, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            stream = PriceStream(index, url, on_update=visible)
+            start = time.perf_counter()
+            await stream.run(max_messages=num_messages)
+            return stream, time.perf_counter() - start
+
+    stream, seconds = asyncio.run(scenario())
+    summary = stream.latency_summary()
+    end_to_end.sort()
+    print(f"stream: {stream.messages} messages, {stream.updates:,} price updates in {seconds:.2f}s "
+          f"({stream.updates / seconds:,.0f} updates/sec)")
+    print(f"receive-to-visible: p50 {summary['p50'] * 1e6:.0f} us, p99 {summary['p99'] * 1e6:.0f} us; "
+          f"send-to-visible: p50 {end_to_end[len(end_to_end) // 2] * 1e3:.2f} ms, "
+          f"p99 {end_to_end[int(len(end_to_end) * 0.99)] * 1e3:.2f} ms")
+    print(f"polling every {poll_interval:g}s: mean staleness {poll_interval / 2 * 1e3:.0f} ms plus refresh latency")
+
+def get_arguments():
+    """
+    Function: get_arguments
+    Brief: Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Crypto status benchmarks.")
+    parser.add_argument("--assets", type=int, default=20000, help="Number of assets served by the mock.")
+    parser.add_argument("--page-size", type=int, default=500, help="Assets per page request.")
+    parser.add_argument("--delay", type=float, default=0.05, help="Mock server latency per page (s).")
+    parser.add_argument("--rounds", type=int, default=3, help="Refreshes per configuration, best is reported.")
+    parser.add_argument("--days", type=int, default=30, help="Days of 1-second ticks for the tick store.")
+    return parser.parse_args()
+
+def main():
+    """
+    Function: main
+    Brief: Run all benchmarks.
+    """
+    args = get_arguments()
+    bench_refresh(args.assets, args.page_size, args.delay, [1, 4, 8, 16], args.rounds)
+    bench_filters(args.assets, args.rounds)
+    bench_indexes(args.assets, args.rounds)
+    bench_ticks(args.days, args.rounds)
+    bench_stream(args.assets, 2000, 50)
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,30 @@ Date: 30 Dec 2024
 """
 
 import requests
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import re
+import struct
+import sys
+import threading
 import time
 import os 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
 
 def clear_screen():
     if os.name == "nt":
@@ -14,6 +36,12 @@ def clear_screen():
     else:
         os.system("clear")
 
+API_URL = "https://api.coincap.io/v2/assets"
+PRICES_WS_URL = "wss://ws.coincap.io/prices?assets=ALL"
+DEFAULT_TIMEOUT = 10
+PAGE_SIZE = 2000
+MAX_PAGES = 100
+
 def get_data():
     """
     Function: get_data
@@ -51,10 +79,915 @@ def get_data():
     
     return None
 
+def create_session(pool_size=8):
+    """
+    Function: create_session
+    Params: pool_size (int) - keep-alive connections to keep
+    Brief: Pooled HTTP session reused across pages and polls
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(session, offset, limit=PAGE_SIZE, url=API_URL, timeout=DEFAULT_TIMEOUT):
+    """
+    Function: fetch_page
+    Params: session (requests.Session), offset (int), limit (int), url (str), timeout (float)
+    Brief: Fetch one page of assets, raising on network and HTTP errors
+    """
+    response = session.get(url, params={"offset": offset, "limit": limit}, timeout=timeout)
+    response.raise_for_status()
+    return response.json()["data"]
+
+def fetch_all_assets(session, url=API_URL, page_size=PAGE_SIZE, concurrency=4, timeout=DEFAULT_TIMEOUT,
+                     executor=None):
+    """
+    Function: fetch_all_assets
+    Params: session (requests.Session), url (str), page_size (int), concurrency (int), timeout (float),
+            executor (ThreadPoolExecutor or None)
+    Brief: Page through the whole asset list, concurrency pages at a time, until a short page
+           marks the end. Assets keep the API order.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        assets = []
+        offset = 0
+        for _ in range(0, MAX_PAGES, concurrency):
+            offsets = [offset + i * page_size for i in range(concurrency)]
+            futures = [executor.submit(fetch_page, session, page_offset, page_size, url, timeout)
+                       for page_offset in offsets]
+            pages = [future.result() for future in futures]
+            for page in pages:
+                assets.extend(page)
+                if len(page) < page_size:
+                    return assets
+            offset = offsets[-1] + page_size
+        print(f"Stopped paging after {MAX_PAGES} pages.")
+        return assets
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+class AssetPoller:
+    """
+    Class: AssetPoller
+    Params: url (str), interval (float) - seconds between polls, page_size (int), concurrency (int),
+            timeout (float), session (requests.Session or None)
+    Brief: Headless polling engine. Every poll refreshes the full asset list over one keep-alive
+           session and publishes a snapshot dict (timestamp, assets, latency) to every subscriber.
+    """
+
+    def __init__(self, url=API_URL, interval=5, page_size=PAGE_SIZE, concurrency=4, timeout=DEFAULT_TIMEOUT,
+                 session=None):
+        self.url = url
+        self.interval = interval
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = session or create_session(concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.latest = None
+        self.polls = 0
+        self.failures = 0
+
+    def subscribe(self, callback):
+        """
+        Function: subscribe
+        Params: callback (callable) - called with each snapshot
+        Brief: Register a subscriber and return a function that unregisters it
+        """
+        with self.lock:
+            self.subscribers.append(callback)
+
+        def unsubscribe():
+            with self.lock:
+                if callback in self.subscribers:
+                    self.subscribers.remove(callback)
+
+        return unsubscribe
+
+    def publish(self, snapshot):
+        """
+        Function: publish
+        Params: snapshot (dict)
+        Brief: Hand a snapshot to every subscriber; a failing subscriber does not stop the others
+        """
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def poll_once(self):
+        """
+        Function: poll_once
+        Brief: Refresh all assets and publish the snapshot. Returns it, or None if the refresh failed.
+        """
+        start = time.perf_counter()
+        try:
+            assets = fetch_all_assets(self.session, self.url, self.page_size, self.concurrency, self.timeout,
+                                      self.executor)
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            self.failures += 1
+            print(f"Poll failed: {e}")
+            return None
+        self.polls += 1
+        self.latest = {"timestamp": time.time(), "assets": assets, "latency": time.perf_counter() - start}
+        self.publish(self.latest)
+        return self.latest
+
+    def run(self, rounds=0):
+        """
+        Function: run
+        Params: rounds (int) - number of polls, 0 to poll until stop() is called
+        Brief: Poll every interval seconds in the calling thread
+        """
+        done = 0
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            done += 1
+            if rounds and done >= rounds:
+                break
+            self.stopped.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """
+        Function: start
+        Brief: Poll in a background thread until stop() is called
+        """
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Function: stop
+        Brief: Stop polling and release the session and worker threads
+        """
+        self.stopped.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.executor.shutdown()
+        self.session.close()
+
+class PriceStream:
+    """
+    Class: PriceStream
+    Params: index (AssetIndex), url (str) - CoinCap prices WebSocket, reconnect_delay (float) - seconds,
+            on_update (callable or None) - called with (prices, applied) after each message
+    Brief: Asyncio ingest of a push feed of {asset id: price} messages. Each message is applied to
+           the index in place, so filters see live prices. Reconnects after the feed drops and
+           records the receive-to-visible latency of every message. Requires websockets.
+    """
+
+    def __init__(self, index, url=PRICES_WS_URL, reconnect_delay=1.0, on_update=None):
+        if websockets is None:
+            raise ImportError("PriceStream requires websockets: pip install websockets")
+        self.index = index
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.on_update = on_update
+        self.messages = 0
+        self.updates = 0
+        self.ignored = 0
+        self.reconnects = 0
+        self.latencies = deque(maxlen=10000)
+        self.loop = None
+        self.stopped = None
+        self.thread = None
+
+    def handle(self, message):
+        """
+        Function: handle
+        Params: message (str) - JSON object of asset id -> price
+        Brief: Apply one feed message and record its latency
+        """
+        received = time.perf_counter()
+        try:
+            prices = json.loads(message)
+        except ValueError as e:
+            print(f"Ignoring malformed price message: {e}")
+            return
+        if not isinstance(prices, dict):
+            print(f"Ignoring malformed price message: expected an object, got {type(prices).__name__}")
+            return
+        applied = self.index.update_prices(prices)
+        self.latencies.append(time.perf_counter() - received)
+        self.messages += 1
+        self.updates += applied
+        self.ignored += len(prices) - applied
+        if self.on_update is not None:
+            self.on_update(prices, applied)
+
+    async def run(self, max_messages=None):
+        """
+        Function: run
+        Params: max_messages (int or None) - stop after this many messages
+        Brief: Consume the feed until stop() is called or max_messages arrived
+        """
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        while not self.stopped.is_set():
+            try:
+                async with websockets.connect(self.url) as connection:
+                    receiving = asyncio.ensure_future(self.receive(connection, max_messages))
+                    stopping = asyncio.ensure_future(self.stopped.wait())
+                    done, pending = await asyncio.wait({receiving, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                    for task in pending:
+                        task.cancel()
+                    if receiving in done and receiving.result():
+                        return
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                print(f"Price stream disconnected: {e}")
+            if self.stopped.is_set():
+                return
+            self.reconnects += 1
+            try:
+                await asyncio.wait_for(self.stopped.wait(), self.reconnect_delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def receive(self, connection, max_messages):
+        """
+        Function: receive
+        Params: connection (websocket), max_messages (int or None)
+        Brief: Apply messages from one connection. Returns True once max_messages arrived.
+        """
+        async for message in connection:
+            self.handle(message)
+            if max_messages is not None and self.messages >= max_messages:
+                return True
+        return False
+
+    def start(self):
+        """
+        Function: start
+        Brief: Run the stream on its own event loop in a background thread
+        """
+        started = threading.Event()
+
+        async def main():
+            task = asyncio.ensure_future(self.run())
+            await asyncio.sleep(0)
+            started.set()
+            await task
+
+        self.thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def stop(self):
+        """
+        Function: stop
+        Brief: Stop the stream and wait for a background thread to finish
+        """
+        if self.loop is not None and self.stopped is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+        if self.thread is not None:
+            self.thread.join()
+
+    def latency_summary(self):
+        """
+        Function: latency_summary
+        Brief: Median, 99th percentile and maximum receive-to-visible latency in seconds
+        """
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {"p50": None, "p99": None, "max": None}
+        return {"p50": latencies[len(latencies) // 2],
+                "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+                "max": latencies[-1]}
+
+def print_snapshot_summary(snapshot):
+    """
+    Function: print_snapshot_summary
+    Params: snapshot (dict)
+    Brief: Print one status line per snapshot
+    """
+    stamp = time.strftime("%H:%M:%S", time.localtime(snapshot["timestamp"]))
+    print(f"[{stamp}] {len(snapshot['assets'])} assets refreshed in {snapshot['latency'] * 1000:.0f} ms")
+    sys.stdout.flush()
+
+def to_float(value):
+    """
+    Function: to_float
+    Params: value (str, float or None)
+    Brief: Parse an API number, NaN when missing or malformed
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+class AssetTable:
+    """
+    Class: AssetTable
+    Params: assets (list) - asset dicts as returned by the API
+    Brief: Columnar view of one snapshot, parsed once. Numeric columns are float64 NumPy arrays
+           (NaN when missing) and names are pre-lowercased, so filters are vectorized boolean
+           masks that compose with &, | and ~. Requires NumPy.
+    """
+
+    COLUMNS = {
+        "price": "priceUsd",
+        "market_cap": "marketCapUsd",
+        "volume": "volumeUsd24Hr",
+        "change": "changePercent24Hr",
+    }
+
+    def __init__(self, assets):
+        if np is None:
+            raise ImportError("AssetTable requires numpy: pip install numpy")
+        self.assets = list(assets)
+        self.names = [(asset.get("name") or "").lower() for asset in self.assets]
+        self.name_array = np.array(self.names, dtype=str) if hasattr(np, "strings") else None
+        self.symbols = np.array([(asset.get("symbol") or "").lower() for asset in self.assets], dtype=str)
+        self.columns = {column: np.array([to_float(asset.get(key)) for asset in self.assets], dtype=np.float64)
+                        for column, key in self.COLUMNS.items()}
+
+    def __len__(self):
+        return len(self.assets)
+
+    def column(self, column):
+        """
+        Function: column
+        Params: column (str) - one of COLUMNS
+        Brief: Float array of a numeric column
+        """
+        if column not in self.columns:
+            raise KeyError(f"Unknown column '{column}'. Choose from {', '.join(self.COLUMNS)}.")
+        return self.columns[column]
+
+    def name_contains(self, text):
+        """
+        Function: name_contains
+        Params: text (str)
+        Brief: Mask of assets whose name contains text, ignoring case. Uses the np.strings ufunc
+               on NumPy 2; older np.char.find loops in Python, so there the mask is built from the
+               plain name list instead.
+        """
+        text = text.lower()
+        if self.name_array is not None:
+            return np.strings.find(self.name_array, text) >= 0
+        return np.fromiter([text in name for name in self.names], dtype=bool, count=len(self.names))
+
+    def symbol_is(self, symbol):
+        """
+        Function: symbol_is
+        Params: symbol (str)
+        Brief: Mask of assets with the given ticker symbol, ignoring case
+        """
+        return self.symbols == symbol.lower()
+
+    def where(self, column, above=None, below=None):
+        """
+        Function: where
+        Params: column (str), above (float or None), below (float or None)
+        Brief: Mask of assets with above < value < below; missing values never match
+        """
+        values = self.column(column)
+        mask = ~np.isnan(values)
+        if above is not None:
+            mask &= values > above
+        if below is not None:
+            mask &= values < below
+        return mask
+
+    def select(self, mask=None):
+        """
+        Function: select
+        Params: mask (bool array or None)
+        Brief: Asset dicts matching mask, in table order
+        """
+        if mask is None:
+            return list(self.assets)
+        return [self.assets[i] for i in np.flatnonzero(mask).tolist()]
+
+    def top(self, column, n, mask=None, ascending=False):
+        """
+        Function: top
+        Params: column (str), n (int), mask (bool array or None), ascending (bool)
+        Brief: The n asset dicts matching mask with the largest (or smallest) values of column
+        """
+        values = self.column(column)
+        candidates = np.flatnonzero(~np.isnan(values) if mask is None else mask & ~np.isnan(values))
+        keys = values[candidates] if ascending else -values[candidates]
+        if n < len(candidates):
+            part = np.argpartition(keys, n)[:n]
+            candidates, keys = candidates[part], keys[part]
+        order = np.argsort(keys, kind="stable")
+        return [self.assets[i] for i in candidates[order]]
+
+def name_grams(text, size=3):
+    """
+    Function: name_grams
+    Params: text (str), size (int) - longest gram
+    Brief: Every substring of text up to size characters long
+    """
+    return {text[i:i + length] for length in range(1, size + 1) for i in range(len(text) - length + 1)}
+
+def asset_id(asset):
+    """
+    Function: asset_id
+    Params: asset (dict)
+    Brief: Stable key of an asset across snapshots
+    """
+    return asset.get("id") or asset.get("symbol") or asset.get("name")
+
+class AssetIndex:
+    """
+    Class: AssetIndex
+    Params: assets (list or None) - first snapshot
+    Brief: Query indexes kept current across snapshots. Prices live in a sorted list for bisect
+           threshold and range queries; lowercased names are indexed by every 1-3 character gram,
+           so short searches are a single lookup and longer ones intersect trigram posting sets
+           before checking candidates. update() only touches assets whose price, name or symbol
+           changed. Results come back in the order of the latest snapshot. Safe to update from
+           a poller thread while other threads query.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self, assets=None):
+        self.lock = threading.RLock()
+        self.assets = {}
+        self.rank = {}
+        self.prices = []
+        self.price_ids = []
+        self.grams = {}
+        self.symbols = {}
+        if assets is not None:
+            self.update(assets)
+
+    def __len__(self):
+        return len(self.assets)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.assets.values()))
+
+    def add_name(self, key, asset):
+        """
+        Function: add_name
+        Params: key (str), asset (dict)
+        Brief: Index the name grams and symbol of an asset
+        """
+        for gram in name_grams((asset.get("name") or "").lower(), self.GRAM_SIZE):
+            self.grams.setdefault(gram, set()).add(key)
+        self.symbols.setdefault((asset.get("symbol") or "").lower(), set()).add(key)
+
+    def remove_name(self, key, asset):
+        """
+        Function: remove_name
+        Params: key (str), asset (dict)
+        Brief: Drop an asset from the name and symbol indexes
+        """
+        for gram in name_grams((asset.get("name") or "").lower(), self.GRAM_SIZE):
+            self.grams[gram].discard(key)
+            if not self.grams[gram]:
+                del self.grams[gram]
+        symbol = (asset.get("symbol") or "").lower()
+        self.symbols[symbol].discard(key)
+        if not self.symbols[symbol]:
+            del self.symbols[symbol]
+
+    def add_price(self, key, price):
+        """
+        Function: add_price
+        Params: key (str), price (float)
+        Brief: Insert a price into the sorted price list
+        """
+        if not math.isnan(price):
+            i = bisect.bisect_right(self.prices, price)
+            self.prices.insert(i, price)
+            self.price_ids.insert(i, key)
+
+    def remove_price(self, key, price):
+        """
+        Function: remove_price
+        Params: key (str), price (float)
+        Brief: Remove the price entry of an asset from the sorted price list
+        """
+        if not math.isnan(price):
+            i = bisect.bisect_left(self.prices, price)
+            while self.price_ids[i] != key:
+                i += 1
+            del self.prices[i]
+            del self.price_ids[i]
+
+    def rebuild_prices(self):
+        """
+        Function: rebuild_prices
+        Brief: Sort the price list from scratch
+        """
+        pairs = sorted((price, key) for key, price in
+                       ((key, to_float(asset.get("priceUsd"))) for key, asset in self.assets.items())
+                       if not math.isnan(price))
+        self.prices = [price for price, _ in pairs]
+        self.price_ids = [key for _, key in pairs]
+
+    def update(self, assets):
+        """
+        Function: update
+        Params: assets (list) - full new snapshot
+        Brief: Bring the indexes in line with a snapshot and return counts of added, removed
+               and repriced assets. The price list is re-sorted from scratch when most prices moved.
+        """
+        with self.lock:
+            snapshot = {asset_id(asset): asset for asset in assets}
+            removed = [key for key in self.assets if key not in snapshot]
+            added = [key for key in snapshot if key not in self.assets]
+            repriced = []
+            for key, asset in snapshot.items():
+                old = self.assets.get(key)
+                if old is None:
+                    continue
+                if old.get("priceUsd") != asset.get("priceUsd"):
+                    repriced.append(key)
+                if old.get("name") != asset.get("name") or old.get("symbol") != asset.get("symbol"):
+                    self.remove_name(key, old)
+                    self.add_name(key, asset)
+            rebuild = len(added) + len(removed) + len(repriced) > len(snapshot) // 8
+            for key in removed:
+                old = self.assets.pop(key)
+                self.remove_name(key, old)
+                if not rebuild:
+                    self.remove_price(key, to_float(old.get("priceUsd")))
+            for key in repriced:
+                if not rebuild:
+                    self.remove_price(key, to_float(self.assets[key].get("priceUsd")))
+                    self.add_price(key, to_float(snapshot[key].get("priceUsd")))
+            for key in added:
+                self.add_name(key, snapshot[key])
+                if not rebuild:
+                    self.add_price(key, to_float(snapshot[key].get("priceUsd")))
+            self.assets = snapshot
+            self.rank = {key: i for i, key in enumerate(snapshot)}
+            if rebuild:
+                self.rebuild_prices()
+            return {"added": len(added), "removed": len(removed), "repriced": len(repriced)}
+
+    def update_prices(self, prices):
+        """
+        Function: update_prices
+        Params: prices (dict) - asset id -> new priceUsd
+        Brief: Apply streamed price updates in place, moving each asset in the price list.
+               Returns the number of known assets updated; unknown ids are ignored.
+        """
+        applied = 0
+        with self.lock:
+            for key, price in prices.items():
+                asset = self.assets.get(key)
+                if asset is None:
+                    continue
+                self.remove_price(key, to_float(asset.get("priceUsd")))
+                asset["priceUsd"] = str(price)
+                self.add_price(key, to_float(price))
+                applied += 1
+        return applied
+
+    def ordered(self, keys):
+        """
+        Function: ordered
+        Params: keys (iterable)
+        Brief: Assets of keys in snapshot order
+        """
+        return [self.assets[key] for key in sorted(keys, key=self.rank.__getitem__)]
+
+    def price_range(self, low=None, high=None, inclusive=True):
+        """
+        Function: price_range
+        Params: low (float or None), high (float or None), inclusive (bool)
+        Brief: Assets priced between low and high, in snapshot order
+        """
+        with self.lock:
+            if low is None:
+                start = 0
+            else:
+                start = (bisect.bisect_left if inclusive else bisect.bisect_right)(self.prices, low)
+            if high is None:
+                stop = len(self.prices)
+            else:
+                stop = (bisect.bisect_right if inclusive else bisect.bisect_left)(self.prices, high)
+            return self.ordered(self.price_ids[start:stop])
+
+    def price_above(self, value):
+        """
+        Function: price_above
+        Params: value (float)
+        Brief: Assets priced strictly above value, in snapshot order
+        """
+        return self.price_range(low=value, inclusive=False)
+
+    def name_contains(self, text):
+        """
+        Function: name_contains
+        Params: text (str)
+        Brief: Assets whose name contains text, ignoring case, in snapshot order
+        """
+        text = text.lower()
+        with self.lock:
+            if not text:
+                return list(self.assets.values())
+            if len(text) <= self.GRAM_SIZE:
+                return self.ordered(self.grams.get(text, ()))
+            postings = sorted((self.grams.get(text[i:i + self.GRAM_SIZE], set())
+                               for i in range(len(text) - self.GRAM_SIZE + 1)), key=len)
+            candidates = set.intersection(*postings)
+            return self.ordered(key for key in candidates if text in (self.assets[key].get("name") or "").lower())
+
+    def symbol_is(self, symbol):
+        """
+        Function: symbol_is
+        Params: symbol (str)
+        Brief: Assets with the given ticker symbol, ignoring case
+        """
+        with self.lock:
+            return self.ordered(self.symbols.get(symbol.lower(), ()))
+
+class TickStore:
+    """
+    Class: TickStore
+    Params: directory (str), segment_size (int) - ticks buffered per asset before they are written,
+            flush_interval (float) - seconds a tick may stay buffered
+    Brief: Append-only price/volume history, one file per asset. Ticks are buffered and written,
+           once segment_size ticks or flush_interval seconds have accumulated, as delta-encoded segments: a header with the first timestamp and fixed-point price,
+           then uint32 millisecond time deltas, fixed-point price deltas and float32 volumes.
+           Each segment uses the fewest decimal digits (at most 8) that reproduce its prices
+           and the narrowest of int16/int32/int64 that holds its price deltas; a segment no
+           digit count reproduces exactly keeps raw float64 prices instead. Files are read
+           through np.memmap and only segments overlapping a query window are decoded.
+           Ticks not newer than the last one of an asset are dropped. Requires NumPy.
+    """
+
+    HEADER = struct.Struct("<IBB2xqqq")
+    MAX_DIGITS = 8
+    RAW_DIGITS = 255
+    PRICE_TYPES = {2: "<i2", 4: "<i4", 8: "<i8"}
+
+    def __init__(self, directory, segment_size=3600, flush_interval=60.0):
+        if np is None:
+            raise ImportError("TickStore requires numpy: pip install numpy")
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.buffers = {}
+        self.last_times = {}
+        self.segments = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, asset):
+        """
+        Function: path
+        Params: asset (str) - asset id
+        Brief: File of an asset
+        """
+        return os.path.join(self.directory, re.sub(r"[^\w.-]+", "_", asset) + ".ticks")
+
+    def scan(self, asset):
+        """
+        Function: scan
+        Params: asset (str)
+        Brief: Segment directory of an asset as (offset, count, width, digits, first ms, last ms, price base),
+               reading only headers written since the last scan
+        """
+        scanned, segments = self.segments.get(asset, (0, []))
+        path = self.path(asset)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size > scanned:
+            with open(path, "rb") as f:
+                offset = scanned
+                while offset + self.HEADER.size <= size:
+                    f.seek(offset)
+                    count, width, digits, first, last, base = self.HEADER.unpack(f.read(self.HEADER.size))
+                    segments.append((offset, count, width, digits, first, last, base))
+                    offset += self.HEADER.size + count * (8 + width)
+            self.segments[asset] = (offset, segments)
+        return segments
+
+    def last_time(self, asset):
+        """
+        Function: last_time
+        Params: asset (str)
+        Brief: Timestamp in milliseconds of the newest tick of an asset, or None
+        """
+        if asset not in self.last_times:
+            segments = self.scan(asset)
+            self.last_times[asset] = segments[-1][5] if segments else None
+        return self.last_times[asset]
+
+    def append(self, asset, timestamp, price, volume=float("nan")):
+        """
+        Function: append
+        Params: asset (str), timestamp (float) - seconds, price (float), volume (float)
+        Brief: Buffer one tick, writing a segment when the buffer is full or older than
+               flush_interval. Returns True if kept.
+        """
+        millis = int(round(timestamp * 1000))
+        with self.lock:
+            last = self.last_time(asset)
+            if math.isnan(price) or (last is not None and millis <= last):
+                return False
+            buffer = self.buffers.get(asset)
+            if buffer is None:
+                buffer = self.buffers[asset] = ([], [], [], time.monotonic())
+            buffer[0].append(millis)
+            buffer[1].append(price)
+            buffer[2].append(volume)
+            self.last_times[asset] = millis
+            if len(buffer[0]) >= self.segment_size or time.monotonic() - buffer[3] >= self.flush_interval:
+                self.flush(asset)
+            return True
+
+    def append_many(self, asset, timestamps, prices, volumes=None):
+        """
+        Function: append_many
+        Params: asset (str), timestamps (array, seconds), prices (array), volumes (array or None)
+        Brief: Bulk-append increasing ticks straight to segments. Returns the number kept.
+        """
+        millis = np.round(np.asarray(timestamps, dtype=np.float64) * 1000).astype(np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.full(len(prices), np.nan) if volumes is None else np.asarray(volumes, dtype=np.float64)
+        with self.lock:
+            self.flush(asset)
+            last = self.last_time(asset)
+            keep = ~np.isnan(prices)
+            if last is not None:
+                keep &= millis > last
+            millis, prices, volumes = millis[keep], prices[keep], volumes[keep]
+            if len(millis) > 1 and np.any(np.diff(millis) <= 0):
+                raise ValueError("append_many needs strictly increasing timestamps")
+            with open(self.path(asset), "ab") as f:
+                for start in range(0, len(millis), self.segment_size):
+                    stop = start + self.segment_size
+                    f.write(self.encode(millis[start:stop], prices[start:stop], volumes[start:stop]))
+            if len(millis):
+                self.last_times[asset] = int(millis[-1])
+            return len(millis)
+
+    def encode(self, millis, prices, volumes):
+        """
+        Function: encode
+        Params: millis (int64 array), prices (float64 array), volumes (float64 array)
+        Brief: Bytes of one delta-encoded segment
+        """
+        time_deltas = np.diff(millis, prepend=millis[0])
+        if time_deltas.max() > np.iinfo(np.uint32).max:
+            raise ValueError("Gap between ticks is too long for one segment")
+        for digits in range(self.MAX_DIGITS + 1):
+            fixed = np.round(prices * 10 ** digits)
+            if np.array_equal(fixed / 10 ** digits, prices) and np.abs(fixed).max() <= np.iinfo(np.int64).max // 2:
+                fixed = fixed.astype(np.int64)
+                price_deltas = np.diff(fixed, prepend=fixed[0])
+                largest = np.abs(price_deltas).max()
+                width = next(width for width, dtype in self.PRICE_TYPES.items() if largest <= np.iinfo(dtype).max)
+                base = int(fixed[0])
+                price_bytes = price_deltas.astype(self.PRICE_TYPES[width]).tobytes()
+                break
+        else:
+            digits, width, base = self.RAW_DIGITS, 8, 0
+            price_bytes = prices.astype("<f8").tobytes()
+        header = self.HEADER.pack(len(millis), width, digits, int(millis[0]), int(millis[-1]), base)
+        return b"".join((header, time_deltas.astype("<u4").tobytes(), price_bytes, volumes.astype("<f4").tobytes()))
+
+    def flush(self, asset=None):
+        """
+        Function: flush
+        Params: asset (str or None) - None for every asset
+        Brief: Write buffered ticks as segments
+        """
+        with self.lock:
+            for name in ([asset] if asset is not None else list(self.buffers)):
+                buffer = self.buffers.pop(name, None)
+                if buffer and buffer[0]:
+                    with open(self.path(name), "ab") as f:
+                        f.write(self.encode(np.array(buffer[0], dtype=np.int64), np.array(buffer[1]),
+                                            np.array(buffer[2])))
+
+    def record_snapshot(self, snapshot):
+        """
+        Function: record_snapshot
+        Params: snapshot (dict) - as published by AssetPoller
+        Brief: Append the price and 24h volume of every asset in a snapshot, then write the
+               buffers of assets that have been waiting longer than flush_interval
+        """
+        with self.lock:
+            for asset in snapshot["assets"]:
+                self.append(asset_id(asset), snapshot["timestamp"], to_float(asset.get("priceUsd")),
+                            to_float(asset.get("volumeUsd24Hr")))
+            now = time.monotonic()
+            for name in [name for name, buffer in self.buffers.items() if now - buffer[3] >= self.flush_interval]:
+                self.flush(name)
+
+    def read(self, asset, start=None, end=None):
+        """
+        Function: read
+        Params: asset (str), start (float or None), end (float or None) - seconds, inclusive
+        Brief: Return (timestamps in seconds, prices, volumes) arrays of an asset within a window
+        """
+        low = -2 ** 63 if start is None else int(round(start * 1000))
+        high = 2 ** 63 - 1 if end is None else int(round(end * 1000))
+        parts = []
+        with self.lock:
+            segments = [segment for segment in self.scan(asset) if segment[5] >= low and segment[4] <= high]
+            buffer = self.buffers.get(asset)
+            if buffer:
+                parts.append((np.array(buffer[0], dtype=np.int64), np.array(buffer[1]), np.array(buffer[2])))
+        if segments:
+            data = np.memmap(self.path(asset), dtype=np.uint8, mode="r")
+            decoded = [self.decode(data, *segment) for segment in segments]
+            parts = decoded + parts
+        if not parts:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        millis, prices, volumes = (np.concatenate(column) for column in zip(*parts))
+        first, last = np.searchsorted(millis, low, "left"), np.searchsorted(millis, high, "right")
+        return millis[first:last] / 1000.0, prices[first:last], volumes[first:last]
+
+    def decode(self, data, offset, count, width, digits, first, last, base):
+        """
+        Function: decode
+        Params: data (uint8 memmap), segment fields from scan()
+        Brief: Decode one segment into (milliseconds, prices, volumes) arrays
+        """
+        position = offset + self.HEADER.size
+        time_deltas = np.frombuffer(data, dtype="<u4", count=count, offset=position)
+        position += count * 4
+        if digits == self.RAW_DIGITS:
+            prices = np.frombuffer(data, dtype="<f8", count=count, offset=position).astype(np.float64)
+        else:
+            price_deltas = np.frombuffer(data, dtype=self.PRICE_TYPES[width], count=count, offset=position)
+            prices = (base + np.cumsum(price_deltas, dtype=np.int64)) / 10 ** digits
+        position += count * width
+        volumes = np.frombuffer(data, dtype="<f4", count=count, offset=position).astype(np.float64)
+        millis = first + np.cumsum(time_deltas, dtype=np.int64)
+        return millis, prices, volumes
+
+    def ohlc(self, asset, interval, start=None, end=None):
+        """
+        Function: ohlc
+        Params: asset (str), interval (float) - bucket seconds, start (float or None), end (float or None)
+        Brief: Open/high/low/close per interval bucket as a dict of arrays; 'time' is each bucket start
+        """
+        timestamps, prices, _ = self.read(asset, start, end)
+        if not len(prices):
+            return {name: np.zeros(0) for name in ("time", "open", "high", "low", "close", "ticks")}
+        buckets = np.floor(timestamps / interval).astype(np.int64)
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        ends = np.append(starts[1:], len(prices))
+        return {
+            "time": buckets[starts] * interval,
+            "open": prices[starts],
+            "high": np.maximum.reduceat(prices, starts),
+            "low": np.minimum.reduceat(prices, starts),
+            "close": prices[ends - 1],
+            "ticks": ends - starts,
+        }
+
+    def rolling(self, asset, window, start=None, end=None):
+        """
+        Function: rolling
+        Params: asset (str), window (float) - seconds, start (float or None), end (float or None)
+        Brief: Rolling mean price and volatility (standard deviation of log returns) over the
+               trailing window at every tick, as (timestamps, means, volatilities) arrays
+        """
+        first = None if start is None else start - window
+        timestamps, prices, _ = self.read(asset, first, end)
+        if not len(prices):
+            return timestamps, prices, prices
+        left = np.searchsorted(timestamps, timestamps - window, "right")
+        right = np.arange(1, len(prices) + 1)
+        sums = np.concatenate(([0.0], np.cumsum(prices)))
+        means = (sums[right] - sums[left]) / (right - left)
+        returns = np.concatenate(([0.0], np.diff(np.log(prices))))
+        return_sums = np.concatenate(([0.0], np.cumsum(returns)))
+        square_sums = np.concatenate(([0.0], np.cumsum(returns * returns)))
+        # Returns whose both prices lie in the window: indices left + 1 .. tick.
+        lower = left + 1
+        count = right - lower
+        total = return_sums[right] - return_sums[lower]
+        squares = square_sums[right] - square_sums[lower]
+        variance = np.where(count > 1, (squares - total * total / np.maximum(count, 1)) / np.maximum(count - 1, 1),
+                            np.nan)
+        volatility = np.sqrt(np.maximum(variance, 0.0))
+        keep = slice(None) if start is None else slice(np.searchsorted(timestamps, start, "left"), None)
+        return timestamps[keep], means[keep], volatility[keep]
+
 def filter_name(datas, name):
     """
     Function: filter_name
-    Params: datas (list), name (str)
+    Params: datas (list, AssetTable or AssetIndex), name (str)
     Brief: Filter cryptocurrencies by name
     """
     try:
@@ -62,7 +995,12 @@ def filter_name(datas, name):
             print("No data available to filter by name.")
             return []
         
-        filtered_data = [i for i in datas if name.lower() in i.get("name", "").lower()]
+        if isinstance(datas, AssetIndex):
+            filtered_data = datas.name_contains(name)
+        elif isinstance(datas, AssetTable):
+            filtered_data = datas.select(datas.name_contains(name))
+        else:
+            filtered_data = [i for i in datas if name.lower() in i.get("name", "").lower()]
         
         if not filtered_data:
             print(f"No cryptocurrencies found with name containing '{name}'.")
@@ -79,7 +1017,7 @@ def filter_name(datas, name):
 def filter_value(datas, value):
     """
     Function: filter_value
-    Params: datas (list), value (float)
+    Params: datas (list, AssetTable or AssetIndex), value (float)
     Brief: Filter cryptocurrencies by price
     """
     try:
@@ -87,7 +1025,12 @@ def filter_value(datas, value):
             print("No data available to filter by value.")
             return []
         
-        filtered_data = [i for i in datas if float(i.get("priceUsd", 0)) > value]
+        if isinstance(datas, AssetIndex):
+            filtered_data = datas.price_above(value)
+        elif isinstance(datas, AssetTable):
+            filtered_data = datas.select(datas.where("price", above=value))
+        else:
+            filtered_data = [i for i in datas if float(i.get("priceUsd", 0)) > value]
         
         if not filtered_data:
             print(f"No cryptocurrencies found with price greater than {value}.")
@@ -212,11 +1155,90 @@ def handle_filter_choice(choice, datas):
         print(f"Unexpected error while handling filter choice: {e}")
 
 
+def get_arguments():
+    """
+    Function: get_arguments
+    Brief: Parse command-line arguments
+    """
+    parser = argparse.ArgumentParser(description="Cryptocurrency status and filters.")
+    parser.add_argument("--poll", action="store_true", help="Poll all assets headlessly and print a line per snapshot.")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between polls.")
+    parser.add_argument("--rounds", type=int, default=0, help="Number of polls, 0 to poll until interrupted.")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Assets per page request.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pages fetched in parallel.")
+    parser.add_argument("--url", default=API_URL, help="Assets endpoint.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Keep prices live from the CoinCap WebSocket instead of re-polling every 5 seconds.")
+    parser.add_argument("--ws-url", default=PRICES_WS_URL, help="Prices WebSocket endpoint.")
+    parser.add_argument("--ticks", metavar="DIR", help="Record every polled price and volume in a tick store.")
+    parser.add_argument("--flush-interval", type=float, default=60,
+                        help="Seconds polled ticks may stay in memory before they are written.")
+    return parser.parse_args()
+
+def run_poller(args):
+    """
+    Function: run_poller
+    Params: args (argparse.Namespace)
+    Brief: Run the headless poller until the requested rounds are done or the user interrupts
+    """
+    poller = AssetPoller(args.url, args.interval, args.page_size, args.concurrency)
+    poller.subscribe(print_snapshot_summary)
+    store = TickStore(args.ticks, flush_interval=args.flush_interval) if args.ticks else None
+    if store is not None:
+        poller.subscribe(store.record_snapshot)
+    try:
+        poller.run(args.rounds)
+    except KeyboardInterrupt:
+        print("\nOperation interrupted by the user.")
+    finally:
+        poller.stop()
+        if store is not None:
+            store.flush()
+
+def run_stream(args):
+    """
+    Function: run_stream
+    Params: args (argparse.Namespace)
+    Brief: Load all assets once, keep their prices live from the WebSocket feed and run
+           the interactive filters against the live index
+    """
+    session = create_session(args.concurrency)
+    try:
+        index = AssetIndex(fetch_all_assets(session, args.url, args.page_size, args.concurrency))
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"Could not load assets: {e}")
+        return
+    finally:
+        session.close()
+    stream = PriceStream(index, args.ws_url)
+    stream.start()
+    try:
+        while True:
+            clear_screen()
+            latency = stream.latency_summary()["p50"]
+            print(f"Live: {len(index)} assets, {stream.updates} price updates"
+                  + (f", median update latency {latency * 1e6:.0f} us" if latency is not None else ""))
+            choice = get_filter_choice()
+            if choice:
+                handle_filter_choice(choice, index)
+            input("Press Enter to refresh...")
+    except (KeyboardInterrupt, EOFError):
+        print("\nOperation interrupted by the user.")
+    finally:
+        stream.stop()
+
 def main():
     """
     Function: main
     Brief: Main loop to drive the program
     """
+    args = get_arguments()
+    if args.poll:
+        run_poller(args)
+        return
+    if args.stream:
+        run_stream(args)
+        return
     while True:
         try:
             try:
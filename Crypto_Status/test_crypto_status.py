@@ -1,7 +1,63 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
+from urllib.parse import urlparse, parse_qs
 import crypto_status
 
+
+class MockCoinCapServer:
+    """Local CoinCap stand-in serving /v2/assets pages from num_assets synthetic assets"""
+
+    def __init__(self, num_assets, delay=0.0):
+        server = self
+        self.assets = [{'id': f'coin-{i}', 'rank': str(i + 1), 'name': f'Coin {i}', 'symbol': f'C{i}',
+                        'priceUsd': str(1000.0 / (i + 1))} for i in range(num_assets)]
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.pages = []
+        self.connections = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                offset = int(query.get('offset', ['0'])[0])
+                limit = int(query.get('limit', ['100'])[0])
+                with server.lock:
+                    server.pages.append(offset)
+                    server.connections.add(self.client_address)
+                if server.delay:
+                    time.sleep(server.delay)
+                body = json.dumps({'data': server.assets[offset:offset + limit], 'timestamp': 0}).encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/v2/assets"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
 class TestCryptoStatus(unittest.TestCase):
 
     @patch('crypto_status.requests.get')
@@ -92,5 +148,394 @@ class TestCryptoStatus(unittest.TestCase):
         crypto_status.handle_filter_choice('1', sample_data)
         mock_filter.assert_called_with(sample_data, 'Bitcoin')
 
+@unittest.skipUnless(crypto_status.np is not None, "numpy is not installed")
+class TestAssetTable(unittest.TestCase):
+
+    def setUp(self):
+        self.assets = [
+            {'name': 'Bitcoin', 'symbol': 'BTC', 'priceUsd': '40000', 'marketCapUsd': '700000000000', 'volumeUsd24Hr': '50000000000', 'changePercent24Hr': '3.5'},
+            {'name': 'Ethereum', 'symbol': 'ETH', 'priceUsd': '3000', 'marketCapUsd': '400000000000', 'volumeUsd24Hr': '40000000000', 'changePercent24Hr': '2.5'},
+            {'name': 'Bitcoin Cash', 'symbol': 'BCH', 'priceUsd': '300', 'marketCapUsd': '6000000000', 'volumeUsd24Hr': None, 'changePercent24Hr': '-1.2'},
+            {'name': 'Tether', 'symbol': 'USDT', 'priceUsd': '1.0001', 'marketCapUsd': '90000000000', 'volumeUsd24Hr': '60000000000', 'changePercent24Hr': '0.01'},
+        ]
+        self.table = crypto_status.AssetTable(self.assets)
+
+    def test_filters_match_list_filters(self):
+        """Test that table filters return the same assets as the list filters"""
+        for name in ('bitcoin', 'ETH', 'x'):
+            with patch('builtins.print'):
+                self.assertEqual(crypto_status.filter_name(self.table, name), crypto_status.filter_name(self.assets, name))
+        for value in (0, 500, 50000):
+            with patch('builtins.print'):
+                self.assertEqual(crypto_status.filter_value(self.table, value), crypto_status.filter_value(self.assets, value))
+
+    def test_name_contains_without_string_ufuncs(self):
+        """Test that the plain-list name filter used on NumPy 1.x matches the ufunc mask"""
+        fallback = crypto_status.AssetTable(self.assets)
+        fallback.name_array = None
+        for name in ('bitcoin', 'ETH', 'x', ''):
+            self.assertEqual(fallback.name_contains(name).tolist(), self.table.name_contains(name).tolist())
+            self.assertEqual(fallback.name_contains(name).dtype, bool)
+        self.assertEqual(crypto_status.AssetTable([]).name_contains('a').tolist(), [])
+
+    def test_composed_masks(self):
+        """Test AND/OR/NOT composition, ranges and missing values"""
+        table = self.table
+        both = table.name_contains('bitcoin') & table.where('price', above=1000)
+        self.assertEqual([a['symbol'] for a in table.select(both)], ['BTC'])
+        either = table.symbol_is('usdt') | table.where('change', below=0)
+        self.assertEqual([a['symbol'] for a in table.select(either)], ['BCH', 'USDT'])
+        self.assertEqual([a['symbol'] for a in table.select(~table.where('volume'))], ['BCH'])
+        self.assertEqual(len(table.select(table.where('price', above=1, below=3000))), 2)
+        with self.assertRaises(KeyError):
+            table.where('supply')
+
+    def test_top(self):
+        """Test top-N by column with masks and missing values"""
+        table = self.table
+        self.assertEqual([a['symbol'] for a in table.top('market_cap', 2)], ['BTC', 'ETH'])
+        self.assertEqual([a['symbol'] for a in table.top('volume', 10)], ['USDT', 'BTC', 'ETH'])
+        self.assertEqual([a['symbol'] for a in table.top('change', 1, ascending=True)], ['BCH'])
+        self.assertEqual([a['symbol'] for a in table.top('price', 5, mask=table.name_contains('bitcoin'))], ['BTC', 'BCH'])
+        self.assertEqual(len(crypto_status.AssetTable([])), 0)
+        self.assertEqual(crypto_status.AssetTable([]).top('price', 3), [])
+
+class TestAssetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.assets = [
+            {'id': 'bitcoin', 'name': 'Bitcoin', 'symbol': 'BTC', 'priceUsd': '40000'},
+            {'id': 'ethereum', 'name': 'Ethereum', 'symbol': 'ETH', 'priceUsd': '3000'},
+            {'id': 'bitcoin-cash', 'name': 'Bitcoin Cash', 'symbol': 'BCH', 'priceUsd': '300'},
+            {'id': 'tether', 'name': 'Tether', 'symbol': 'USDT', 'priceUsd': '1.0001'},
+            {'id': 'usd-coin', 'name': 'USD Coin', 'symbol': 'USDC', 'priceUsd': '1.0001'},
+            {'id': 'mystery', 'name': 'Mystery', 'symbol': 'MYS', 'priceUsd': None},
+        ]
+        self.index = crypto_status.AssetIndex(self.assets)
+
+    def ids(self, assets):
+        return [asset['id'] for asset in assets]
+
+    def test_queries_match_list_filters(self):
+        """Test that index queries return what the list filters return"""
+        assets = [asset for asset in self.assets if asset['priceUsd'] is not None]
+        index = crypto_status.AssetIndex(assets)
+        for name in ('', 'b', 'co', 'bit', 'coin', 'bitcoin c', 'ether', 'zzzz'):
+            with patch('builtins.print'):
+                self.assertEqual(crypto_status.filter_name(index, name), crypto_status.filter_name(assets, name))
+        for value in (0, 1.0001, 300, 2999.99, 50000):
+            with patch('builtins.print'):
+                self.assertEqual(crypto_status.filter_value(index, value), crypto_status.filter_value(assets, value))
+
+    def test_ranges_and_symbols(self):
+        """Test inclusive and exclusive price ranges and symbol lookup"""
+        self.assertEqual(self.ids(self.index.price_range(1.0001, 300)), ['bitcoin-cash', 'tether', 'usd-coin'])
+        self.assertEqual(self.ids(self.index.price_range(1.0001, 300, inclusive=False)), [])
+        self.assertEqual(self.ids(self.index.price_range(high=2)), ['tether', 'usd-coin'])
+        self.assertEqual(len(self.index.price_range()), 5)
+        self.assertEqual(self.ids(self.index.symbol_is('usdt')), ['tether'])
+
+    def test_incremental_update(self):
+        """Test that a new snapshot reprices, renames, adds and removes assets"""
+        snapshot = [dict(asset) for asset in self.assets if asset['id'] != 'ethereum']
+        snapshot[0]['priceUsd'] = '45000'
+        snapshot[1]['name'] = 'Bitcoin Cash ABC'
+        snapshot.append({'id': 'solana', 'name': 'Solana', 'symbol': 'SOL', 'priceUsd': '150'})
+        stats = self.index.update(snapshot)
+        self.assertEqual(stats, {'added': 1, 'removed': 1, 'repriced': 1})
+        self.assertEqual(self.ids(self.index.price_above(100)), ['bitcoin', 'bitcoin-cash', 'solana'])
+        self.assertEqual(self.ids(self.index.price_range(40000, 40000)), [])
+        self.assertEqual(self.ids(self.index.name_contains('abc')), ['bitcoin-cash'])
+        self.assertEqual(self.index.name_contains('ethereum'), [])
+        self.assertEqual(self.index.symbol_is('eth'), [])
+        self.assertNotIn('ere', self.index.grams)
+        fresh = crypto_status.AssetIndex(snapshot)
+        self.assertEqual(self.index.prices, fresh.prices)
+        self.assertEqual(sorted(self.index.price_ids), sorted(fresh.price_ids))
+
+    def test_small_updates_skip_rebuild(self):
+        """Test that a snapshot with few changes updates the price list in place"""
+        assets = [{'id': f'coin-{i}', 'name': f'Coin {i}', 'symbol': f'C{i}', 'priceUsd': str(i)} for i in range(100)]
+        index = crypto_status.AssetIndex(assets)
+        assets[5] = dict(assets[5], priceUsd='1000')
+        with patch.object(index, 'rebuild_prices') as rebuild:
+            self.assertEqual(index.update(assets)['repriced'], 1)
+        rebuild.assert_not_called()
+        self.assertEqual(self.ids(index.price_above(98)), ['coin-5', 'coin-99'])
+
+@unittest.skipUnless(crypto_status.np is not None, "numpy is not installed")
+class TestTickStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = crypto_status.TickStore(self.tmp_dir.name, segment_size=7)
+        np = crypto_status.np
+        rng = np.random.default_rng(0)
+        self.times = 1700000000 + np.arange(100, dtype=np.float64)
+        self.prices = np.round(40000 * np.exp(np.cumsum(rng.normal(0, 0.001, 100))), 8)
+        self.volumes = rng.uniform(1e9, 2e9, 100)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test that ticks written one by one and in bulk read back exactly"""
+        np = crypto_status.np
+        for i in range(60):
+            self.store.append('bitcoin', self.times[i], self.prices[i], self.volumes[i])
+        self.assertFalse(self.store.append('bitcoin', self.times[10], 1.0))
+        self.assertEqual(self.store.append_many('bitcoin', self.times[50:], self.prices[50:], self.volumes[50:]), 40)
+        timestamps, prices, volumes = self.store.read('bitcoin')
+        np.testing.assert_array_equal(timestamps, self.times)
+        np.testing.assert_allclose(prices, self.prices, rtol=0, atol=1e-8)
+        np.testing.assert_allclose(volumes, self.volumes, rtol=1e-6)
+        window = self.store.read('bitcoin', self.times[20], self.times[29])[1]
+        np.testing.assert_allclose(window, self.prices[20:30], atol=1e-8)
+        reopened = crypto_status.TickStore(self.tmp_dir.name)
+        self.assertEqual(len(reopened.read('bitcoin')[0]), 100)
+        self.assertFalse(reopened.append('bitcoin', self.times[-1], 1.0))
+        self.assertLess(os.path.getsize(self.store.path('bitcoin')), 100 * 24)
+
+    def test_large_moves_and_snapshots(self):
+        """Test wide price deltas and recording poller snapshots"""
+        np = crypto_status.np
+        self.store.append_many('pump', [1, 2, 3], [0.00000001, 90000.5, 0.5])
+        np.testing.assert_allclose(self.store.read('pump')[1], [0.00000001, 90000.5, 0.5])
+        self.store.append_many('stable', [1, 2, 3], [1.0001, 1.0002, 0.9999])
+        self.assertEqual([(width, digits) for _, _, width, digits, *_ in self.store.scan('pump') + self.store.scan('stable')],
+                         [(8, 8), (2, 4)])
+        self.assertEqual(list(self.store.read('stable')[1]), [1.0001, 1.0002, 0.9999])
+        for second in range(3):
+            self.store.record_snapshot({'timestamp': 100 + second, 'assets': [
+                {'id': 'bitcoin', 'priceUsd': str(40000 + second), 'volumeUsd24Hr': '5e9'},
+                {'id': 'no-price', 'priceUsd': None}]})
+        self.assertEqual(list(self.store.read('bitcoin')[1]), [40000, 40001, 40002])
+        self.assertEqual(len(self.store.read('no-price')[0]), 0)
+
+    def test_flushes_by_elapsed_time(self):
+        """Test that buffered snapshot ticks reach disk after flush_interval, long before a full segment"""
+        store = crypto_status.TickStore(self.tmp_dir.name, segment_size=3600, flush_interval=60)
+        snapshot = lambda second: {'timestamp': 100 + second, 'assets': [
+            {'id': 'bitcoin', 'priceUsd': str(40000 + second)}, {'id': 'ethereum', 'priceUsd': '3000'}]}
+        with patch('crypto_status.time.monotonic', return_value=1000.0):
+            store.record_snapshot(snapshot(0))
+            store.record_snapshot(snapshot(1))
+        self.assertFalse(os.path.exists(store.path('bitcoin')))
+        with patch('crypto_status.time.monotonic', return_value=1060.0):
+            store.record_snapshot({'timestamp': 102, 'assets': [{'id': 'bitcoin', 'priceUsd': '40002'}]})
+        self.assertEqual(store.buffers, {})
+        reopened = crypto_status.TickStore(self.tmp_dir.name)
+        self.assertEqual(list(reopened.read('bitcoin')[1]), [40000, 40001, 40002])
+        self.assertEqual(list(reopened.read('ethereum')[1]), [3000, 3000])
+
+    def test_sub_cent_prices_round_trip(self):
+        """Test that prices below 1e-8 and with more than 8 decimals read back exactly"""
+        np = crypto_status.np
+        prices = [1.23e-9, 4.5e-9, 1.23e-8, 5e-8, 3.14159265358979e-10]
+        for second, price in enumerate(prices):
+            self.store.append('shiba', 1000 + second, price)
+        self.store.flush()
+        self.assertEqual(list(self.store.read('shiba')[1]), prices)
+        self.assertEqual([digits for _, _, _, digits, *_ in self.store.scan('shiba')], [self.store.RAW_DIGITS])
+        self.assertTrue(np.all(np.isfinite(self.store.rolling('shiba', 10)[2][2:])))
+        self.store.append('shiba', 2000, 0.5)
+        self.assertEqual(list(self.store.read('shiba')[1]), prices + [0.5])
+
+    def test_ohlc(self):
+        """Test OHLC buckets against a direct computation"""
+        self.store.append_many('bitcoin', self.times, self.prices)
+        bars = self.store.ohlc('bitcoin', 30, self.times[5], self.times[94])
+        prices = self.prices[5:95]
+        buckets = (self.times[5:95] // 30).astype(int)
+        for i, bucket in enumerate(sorted(set(buckets))):
+            selected = prices[buckets == bucket]
+            self.assertEqual(bars['time'][i], bucket * 30)
+            self.assertAlmostEqual(bars['open'][i], selected[0])
+            self.assertAlmostEqual(bars['high'][i], selected.max())
+            self.assertAlmostEqual(bars['low'][i], selected.min())
+            self.assertAlmostEqual(bars['close'][i], selected[-1])
+            self.assertEqual(bars['ticks'][i], len(selected))
+        self.assertEqual(len(self.store.ohlc('missing', 60)['open']), 0)
+
+    def test_rolling(self):
+        """Test rolling mean and volatility against a direct computation"""
+        np = crypto_status.np
+        self.store.append_many('bitcoin', self.times, self.prices)
+        timestamps, means, volatility = self.store.rolling('bitcoin', 10, start=self.times[50])
+        self.assertEqual(timestamps[0], self.times[50])
+        for i in (50, 75, 99):
+            window = self.prices[i - 9:i + 1]
+            self.assertAlmostEqual(means[i - 50], window.mean(), places=6)
+            self.assertAlmostEqual(volatility[i - 50], np.diff(np.log(window)).std(ddof=1), places=9)
+        self.assertTrue(np.isnan(self.store.rolling('bitcoin', 10)[2][0]))
+
+class PriceFeedStub:
+    """Local stand-in for the CoinCap prices WebSocket running on its own event loop"""
+
+    def __init__(self, messages_per_connection=None):
+        self.messages_per_connection = messages_per_connection
+        self.connections = set()
+        self.connected = threading.Event()
+        self.total_connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    async def handler(self, connection):
+        self.connections.add(connection)
+        self.total_connections += 1
+        self.connected.set()
+        try:
+            if self.messages_per_connection is not None:
+                for i in range(self.messages_per_connection):
+                    await connection.send(json.dumps({'bitcoin': str(40000 + self.total_connections)}))
+                return
+            await connection.wait_closed()
+        finally:
+            self.connections.discard(connection)
+
+    def __enter__(self):
+        self.thread.start()
+        async def serve():
+            return await crypto_status.websockets.serve(self.handler, "127.0.0.1", 0)
+        self.server = asyncio.run_coroutine_threadsafe(serve(), self.loop).result()
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        return self
+
+    def send(self, prices):
+        async def broadcast():
+            for connection in list(self.connections):
+                await connection.send(json.dumps(prices))
+        asyncio.run_coroutine_threadsafe(broadcast(), self.loop).result()
+
+    def __exit__(self, *exc_info):
+        self.server.close()
+        asyncio.run_coroutine_threadsafe(self.server.wait_closed(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+@unittest.skipUnless(crypto_status.websockets is not None, "websockets is not installed")
+class TestPriceStream(unittest.TestCase):
+
+    def setUp(self):
+        self.assets = [
+            {'id': 'bitcoin', 'name': 'Bitcoin', 'symbol': 'BTC', 'priceUsd': '40000'},
+            {'id': 'ethereum', 'name': 'Ethereum', 'symbol': 'ETH', 'priceUsd': '3000'},
+            {'id': 'tether', 'name': 'Tether', 'symbol': 'USDT', 'priceUsd': '1.0001'},
+        ]
+        self.index = crypto_status.AssetIndex(self.assets)
+
+    def test_updates_are_visible_to_filters(self):
+        """Test that streamed prices update the index in place while it is being queried"""
+        visible = threading.Event()
+        stream = crypto_status.PriceStream(self.index, on_update=lambda prices, applied: visible.set())
+        with PriceFeedStub() as stub:
+            stream.url = stub.url
+            stream.start()
+            self.assertTrue(stub.connected.wait(5))
+            sent = time.perf_counter()
+            stub.send({'ethereum': '50000', 'tether': '0.99', 'unknown-coin': '5'})
+            self.assertTrue(visible.wait(5))
+            end_to_end = time.perf_counter() - sent
+            stream.stop()
+        self.assertFalse(stream.thread.is_alive())
+        self.assertLess(end_to_end, 1.0)
+        self.assertEqual((stream.messages, stream.updates, stream.ignored), (1, 2, 1))
+        self.assertIs(self.index.assets['ethereum'], self.assets[1])
+        self.assertEqual(self.assets[1]['priceUsd'], '50000')
+        with patch('builtins.print'):
+            self.assertEqual([a['id'] for a in crypto_status.filter_value(self.index, 10000)], ['bitcoin', 'ethereum'])
+            self.assertEqual(crypto_status.filter_value(self.index, 0.995), crypto_status.filter_value(self.assets, 0.995))
+        self.assertIsNotNone(stream.latency_summary()['p99'])
+
+    @patch('builtins.print')
+    def test_reconnects_after_disconnect(self, mock_print):
+        """Test that the stream reconnects when the feed closes and ignores malformed messages"""
+        stream = crypto_status.PriceStream(self.index, reconnect_delay=0.01)
+        with PriceFeedStub(messages_per_connection=2) as stub:
+            stream.url = stub.url
+            stream.handle("not json")
+            asyncio.run(asyncio.wait_for(stream.run(max_messages=5), 10))
+        self.assertEqual(stream.messages, 5)
+        self.assertGreaterEqual(stream.reconnects, 2)
+        self.assertEqual(self.index.price_range(40000)[0]['priceUsd'], str(40000 + stub.total_connections))
+        mock_print.assert_any_call("Ignoring malformed price message: Expecting value: line 1 column 1 (char 0)")
+
+    @patch('builtins.print')
+    def test_ignores_non_object_messages(self, mock_print):
+        """Test that valid JSON which is not an object is ignored instead of crashing the stream"""
+        stream = crypto_status.PriceStream(self.index)
+        for message in ("[1, 2]", "5", "null", '"40000"'):
+            stream.handle(message)
+        stream.handle('{"bitcoin": "41000"}')
+        self.assertEqual((stream.messages, stream.updates), (1, 1))
+        self.assertEqual(self.assets[0]['priceUsd'], '41000')
+        mock_print.assert_any_call("Ignoring malformed price message: expected an object, got list")
+        mock_print.assert_any_call("Ignoring malformed price message: expected an object, got NoneType")
+
+class TestAssetPoller(unittest.TestCase):
+
+    def test_fetch_all_assets_pages(self):
+        """Test that every page is fetched once and assets keep their order"""
+        for num_assets in (0, 25, 30, 95):
+            with MockCoinCapServer(num_assets) as server:
+                session = crypto_status.create_session()
+                assets = crypto_status.fetch_all_assets(session, server.url, page_size=10, concurrency=3)
+                session.close()
+            self.assertEqual([asset['id'] for asset in assets], [f'coin-{i}' for i in range(num_assets)])
+            self.assertLessEqual(set(range(0, num_assets + 1, 10)), set(server.pages))
+            self.assertEqual(len(server.pages), len(set(server.pages)))
+
+    def test_fetch_all_assets_concurrent(self):
+        """Test that pages are fetched in parallel"""
+        with MockCoinCapServer(80, delay=0.1) as server:
+            session = crypto_status.create_session(8)
+            start = time.perf_counter()
+            assets = crypto_status.fetch_all_assets(session, server.url, page_size=10, concurrency=9)
+            elapsed = time.perf_counter() - start
+            session.close()
+        self.assertEqual(len(assets), 80)
+        self.assertLess(elapsed, 0.5)
+
+    @patch('builtins.print')
+    def test_poller_publishes_snapshots(self, mock_print):
+        """Test that snapshots reach subscribers over reused connections"""
+        received = []
+
+        def failing(snapshot):
+            raise RuntimeError("broken subscriber")
+
+        with MockCoinCapServer(45) as server:
+            poller = crypto_status.AssetPoller(server.url, interval=0, page_size=10, concurrency=2)
+            unsubscribe = poller.subscribe(received.append)
+            poller.subscribe(failing)
+            poller.run(rounds=3)
+            unsubscribe()
+            poller.poll_once()
+            poller.stop()
+        self.assertEqual(len(received), 3)
+        self.assertEqual(len(received[0]['assets']), 45)
+        self.assertGreater(received[0]['latency'], 0)
+        self.assertEqual(poller.polls, 4)
+        self.assertLessEqual(len(server.connections), 2)
+        mock_print.assert_any_call("Subscriber failing failed: broken subscriber")
+
+    @patch('builtins.print')
+    def test_poller_background_thread(self, mock_print):
+        """Test that a started poller keeps polling until stopped and survives failures"""
+        with MockCoinCapServer(5) as server:
+            poller = crypto_status.AssetPoller(server.url, interval=0.01, page_size=10)
+            snapshots = threading.Semaphore(0)
+            poller.subscribe(lambda snapshot: snapshots.release())
+            poller.start()
+            for _ in range(3):
+                self.assertTrue(snapshots.acquire(timeout=5))
+            poller.stop()
+        self.assertFalse(poller.thread.is_alive())
+        failing = crypto_status.AssetPoller("http://127.0.0.1:9/v2/assets", timeout=1)
+        self.assertIsNone(failing.poll_once())
+        self.assertEqual(failing.failures, 1)
+        failing.stop()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
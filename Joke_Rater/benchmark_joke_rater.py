@@ -0,0 +1,116 @@
+"""
+Benchmarks for joke_rater: concurrent fetching against a local stub API and top-K rating.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from joke_rater import get_jokes, rate_jokes, save_jokes_to_file, RATERS
+
+def start_stub_server(delay):
+    """
+    Function: start_stub_server
+    Params: delay (float) - seconds per request
+    Brief: Start a local joke API answering /random_joke and /random_ten with unique jokes.
+    """
+    ids = itertools.count(1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            size = 10 if self.path.endswith("/random_ten") else 1
+            with lock:
+                numbers = [next(ids) for _ in range(size)]
+            time.sleep(delay)
+            jokes = [{"id": n, "setup": f"Setup {n}", "punchline": f"Punchline {n}"} for n in numbers]
+            body = json.dumps(jokes if size > 1 else jokes[0]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def timed(function, *args, **kwargs):
+    """
+    Function: timed
+    Params: function (callable), args, kwargs
+    Brief: Run function and return (result, seconds).
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def bench_fetching(num_jokes, concurrency, delay):
+    """
+    Function: bench_fetching
+    Params: num_jokes (int), concurrency (int), delay (float)
+    Brief: Compare per-joke and batch endpoints against a local stub server.
+    """
+    server, base_url = start_stub_server(delay)
+    try:
+        with patch("builtins.print"):
+            single, single_time = timed(get_jokes, f"{base_url}/random_joke", num_jokes,
+                                        concurrency=concurrency, rate=None)
+            batch, batch_time = timed(get_jokes, f"{base_url}/random_ten", num_jokes,
+                                      concurrency=concurrency, rate=None, batch_size=10)
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"/random_joke: {len(single)} jokes in {single_time:.2f}s ({len(single) / single_time:,.0f} jokes/sec)")
+    print(f"/random_ten:  {len(batch)} jokes in {batch_time:.2f}s ({len(batch) / batch_time:,.0f} jokes/sec)")
+
+def bench_rating(num_jokes, top_k):
+    """
+    Function: bench_rating
+    Params: num_jokes (int), top_k (int)
+    Brief: Time every rater and the top-K writer on num_jokes jokes.
+    """
+    jokes = [f"Setup {n} Punchline {n}" + " ha" * (n % 30) for n in range(num_jokes)]
+    for name in RATERS:
+        rated_jokes, seconds = timed(rate_jokes, jokes, name)
+        print(f"rate_jokes({name}): {len(rated_jokes)} jokes in {seconds * 1000:.1f} ms")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "top.jsonl")
+        with patch("builtins.print"):
+            _, seconds = timed(save_jokes_to_file, rated_jokes, path, top_k=top_k, fmt="jsonl")
+    print(f"save_jokes_to_file(top_k={top_k}): {seconds * 1000:.1f} ms")
+
+def get_arguments():
+    """
+    Function: get_arguments
+    Brief: Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Joke Rater benchmarks.")
+    parser.add_argument("--jokes", type=int, default=10000, help="Number of jokes.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight.")
+    parser.add_argument("--delay", type=float, default=0.005, help="Stub server latency per request (s).")
+    parser.add_argument("--top-k", type=int, default=100, help="Jokes kept by the writer.")
+    return parser.parse_args()
+
+def main():
+    """
+    Function: main
+    Brief: Run all benchmarks.
+    """
+    args = get_arguments()
+    bench_fetching(args.jokes, args.concurrency, args.delay)
+    bench_rating(args.jokes, args.top_k)
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,19 @@ Date: 30 Dec 2024
 """
 
 import requests
+import argparse
+import hashlib
+import heapq
+import json
+import math
 import random
+import threading
 import time
 import os 
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 def clear_screen():
     if os.name == "nt":
@@ -15,16 +25,258 @@ def clear_screen():
     else:
         os.system("clear")
 
-def fetch_joke(url):
+DEFAULT_TIMEOUT = 10
+MAX_FETCH_ROUNDS = 3
+
+class TokenBucket:
+    """
+    Class: TokenBucket
+    Params: rate (float) - tokens per second, capacity (int) - burst size
+    Brief: Thread-safe token-bucket rate limiter.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Function: acquire
+        Brief: Block until a token is available and take it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def create_session(pool_size=10):
+    """
+    Function: create_session
+    Params: pool_size (int)
+    Brief: Create a requests.Session keeping up to pool_size keep-alive connections per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class RetryPolicy:
+    """
+    Class: RetryPolicy
+    Params: max_attempts (int), base_delay (float), max_delay (float), retry_statuses (iterable of int)
+    Brief: Retries with full-jitter exponential backoff, honoring Retry-After when the server sends it.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=30.0, retry_statuses=(429, 500, 502, 503, 504)):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Function: delay
+        Params: attempt (int) - 0 for the first retry, retry_after (float or None)
+        Brief: Return how long to wait before the next attempt.
+        """
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+def parse_retry_after(value):
+    """
+    Function: parse_retry_after
+    Params: value (str or None) - Retry-After header
+    Brief: Convert delay-seconds or an HTTP date to seconds from now, None when absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+class CircuitOpenError(Exception):
+    """
+    Class: CircuitOpenError
+    Brief: Raised when a call is refused because the circuit breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    Class: CircuitBreaker
+    Params: failure_threshold (int), reset_timeout (float) - seconds
+    Brief: Opens after failure_threshold consecutive failures and refuses calls for reset_timeout
+           seconds, then lets one trial call through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def is_open(self):
+        """
+        Function: is_open
+        Brief: Return True while calls are being refused.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            return self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self):
+        """
+        Function: before_call
+        Brief: Raise CircuitOpenError if the call must be refused.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Circuit breaker is open, upstream considered down.")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        """
+        Function: record_success
+        Brief: Close the circuit and reset the failure count.
+        """
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        """
+        Function: record_failure
+        Brief: Count a failure, opening the circuit at the threshold or after a failed trial.
+        """
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+class FetchMetrics:
+    """
+    Class: FetchMetrics
+    Params: window (int) - latencies kept for percentiles
+    Brief: Thread-safe counters and per-call latency of fetch_joke.
+    """
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, outcome, latency, retries):
+        """
+        Function: record
+        Params: outcome (str) - 'success', 'failure' or 'short_circuited', latency (float), retries (int)
+        Brief: Record one fetch_joke call.
+        """
+        with self.lock:
+            self.calls += 1
+            self.retries += retries
+            if outcome == 'success':
+                self.successes += 1
+            elif outcome == 'short_circuited':
+                self.short_circuited += 1
+            else:
+                self.failures += 1
+            self.latencies.append(latency)
+
+    def snapshot(self):
+        """
+        Function: snapshot
+        Brief: Return the counters and p50/p95/max latency in seconds as a dict.
+        """
+        with self.lock:
+            latencies = sorted(self.latencies)
+            result = {"calls": self.calls, "successes": self.successes, "failures": self.failures,
+                      "retries": self.retries, "short_circuited": self.short_circuited}
+        if latencies:
+            result["p50"] = latencies[len(latencies) // 2]
+            result["p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            result["max"] = latencies[-1]
+        return result
+
+def fetch_joke(url, session=None, timeout=DEFAULT_TIMEOUT, retry=None, breaker=None, metrics=None):
     """
     Function: fetch_joke
-    Params: url (str)
+    Params: url (str), session (requests.Session or None), timeout (float), retry (RetryPolicy or None),
+            breaker (CircuitBreaker or None), metrics (FetchMetrics or None)
     Brief: Fetches a single joke from the given URL and returns it in JSON format.
+           Throttling, server errors, timeouts and connection errors are retried per the retry policy
+           and count as breaker failures; other 4xx responses leave the breaker closed.
     """
+    started = time.monotonic()
+    outcome = 'failure'
+    attempt = 0
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        while True:
+            retry_after = None
+            try:
+                if breaker is not None:
+                    breaker.before_call()
+                if session is not None:
+                    response = session.get(url, timeout=timeout)
+                else:
+                    response = requests.get(url, timeout=timeout)
+                if retry is not None and response.status_code in retry.retry_statuses:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                response.raise_for_status()
+                data = response.json()
+                if breaker is not None:
+                    breaker.record_success()
+                outcome = 'success'
+                return data
+            except CircuitOpenError as e:
+                print(f"Skipping request: {e}")
+                outcome = 'short_circuited'
+                return None
+            except (requests.exceptions.HTTPError, requests.exceptions.Timeout,
+                    requests.exceptions.ConnectionError) as e:
+                status = getattr(e.response, 'status_code', None)
+                # The breaker tracks upstream health, whether or not a retry policy is set.
+                upstream_failed = status is None or status >= 500 or status == 429
+                retryable = status is None or (retry is not None and status in retry.retry_statuses)
+                if breaker is not None:
+                    if upstream_failed:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if retry is None or not retryable or attempt + 1 >= retry.max_attempts:
+                    raise
+                time.sleep(retry.delay(attempt, retry_after))
+                attempt += 1
+            except Exception:
+                # Malformed JSON, redirects and the like must still settle a half-open trial.
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
     except requests.exceptions.RequestException as e:
         print(f"Request exception occurred: {e}")
     except requests.exceptions.HTTPError as e:
@@ -37,44 +289,245 @@ def fetch_joke(url):
         print(f"Error parsing JSON response: {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    finally:
+        if metrics is not None:
+            metrics.record(outcome, time.monotonic() - started, attempt)
     return None
 
-def get_jokes(url, num_jokes=10):
+def fetch_joke_batch(url, **options):
+    """
+    Function: fetch_joke_batch
+    Params: url (str), options - session, timeout, retry, breaker, metrics as for fetch_joke
+    Brief: Fetches a batch of jokes from a batch endpoint such as /random_ten and returns them as a list.
+    """
+    jokes = fetch_joke(url, **options)
+    if jokes is None:
+        return None
+    if not isinstance(jokes, list):
+        print(f"Expected a list of jokes from {url}, got {type(jokes).__name__}.")
+        return None
+    return [joke for joke in jokes if isinstance(joke, dict)]
+
+def joke_key(joke_data):
+    """
+    Function: joke_key
+    Params: joke_data (dict)
+    Brief: Identify a joke by its API id, or by a hash of its text when it has none.
+    """
+    if joke_data.get('id') is not None:
+        return f"id:{joke_data['id']}"
+    text = f"{joke_data.get('setup')}\n{joke_data.get('punchline')}"
+    return "sha1:" + hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class JokeCache:
+    """
+    Class: JokeCache
+    Params: path (str), ttl (float) - seconds, max_size (int)
+    Brief: On-disk joke cache keyed by joke_key, with expiry after ttl seconds
+           and least-recently-used eviction above max_size entries.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, max_size=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.load()
+
+    def load(self):
+        """
+        Function: load
+        Brief: Load entries from disk, ignoring a missing or unreadable file.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for key, joke_data, stored_at in json.load(f):
+                    self.entries[key] = (joke_data, stored_at)
+        except (OSError, ValueError, TypeError) as e:
+            if os.path.exists(self.path):
+                print(f"Ignoring unreadable joke cache {self.path}: {e}")
+        self.purge()
+
+    def save(self):
+        """
+        Function: save
+        Brief: Write entries to disk atomically, least recently used first.
+        """
+        self.purge()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump([[key, joke_data, stored_at] for key, (joke_data, stored_at) in self.entries.items()], f)
+        os.replace(tmp_path, self.path)
+
+    def purge(self):
+        """
+        Function: purge
+        Brief: Drop expired entries and evict least recently used ones above max_size.
+        """
+        now = time.time()
+        for key in [key for key, (_, stored_at) in self.entries.items() if now - stored_at > self.ttl]:
+            del self.entries[key]
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def add(self, joke_data):
+        """
+        Function: add
+        Params: joke_data (dict)
+        Brief: Store a joke as most recently used. Returns False if it was already cached.
+        """
+        key = joke_key(joke_data)
+        is_new = key not in self.entries
+        self.entries[key] = (joke_data, self.entries[key][1] if not is_new else time.time())
+        self.entries.move_to_end(key)
+        self.purge()
+        return is_new
+
+    def get_many(self, count):
+        """
+        Function: get_many
+        Params: count (int)
+        Brief: Return up to count fresh jokes, most recently used first, and mark them used.
+        """
+        self.purge()
+        keys = list(reversed(self.entries))[:count]
+        for key in keys:
+            self.entries.move_to_end(key)
+        return [self.entries[key][0] for key in keys]
+
+    def __contains__(self, joke_data):
+        return joke_key(joke_data) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+def format_joke(joke_data):
+    """
+    Function: format_joke
+    Params: joke_data (dict)
+    Brief: Join the setup and punchline of a joke.
+    """
+    return joke_data.get('setup') + " " + joke_data.get('punchline')
+
+def get_jokes(url, num_jokes=10, concurrency=1, rate=1.0, session=None, cache=None, batch_size=1,
+              retry=None, breaker=None, metrics=None):
     """
     Function: get_jokes
-    Params: url (str), num_jokes (int)
-    Brief: Fetches a list of jokes from the API by calling fetch_joke multiple times.
+    Params: url (str), num_jokes (int), concurrency (int), rate (float or None),
+            session (requests.Session or None), cache (JokeCache or None), batch_size (int),
+            retry (RetryPolicy or None), breaker (CircuitBreaker or None), metrics (FetchMetrics or None)
+    Brief: Fetches a list of distinct jokes from the API by calling fetch_joke up to concurrency
+           at a time, at most rate requests per second (None for no limit). Jokes in cache are
+           served first and only the shortfall is fetched; duplicates are fetched again.
+           batch_size > 1 means url is a batch endpoint returning that many jokes per request.
+           While the breaker is open remaining jokes are skipped without waiting for the rate limiter.
     """
-    jokes = []
-    for i in range(num_jokes):
+    limiter = TokenBucket(rate) if rate else None
+    own_session = session is None and concurrency > 1
+    if own_session:
+        session = create_session(concurrency)
+
+    options = {name: value for name, value in
+               (('session', session), ('retry', retry), ('breaker', breaker), ('metrics', metrics))
+               if value is not None}
+
+    def fetch(i):
+        if breaker is not None and breaker.is_open():
+            print(f"Circuit breaker open, skipping joke {i+1}.")
+            return []
+        if limiter:
+            limiter.acquire()
         try:
-            joke_data = fetch_joke(url)
-            if joke_data:
-                joke = joke_data.get('setup') + " " + joke_data.get('punchline')
-                if joke:
-                    jokes.append(joke)
+            if batch_size > 1:
+                batch = fetch_joke_batch(url, **options)
             else:
-                print(f"Failed to retrieve joke {i+1}. Skipping...")
+                joke_data = fetch_joke(url, **options)
+                batch = [joke_data] if joke_data else None
+            if batch:
+                return [joke_data for joke_data in batch if format_joke(joke_data)]
+            print(f"Failed to retrieve joke {i+1}. Skipping...")
         except Exception as e:
             print(f"Error during joke fetch operation {i+1}: {e}")
-        time.sleep(1)
-    return jokes
+        return []
 
-def rate_jokes(jokes):
+    jokes_data = cache.get_many(num_jokes) if cache is not None else []
+    seen = {joke_key(joke_data) for joke_data in jokes_data}
+    missing = num_jokes - len(jokes_data)
+    offset = 0
+    try:
+        for _ in range(MAX_FETCH_ROUNDS):
+            if missing <= 0:
+                break
+            num_requests = math.ceil(missing / batch_size)
+            indexes = range(offset, offset + num_requests)
+            offset += num_requests
+            if concurrency > 1 and num_requests > 1:
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    results = list(executor.map(fetch, indexes))
+            else:
+                results = [fetch(i) for i in indexes]
+            failed = sum(1 for batch in results if not batch)
+            for joke_data in (joke_data for batch in results for joke_data in batch):
+                key = joke_key(joke_data)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if cache is not None:
+                    cache.add(joke_data)
+                if len(jokes_data) < num_jokes:
+                    jokes_data.append(joke_data)
+            missing = max(num_jokes - len(jokes_data) - failed * batch_size, 0)
+    finally:
+        if own_session:
+            session.close()
+        if cache is not None:
+            try:
+                cache.save()
+            except OSError as e:
+                print(f"Could not save joke cache: {e}")
+    return [format_joke(joke_data) for joke_data in jokes_data]
+
+def random_rater(jokes):
     """
-    Function: rate_jokes
+    Function: random_rater
+    Params: jokes (list)
+    Brief: Rates jokes randomly from 1 to 10; up to ten jokes get distinct ratings.
+    """
+    if len(jokes) <= 10:
+        return random.sample(range(1, 11), len(jokes))
+    return random.choices(range(1, 11), k=len(jokes))
+
+def length_rater(jokes):
+    """
+    Function: length_rater
     Params: jokes (list)
-    Brief: Rates each joke randomly on a scale from 1 to 10.
+    Brief: Rates shorter jokes higher: 10 for up to 40 characters, one point less per 20 more.
+    """
+    return [max(1, 10 - max(len(joke) - 40, 0) // 20) for joke in jokes]
+
+RATERS = {
+    'random': random_rater,
+    'length': length_rater,
+}
+
+def rate_jokes(jokes, rater=random_rater):
+    """
+    Function: rate_jokes
+    Params: jokes (list), rater (callable or str) - maps a list of jokes to a list of 1-10 ratings
+    Brief: Rates all jokes in one call of the rater, randomly on a scale from 1 to 10 by default.
     """
     try:
         if not jokes:
             raise ValueError("The joke list is empty. Cannot rate jokes.")
-        
-        ratings = random.sample(range(1, 11), len(jokes))
-        rated_jokes = []
-        for joke, rating in zip(jokes, ratings):
-            rated_jokes.append({"joke": joke, "rating": rating})
-        return rated_jokes
+        if isinstance(rater, str):
+            if rater not in RATERS:
+                raise ValueError(f"Unknown rater '{rater}'. Choose one of: {', '.join(RATERS)}.")
+            rater = RATERS[rater]
+
+        ratings = rater(jokes)
+        if len(ratings) != len(jokes):
+            raise ValueError(f"Rater returned {len(ratings)} ratings for {len(jokes)} jokes.")
+        return [{"joke": joke, "rating": rating} for joke, rating in zip(jokes, ratings)]
     except ValueError as e:
         print(f"Error: {e}")
         return []
@@ -82,21 +535,81 @@ def rate_jokes(jokes):
         print(f"Unexpected error occurred while rating jokes: {e}")
         return []
 
-def save_jokes_to_file(rated_jokes, filename='top_jokes.txt'):
+class TopJokes:
+    """
+    Class: TopJokes
+    Params: top_k (int or None)
+    Brief: Keeps the top_k highest rated jokes in a bounded min-heap while jokes arrive.
+           Equal ratings keep arrival order, like a stable sort. None keeps every joke, 0 keeps none.
+    """
+
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+        self.heap = []
+        self.count = 0
+
+    def push(self, rated_joke):
+        """
+        Function: push
+        Params: rated_joke (dict)
+        Brief: Offer a rated joke, dropping the lowest rated one when the heap is full.
+        """
+        entry = (rated_joke['rating'], -self.count, rated_joke)
+        self.count += 1
+        if self.top_k is None or len(self.heap) < self.top_k:
+            heapq.heappush(self.heap, entry)
+        elif self.heap and entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def extend(self, rated_jokes):
+        """
+        Function: extend
+        Params: rated_jokes (iterable of dict)
+        Brief: Offer every rated joke of an iterable.
+        """
+        for rated_joke in rated_jokes:
+            self.push(rated_joke)
+
+    def sorted(self):
+        """
+        Function: sorted
+        Brief: Return the kept jokes sorted by rating in descending order.
+        """
+        return [entry[2] for entry in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self.heap)
+
+def format_rated_joke(rated_joke, fmt='text'):
+    """
+    Function: format_rated_joke
+    Params: rated_joke (dict), fmt (str) - 'text' or 'jsonl'
+    Brief: Format one rated joke as an output record.
+    """
+    if fmt == 'jsonl':
+        return json.dumps({"joke": rated_joke['joke'], "rating": rated_joke['rating']}, ensure_ascii=False) + "\n"
+    return f"Joke: {rated_joke['joke']}\nRating: {rated_joke['rating']}\n"
+
+def save_jokes_to_file(rated_jokes, filename='top_jokes.txt', top_k=None, fmt='text'):
     """
     Function: save_jokes_to_file
-    Params: rated_jokes (list), filename (str)
-    Brief: Saves the rated jokes to a text file, sorted by rating in descending order.
+    Params: rated_jokes (iterable), filename (str), top_k (int or None), fmt (str) - 'text' or 'jsonl'
+    Brief: Saves the top_k rated jokes (all when None) to a file, sorted by rating in descending order.
+           rated_jokes may be any iterable; it is consumed once and never sorted in place.
     """
     try:
-        if not rated_jokes:
+        if fmt not in ('text', 'jsonl'):
+            raise ValueError(f"Unknown output format '{fmt}'. Choose 'text' or 'jsonl'.")
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}.")
+        top_jokes = TopJokes(top_k)
+        top_jokes.extend(rated_jokes)
+        if not top_jokes:
             raise ValueError("No rated jokes to save.")
-        
-        rated_jokes.sort(key=lambda x: x['rating'], reverse=True)
+
         with open(filename, 'w', encoding='utf-8') as f:
-            for joke in rated_jokes:
-                clear_screen()
-                f.write(f"Joke: {joke['joke']}\nRating: {joke['rating']}\n")
+            for joke in top_jokes.sorted():
+                f.write(format_rated_joke(joke, fmt))
         print(f"Jokes have been rated and saved in {filename}.")
     except ValueError as e:
         print(f"Error: {e}")
@@ -105,23 +618,73 @@ def save_jokes_to_file(rated_jokes, filename='top_jokes.txt'):
     except Exception as e:
         print(f"Unexpected error occurred while saving jokes: {e}")
 
-def main():
+def positive_int(value):
+    """
+    Function: positive_int
+    Params: value (str)
+    Brief: argparse type accepting integers of at least 1.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def get_arguments(argv=None):
+    """
+    Function: get_arguments
+    Params: argv (list or None)
+    Brief: Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Fetch, rate and save jokes.")
+    parser.add_argument("--num-jokes", type=int, default=10, help="Number of jokes to fetch.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of requests in flight.")
+    parser.add_argument("--rate", type=float, default=5.0, help="Maximum requests per second (0 for no limit).")
+    parser.add_argument("--batch", action="store_true", help="Fetch ten jokes per request from the batch endpoint.")
+    parser.add_argument("--rater", choices=RATERS.keys(), default="random", help="How jokes are rated.")
+    parser.add_argument("--top-k", type=positive_int, default=None, help="Save only the K best rated jokes.")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text", help="Output file format.")
+    parser.add_argument("--output", default=None, help="Output file (default top_jokes.txt or top_jokes.jsonl).")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request on 429/5xx/timeouts.")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                        help="Consecutive failures that open the circuit breaker.")
+    parser.add_argument("--cache", default=None, help="Joke cache file; cached jokes are served before fetching.")
+    parser.add_argument("--cache-ttl", type=float, default=24 * 3600, help="Seconds a cached joke stays valid.")
+    parser.add_argument("--cache-size", type=int, default=1000, help="Maximum number of cached jokes.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Function: main
+    Params: argv (list or None)
     Brief: The main function that coordinates fetching, rating, and saving the jokes.
     """
-    url = "https://official-joke-api.appspot.com/random_joke"
-    filename = "top_jokes.txt"
+    args = get_arguments(argv)
+    if args.batch:
+        url, batch_size = "https://official-joke-api.appspot.com/random_ten", 10
+    else:
+        url, batch_size = "https://official-joke-api.appspot.com/random_joke", 1
+    filename = args.output or ("top_jokes.jsonl" if args.format == "jsonl" else "top_jokes.txt")
     try:
-        jokes = get_jokes(url, num_jokes=10)
+        cache = JokeCache(args.cache, ttl=args.cache_ttl, max_size=args.cache_size) if args.cache else None
+        metrics = FetchMetrics()
+        jokes = get_jokes(url, num_jokes=args.num_jokes, concurrency=args.concurrency, rate=args.rate or None,
+                          cache=cache, batch_size=batch_size, retry=RetryPolicy(max_attempts=args.retries + 1),
+                          breaker=CircuitBreaker(args.breaker_threshold), metrics=metrics)
         if jokes:
-            rated_jokes = rate_jokes(jokes)
+            rated_jokes = rate_jokes(jokes, args.rater)
             if rated_jokes:
-                save_jokes_to_file(rated_jokes, filename)
+                clear_screen()
+                save_jokes_to_file(rated_jokes, filename, top_k=args.top_k, fmt=args.format)
             else:
                 print("No jokes to rate.")
         else:
             print("No jokes fetched.")
+        stats = metrics.snapshot()
+        print(f"Requests: {stats['calls']}, failed: {stats['failures']}, retries: {stats['retries']}, "
+              f"skipped by breaker: {stats['short_circuited']}, p95 latency: {stats.get('p95', 0):.2f}s")
     except Exception as e:
         print(f"Unexpected error in the main function: {e}")
 
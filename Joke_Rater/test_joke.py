@@ -1,6 +1,96 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
-from joke_rater import fetch_joke, get_jokes, rate_jokes, save_jokes_to_file
+from joke_rater import fetch_joke, get_jokes, rate_jokes, save_jokes_to_file, TokenBucket, create_session
+from joke_rater import JokeCache, joke_key, TopJokes, fetch_joke_batch, length_rater, random_rater
+from joke_rater import RetryPolicy, CircuitBreaker, FetchMetrics, parse_retry_after, get_arguments
+
+
+class StubJokeServer:
+    """
+    Local HTTP server answering every GET with a joke after a fixed delay.
+    """
+
+    def __init__(self, delay=0.0, unique=None, faults=None):
+        stub = self
+        self.delay = delay
+        self.unique = unique
+        self.faults = list(faults or [])
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.next_id = 1
+        self.connections = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                batch = self.path.endswith("/random_ten")
+                with stub.lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    fault = stub.faults.pop(0) if stub.faults else None
+                if fault == "slow":
+                    time.sleep(0.5)
+                elif fault == "invalid":
+                    body = b"not json"
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                elif isinstance(fault, tuple):
+                    self.send_json(fault[0], {"error": "injected"}, fault[1])
+                    return
+                elif fault is not None:
+                    self.send_json(fault, {"error": "injected"})
+                    return
+                with stub.lock:
+                    first = stub.next_id
+                    stub.next_id += 10 if batch else 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                jokes = [stub.joke(number) for number in range(first, first + (10 if batch else 1))]
+                self.send_json(200, jokes if batch else jokes[0])
+
+            def send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.handler = Handler
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/random_joke"
+        self.batch_url = f"http://127.0.0.1:{self.server.server_port}/random_ten"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def joke(self, number):
+        if self.unique:
+            number = (number - 1) % self.unique + 1
+        return {"id": number, "setup": f"Setup {number}", "punchline": f"Punchline {number}"}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
 
 class TestJokeFetcher(unittest.TestCase):
 
@@ -89,5 +179,359 @@ class TestJokeFetcher(unittest.TestCase):
         mock_file().write.assert_any_call("Joke: Why did the chicken cross the road? To get to the other side.\nRating: 8\n")
         mock_file().write.assert_any_call("Joke: Why don't skeletons fight each other? They don't have the guts.\nRating: 5\n")
 
+class TestBulkPipeline(unittest.TestCase):
+
+    def test_fetch_joke_batch(self):
+        """
+        Test fetching one batch of ten jokes.
+        """
+        with StubJokeServer() as server:
+            jokes = fetch_joke_batch(server.batch_url)
+        self.assertEqual([joke['id'] for joke in jokes], list(range(1, 11)))
+
+    @patch('builtins.print')
+    def test_get_jokes_from_batch_endpoint(self, mock_print):
+        """
+        Test that batch fetching needs one request per ten jokes.
+        """
+        with StubJokeServer() as server:
+            jokes = get_jokes(server.batch_url, num_jokes=95, concurrency=4, rate=None, batch_size=10)
+        self.assertEqual(len(jokes), 95)
+        self.assertEqual(server.requests, 10)
+
+    @patch('builtins.print')
+    def test_batch_duplicates_are_refetched(self, mock_print):
+        """
+        Test that duplicates inside batches trigger another round.
+        """
+        with StubJokeServer(unique=15) as server:
+            jokes = get_jokes(server.batch_url, num_jokes=12, rate=None, batch_size=10)
+        self.assertEqual(len(jokes), 12)
+        self.assertEqual(len(set(jokes)), 12)
+        self.assertEqual(server.requests, 2)
+
+    def test_rate_many_jokes(self):
+        """
+        Test that more than ten jokes can be rated.
+        """
+        jokes = [f"joke {i}" for i in range(25)]
+        rated_jokes = rate_jokes(jokes)
+        self.assertEqual([rated['joke'] for rated in rated_jokes], jokes)
+        self.assertTrue(all(1 <= rated['rating'] <= 10 for rated in rated_jokes))
+        self.assertEqual(len(set(rated['rating'] for rated in rate_jokes(jokes[:10]))), 10)
+
+    @patch('builtins.print')
+    def test_pluggable_raters(self, mock_print):
+        """
+        Test built-in, named and custom raters.
+        """
+        self.assertEqual(length_rater(["short", "x" * 80, "x" * 1000]), [10, 8, 1])
+        self.assertEqual(len(random_rater(["a"] * 30)), 30)
+        self.assertEqual(rate_jokes(["short"], "length"), [{"joke": "short", "rating": 10}])
+        self.assertEqual(rate_jokes(["a", "b"], lambda jokes: [3] * len(jokes))[1], {"joke": "b", "rating": 3})
+        self.assertEqual(rate_jokes(["a", "b"], lambda jokes: [3]), [])
+        self.assertEqual(rate_jokes(["a"], "missing"), [])
+
+class TestTopJokesWriter(unittest.TestCase):
+
+    def test_top_jokes_matches_stable_sort(self):
+        """
+        Test that the bounded heap keeps the same jokes as a full stable sort.
+        """
+        rated_jokes = [{"joke": f"joke {i}", "rating": (i * 7) % 10 + 1} for i in range(200)]
+        top_jokes = TopJokes(15)
+        top_jokes.extend(iter(rated_jokes))
+        expected = sorted(rated_jokes, key=lambda x: x['rating'], reverse=True)[:15]
+        self.assertEqual(top_jokes.sorted(), expected)
+        self.assertEqual(len(top_jokes), 15)
+
+    @patch('os.system')
+    @patch('builtins.print')
+    def test_save_streams_without_clearing_screen(self, mock_print, mock_system):
+        """
+        Test saving top-K jokes from a generator as JSONL without touching the terminal.
+        """
+        rated_jokes = [{"joke": f"шутка {i}", "rating": i % 10 + 1} for i in range(1000)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "top.jsonl")
+            save_jokes_to_file((joke for joke in rated_jokes), path, top_k=3, fmt='jsonl')
+            with open(path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+        mock_system.assert_not_called()
+        self.assertEqual(lines, [{"joke": "шутка 9", "rating": 10}, {"joke": "шутка 19", "rating": 10},
+                                 {"joke": "шутка 29", "rating": 10}])
+        self.assertEqual(rated_jokes[0], {"joke": "шутка 0", "rating": 1})
+
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    @patch('builtins.print')
+    def test_save_rejects_empty_input(self, mock_print, mock_file):
+        """
+        Test that nothing is written when there are no rated jokes.
+        """
+        save_jokes_to_file(iter([]))
+        mock_file.assert_not_called()
+        mock_print.assert_called_with("Error: No rated jokes to save.")
+
+    @patch('builtins.open', new_callable=unittest.mock.mock_open)
+    @patch('builtins.print')
+    def test_save_rejects_non_positive_top_k(self, mock_print, mock_file):
+        """
+        Test that a top_k below 1 is rejected, by save_jokes_to_file and on the command line.
+        """
+        top_jokes = TopJokes(0)
+        top_jokes.extend([{"joke": "joke", "rating": 5}])
+        self.assertEqual(top_jokes.sorted(), [])
+        for top_k in (0, -1):
+            save_jokes_to_file([{"joke": "joke", "rating": 5}], top_k=top_k)
+            mock_print.assert_called_with(f"Error: top_k must be at least 1, got {top_k}.")
+        mock_file.assert_not_called()
+        with patch('sys.stderr', new_callable=io.StringIO), self.assertRaises(SystemExit):
+            get_arguments(["--top-k", "0"])
+        self.assertEqual(get_arguments(["--top-k", "2"]).top_k, 2)
+
+class TestConcurrentFetching(unittest.TestCase):
+
+    def test_token_bucket_limits_rate(self):
+        """
+        Test that the token bucket spaces out acquisitions beyond the burst.
+        """
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    @patch('builtins.print')
+    def test_concurrent_fetch_throughput(self, mock_print):
+        """
+        Test that concurrent fetching over a pooled session is several times faster than sequential.
+        """
+        with StubJokeServer(delay=0.05) as server:
+            start = time.monotonic()
+            sequential = get_jokes(server.url, num_jokes=16, concurrency=1, rate=None, session=create_session(1))
+            sequential_time = time.monotonic() - start
+
+            start = time.monotonic()
+            concurrent = get_jokes(server.url, num_jokes=16, concurrency=8, rate=None)
+            concurrent_time = time.monotonic() - start
+
+        self.assertEqual(len(sequential), 16)
+        self.assertEqual(len(concurrent), 16)
+        self.assertGreater(sequential_time / concurrent_time, 3)
+
+    @patch('builtins.print')
+    def test_session_reuses_connections(self, mock_print):
+        """
+        Test that a pooled session keeps connections alive instead of opening one per joke.
+        """
+        with StubJokeServer() as server:
+            jokes = get_jokes(server.url, num_jokes=20, concurrency=4, rate=None)
+        self.assertEqual(len(jokes), 20)
+        self.assertLessEqual(len(server.connections), 4)
+
+class TestJokeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "jokes.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def joke(number):
+        return {"id": number, "setup": f"Setup {number}", "punchline": f"Punchline {number}"}
+
+    def test_joke_key(self):
+        """
+        Test keying by id, falling back to a content hash.
+        """
+        self.assertEqual(joke_key(self.joke(7)), "id:7")
+        without_id = {"setup": "a", "punchline": "b"}
+        self.assertEqual(joke_key(without_id), joke_key(dict(without_id)))
+        self.assertTrue(joke_key(without_id).startswith("sha1:"))
+
+    def test_lru_eviction_and_persistence(self):
+        """
+        Test that the least recently used joke is evicted and entries survive a reload.
+        """
+        cache = JokeCache(self.path, max_size=2)
+        self.assertTrue(cache.add(self.joke(1)))
+        self.assertTrue(cache.add(self.joke(2)))
+        self.assertFalse(cache.add(self.joke(1)))
+        cache.add(self.joke(3))
+        self.assertNotIn(self.joke(2), cache)
+        cache.save()
+
+        reloaded = JokeCache(self.path, max_size=2)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded.get_many(5), [self.joke(3), self.joke(1)])
+
+    def test_ttl_expiry(self):
+        """
+        Test that jokes older than the TTL are dropped.
+        """
+        cache = JokeCache(self.path, ttl=60)
+        with patch('joke_rater.time.time', return_value=1000.0):
+            cache.add(self.joke(1))
+        with patch('joke_rater.time.time', return_value=1030.0):
+            cache.add(self.joke(2))
+        with patch('joke_rater.time.time', return_value=1070.0):
+            self.assertEqual(cache.get_many(5), [self.joke(2)])
+
+    @patch('builtins.print')
+    def test_get_jokes_fetches_only_shortfall(self, mock_print):
+        """
+        Test that cached jokes are served first and only missing ones are fetched.
+        """
+        cache = JokeCache(self.path)
+        for number in (101, 102, 103):
+            cache.add(self.joke(number))
+        with StubJokeServer() as server:
+            jokes = get_jokes(server.url, num_jokes=5, rate=None, cache=cache)
+            self.assertEqual(server.requests, 2)
+            self.assertEqual(len(jokes), 5)
+            self.assertEqual(len(set(jokes)), 5)
+
+            again = get_jokes(server.url, num_jokes=5, rate=None, cache=JokeCache(self.path))
+            self.assertEqual(server.requests, 2)
+            self.assertEqual(sorted(again), sorted(jokes))
+
+    @patch('builtins.print')
+    def test_get_jokes_refetches_duplicates(self, mock_print):
+        """
+        Test that a duplicate joke is dropped and fetched again.
+        """
+        responses = [self.joke(1), self.joke(1), self.joke(2)]
+        with patch('joke_rater.fetch_joke', side_effect=lambda url: responses.pop(0)):
+            jokes = get_jokes("http://example.invalid", num_jokes=2, rate=None)
+        self.assertEqual(jokes, ["Setup 1 Punchline 1", "Setup 2 Punchline 2"])
+        self.assertEqual(responses, [])
+
+class TestRetryAndCircuitBreaker(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        """
+        Test parsing Retry-After seconds and HTTP dates.
+        """
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertLess(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+
+    def test_backoff_is_jittered_and_capped(self):
+        """
+        Test that backoff delays grow exponentially, stay within the cap and prefer Retry-After.
+        """
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        for attempt in range(6):
+            self.assertLessEqual(policy.delay(attempt), min(5.0, 2 ** attempt))
+        self.assertEqual(policy.delay(0, retry_after=2.5), 2.5)
+        self.assertEqual(policy.delay(0, retry_after=60), 5.0)
+
+    @patch('builtins.print')
+    def test_retries_server_errors_and_honors_retry_after(self, mock_print):
+        """
+        Test that 500 and 429 responses are retried, waiting Retry-After when given.
+        """
+        metrics = FetchMetrics()
+        with StubJokeServer(faults=[500, (429, {"Retry-After": "2"})]) as server:
+            with patch('joke_rater.time.sleep') as mock_sleep:
+                joke = fetch_joke(server.url, retry=RetryPolicy(base_delay=0.01), metrics=metrics)
+        self.assertEqual(joke['setup'], "Setup 1")
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertLessEqual(mock_sleep.call_args_list[0][0][0], 0.01)
+        self.assertEqual(mock_sleep.call_args_list[1][0][0], 2.0)
+        stats = metrics.snapshot()
+        self.assertEqual((stats['calls'], stats['successes'], stats['retries']), (1, 1, 2))
+
+    @patch('builtins.print')
+    def test_retries_timeouts(self, mock_print):
+        """
+        Test that a read timeout is retried.
+        """
+        with StubJokeServer(faults=["slow"]) as server:
+            joke = fetch_joke(server.url, timeout=0.2, retry=RetryPolicy(base_delay=0.01))
+        self.assertEqual(joke['setup'], "Setup 1")
+
+    @patch('builtins.print')
+    def test_gives_up_after_max_attempts(self, mock_print):
+        """
+        Test that retries stop after max_attempts and client errors are not retried.
+        """
+        metrics = FetchMetrics()
+        with StubJokeServer(faults=[503, 503, 503, 404]) as server:
+            policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+            self.assertIsNone(fetch_joke(server.url, retry=policy, metrics=metrics))
+            self.assertIsNone(fetch_joke(server.url, retry=policy, metrics=metrics))
+            self.assertEqual(server.requests, 4)
+        self.assertEqual(metrics.snapshot()['failures'], 2)
+
+    @patch('builtins.print')
+    def test_circuit_breaker_fails_fast(self, mock_print):
+        """
+        Test that an open breaker stops requests and skips the rate limiter wait.
+        """
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        metrics = FetchMetrics()
+        with StubJokeServer(faults=[500] * 50) as server:
+            start = time.monotonic()
+            jokes = get_jokes(server.url, num_jokes=10, rate=5, breaker=breaker, metrics=metrics,
+                              retry=RetryPolicy(max_attempts=1))
+            elapsed = time.monotonic() - start
+            self.assertEqual(server.requests, 3)
+        self.assertEqual(jokes, [])
+        self.assertTrue(breaker.is_open())
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(metrics.snapshot()['failures'], 3)
+
+    def test_circuit_breaker_half_open(self):
+        """
+        Test that the breaker lets one trial through after the reset timeout.
+        """
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+        time.sleep(0.06)
+        breaker.before_call()
+        self.assertTrue(breaker.is_open())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open())
+
+    @patch('builtins.print')
+    def test_circuit_breaker_invalid_json_trial(self, mock_print):
+        """
+        Test that a half-open trial ending in invalid JSON reopens the breaker instead of wedging it.
+        """
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        with StubJokeServer(faults=["invalid"]) as server:
+            self.assertIsNone(fetch_joke(server.url, breaker=breaker))
+            self.assertFalse(breaker.trial_in_flight)
+            self.assertTrue(breaker.is_open())
+            time.sleep(0.06)
+            self.assertIsNotNone(fetch_joke(server.url, breaker=breaker))
+        self.assertFalse(breaker.is_open())
+        self.assertEqual(server.requests, 2)
+
+    @patch('builtins.print')
+    def test_circuit_breaker_without_retry_policy(self, mock_print):
+        """
+        Test that server errors and throttling trip the breaker without a retry policy, unlike a 404.
+        """
+        for faults in ([500, 500], [501, 505], [429, 503]):
+            breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+            with StubJokeServer(faults=faults + [500] * 3) as server:
+                for _ in range(5):
+                    self.assertIsNone(fetch_joke(server.url, breaker=breaker))
+                self.assertEqual(server.requests, 2)
+            self.assertTrue(breaker.is_open())
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        with StubJokeServer(faults=[404] * 3) as server:
+            for _ in range(3):
+                self.assertIsNone(fetch_joke(server.url, breaker=breaker))
+        self.assertEqual((breaker.is_open(), breaker.failures), (False, 0))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,9 +1,73 @@
+import gzip
+import json
+import math
+import os
+import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
 from io import StringIO
+from urllib.parse import urlparse, parse_qs
 import requests 
 
 from weather import fetch_weather_data, display_weather_conditions, display_weather, get_arguments
+from weather import read_cities, fetch_weather_batch, run_batch, WeatherCache, parse_options
+from weather import WeatherHistory, record_history, SingleFlight, CityIndex, UnknownCityError, request_weather_data
+
+
+class MockWeatherServer:
+    """
+    Local OpenWeatherMap stand-in: answers /weather?q=<city> after a fixed delay,
+    404 for cities starting with 'Unknown' or listed in missing.
+    """
+
+    def __init__(self, delay=0.0, missing=()):
+        server = self
+        self.delay = delay
+        self.missing = set(missing)
+        self.lock = threading.Lock()
+        self.requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                city = query.get("q", query.get("id", [""]))[0]
+                with server.lock:
+                    server.requests.append(city)
+                if server.delay:
+                    time.sleep(server.delay)
+                if city.startswith("Unknown") or city in server.missing:
+                    status, payload = 404, {"cod": "404", "message": "city not found"}
+                else:
+                    status, payload = 200, {"name": city, "main": {"temp": 20, "humidity": 80}, "wind": {"speed": 5}}
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/data/2.5/weather"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        self.patcher = patch("weather.BASE_URL", self.url)
+        self.patcher.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.patcher.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
 
 class TestWeatherScript(unittest.TestCase):
 
@@ -106,5 +170,411 @@ class TestWeatherScript(unittest.TestCase):
             self.assertEqual(args.city, 'London')
             self.assertEqual(args.option, 'temperature')
 
+class TestWeatherOptions(unittest.TestCase):
+
+    weather_data = {
+        'name': 'London',
+        'main': {'temp': 20, 'humidity': 80},
+        'wind': {'speed': 5}
+    }
+
+    def test_parse_options(self):
+        """
+        Function: Parsing options
+        Params: None
+        Brief: Test comma-separated options, 'all' and unknown options
+        """
+        self.assertEqual(parse_options("humidity, temperature,humidity"), ['humidity', 'temperature'])
+        self.assertEqual(parse_options("all"), ['temperature', 'humidity', 'wind_speed'])
+        with self.assertRaises(ValueError):
+            parse_options("temperature,pressure")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_display_multiple_options(self, mock_stdout):
+        """
+        Function: Multiple options
+        Params: mock_stdout
+        Brief: Test that every selected value is displayed from one response
+        """
+        display_weather(self.weather_data, 'all')
+        output = mock_stdout.getvalue()
+        self.assertIn("Temperature: 20 °C", output)
+        self.assertIn("Humidity: 80 %", output)
+        self.assertIn("Wind Speed: 5 m/s", output)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_display_json_and_csv(self, mock_stdout):
+        """
+        Function: Machine-readable output
+        Params: mock_stdout
+        Brief: Test JSON and CSV output of the selected values
+        """
+        display_weather(self.weather_data, 'temperature,wind_speed', 'json')
+        display_weather(self.weather_data, 'humidity,temperature', 'csv')
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertEqual(json.loads(lines[0]), {'city': 'London', 'temperature': 20, 'wind_speed': 5})
+        self.assertEqual(lines[1:], ['city,humidity,temperature', 'London,80,20'])
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_get_arguments_options(self, mock_stderr):
+        """
+        Function: Option arguments
+        Params: mock_stderr
+        Brief: Test that several options are accepted and unknown ones rejected
+        """
+        with patch('sys.argv', ['weather.py', 'London', 'temperature,humidity', '--format', 'csv']):
+            args = get_arguments()
+            self.assertEqual(args.option, 'temperature,humidity')
+            self.assertEqual(args.fmt, 'csv')
+        with patch('sys.argv', ['weather.py', 'London', 'pressure']):
+            with self.assertRaises(SystemExit):
+                get_arguments()
+
+class TestWeatherBatch(unittest.TestCase):
+
+    def test_read_cities(self):
+        """
+        Function: Reading city lists
+        Params: None
+        Brief: Test that blank lines and comments are skipped
+        """
+        source = StringIO("London\n\n# comment\n  New York  \nParis\n")
+        self.assertEqual(list(read_cities(source)), ["London", "New York", "Paris"])
+
+    def test_fetch_weather_batch(self):
+        """
+        Function: Batch fetching
+        Params: None
+        Brief: Test that every city is fetched once and errors are reported per city
+        """
+        cities = [f"City{i}" for i in range(40)] + ["Unknown Place"]
+        with MockWeatherServer(delay=0.02) as server:
+            start = time.monotonic()
+            results = list(fetch_weather_batch(iter(cities), concurrency=10, timeout=5))
+            elapsed = time.monotonic() - start
+        self.assertEqual(sorted(city for city, _, _ in results), sorted(cities))
+        self.assertEqual(sorted(server.requests), sorted(cities))
+        by_city = {city: (data, error) for city, data, error in results}
+        self.assertEqual(by_city["City3"][0]["main"]["temp"], 20)
+        self.assertIsNone(by_city["City3"][1])
+        self.assertIsNone(by_city["Unknown Place"][0])
+        self.assertIn("city not found", by_city["Unknown Place"][1])
+        self.assertLess(elapsed, 41 * 0.02 / 2)
+
+    def test_fetch_weather_batch_timeout(self):
+        """
+        Function: Batch timeouts
+        Params: None
+        Brief: Test that a slow city yields an error instead of blocking the batch
+        """
+        with MockWeatherServer(delay=0.3):
+            results = list(fetch_weather_batch(["Slow"], concurrency=2, timeout=0.05))
+        self.assertEqual(len(results), 1)
+        self.assertIsNone(results[0][1])
+        self.assertIsNotNone(results[0][2])
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_run_batch_jsonl(self, mock_stderr):
+        """
+        Function: Batch JSONL output
+        Params: mock_stderr
+        Brief: Test JSONL output and the cities/sec report
+        """
+        out = StringIO()
+        with MockWeatherServer():
+            total, failed = run_batch(StringIO("London\nParis\nUnknown Place\n"), out, concurrency=4, timeout=5)
+        records = {record["city"]: record for record in map(json.loads, out.getvalue().splitlines())}
+        self.assertEqual((total, failed), (3, 1))
+        self.assertEqual(sorted(records), ["London", "Paris", "Unknown Place"])
+        self.assertEqual(records["London"]["weather"]["wind"]["speed"], 5)
+        self.assertEqual(records["Unknown Place"]["error"], "API error 404 for 'Unknown Place': city not found")
+        self.assertIn("cities/sec", mock_stderr.getvalue())
+
+class TestWeatherCache(unittest.TestCase):
+
+    def test_cache_hit_skips_network(self):
+        """
+        Function: Cache hits
+        Params: None
+        Brief: Test that a repeated city, in any spelling, is served without a request
+        """
+        cache = WeatherCache(ttl=60)
+        with MockWeatherServer() as server:
+            first = fetch_weather_data("London", cache=cache)
+            second = fetch_weather_data("  london ", cache=cache)
+        self.assertEqual(first, second)
+        self.assertEqual(server.requests, ["London"])
+        self.assertEqual(cache.stats(), {'hits': 1, 'disk_hits': 0, 'misses': 1})
+
+    def test_cache_expiry_and_eviction(self):
+        """
+        Function: Cache TTL and LRU
+        Params: None
+        Brief: Test that entries expire after ttl and the least recently used one is evicted
+        """
+        cache = WeatherCache(ttl=10, max_size=2)
+        with patch('weather.time.time', return_value=1000.0):
+            cache.put("A", {"name": "A"})
+            cache.put("B", {"name": "B"})
+            cache.get("A")
+            cache.put("C", {"name": "C"})
+            self.assertIsNone(cache.get("B"))
+            self.assertEqual(cache.get("A"), {"name": "A"})
+        with patch('weather.time.time', return_value=1011.0):
+            self.assertIsNone(cache.get("C"))
+        self.assertEqual(len(cache), 1)
+
+    def test_cache_skips_errors(self):
+        """
+        Function: Cache errors
+        Params: None
+        Brief: Test that error responses are not cached
+        """
+        cache = WeatherCache(ttl=60)
+        with MockWeatherServer() as server:
+            fetch_weather_data("Unknown Town", cache=cache)
+            fetch_weather_data("Unknown Town", cache=cache)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_disk_cache_survives_restart(self):
+        """
+        Function: Disk cache
+        Params: None
+        Brief: Test that a new cache on the same directory serves earlier responses
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with MockWeatherServer() as server:
+                fetch_weather_data("Paris", cache=WeatherCache(ttl=60, directory=directory))
+                cache = WeatherCache(ttl=60, directory=directory)
+                data = fetch_weather_data("PARIS", cache=cache)
+                expired = WeatherCache(ttl=-1, directory=directory).get("Paris")
+        self.assertEqual(data["name"], "Paris")
+        self.assertEqual(server.requests, ["Paris"])
+        self.assertEqual(cache.stats(), {'hits': 1, 'disk_hits': 1, 'misses': 0})
+        self.assertIsNone(expired)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_batch_uses_cache(self, mock_stderr):
+        """
+        Function: Batch cache
+        Params: mock_stderr
+        Brief: Test that a repeated batch is served from the cache
+        """
+        cache = WeatherCache(ttl=60)
+        with MockWeatherServer() as server:
+            run_batch(StringIO("Oslo\nRome\n"), StringIO(), concurrency=2, timeout=5, cache=cache)
+            run_batch(StringIO("Oslo\nRome\n"), StringIO(), concurrency=2, timeout=5, cache=cache)
+        self.assertEqual(len(server.requests), 2)
+        self.assertIn("Cache: 2 hits", mock_stderr.getvalue())
+
+class TestWeatherHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.history = WeatherHistory(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def observation(self, dt, temp, speed=3):
+        return {'dt': dt, 'main': {'temp': temp, 'humidity': 50}, 'wind': {'speed': speed}}
+
+    def test_append_and_range_query(self):
+        """
+        Function: History range queries
+        Params: None
+        Brief: Test that rows are appended in order and queried by time range
+        """
+        for day in range(10):
+            self.assertTrue(self.history.append("London", self.observation(day * 86400, day)))
+        self.assertFalse(self.history.append("london", self.observation(9 * 86400, 99)))
+        timestamps, values = self.history.query("London", "temperature", 3 * 86400, 5 * 86400)
+        self.assertEqual(list(timestamps), [3 * 86400, 4 * 86400, 5 * 86400])
+        self.assertEqual(list(values), [3, 4, 5])
+        self.assertEqual(self.history.mean("London", "temperature", 3 * 86400), 6)
+        self.assertIsNone(self.history.mean("London", "temperature", 100 * 86400))
+        self.assertEqual(self.history.count("Paris"), 0)
+        with self.assertRaises(ValueError):
+            self.history.query("London", "pressure")
+
+    def test_missing_values_and_partial_append(self):
+        """
+        Function: History gaps
+        Params: None
+        Brief: Test that missing fields are NaN and a partial append does not shift columns
+        """
+        self.history.append("Oslo", {'dt': 1, 'main': {'temp': 1}, 'wind': {}})
+        with open(self.history.column_path("Oslo", "temperature"), 'ab') as f:
+            f.write(b"\0" * 8)
+        self.history.append("Oslo", self.observation(2, 2, speed=4))
+        self.assertEqual(list(self.history.query("Oslo", "temperature")[1]), [1, 2])
+        self.assertTrue(math.isnan(self.history.query("Oslo", "wind_speed")[1][0]))
+        self.assertEqual(self.history.mean("Oslo", "wind_speed"), 4)
+        self.assertEqual(os.path.getsize(self.history.column_path("Oslo", "humidity")), 16)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_record_history(self, mock_stderr):
+        """
+        Function: Recording history
+        Params: mock_stderr
+        Brief: Test that recording rounds append successful responses only
+        """
+        with MockWeatherServer(), patch('weather.time.sleep') as mock_sleep:
+            appended = record_history(["Rome", "Unknown Place"], self.history, rounds=2, interval=60)
+        self.assertEqual(appended, 2)
+        mock_sleep.assert_called_once_with(60)
+        self.assertEqual(self.history.cities(), ["rome"])
+        self.assertEqual(list(self.history.query("Rome", "humidity")[1]), [80, 80])
+        self.assertIn("Skipping Unknown Place", mock_stderr.getvalue())
+
+class TestSingleFlight(unittest.TestCase):
+
+    def run_threads(self, count, target):
+        barrier = threading.Barrier(count)
+        results = [None] * count
+
+        def worker(i):
+            barrier.wait()
+            results[i] = target()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_concurrent_requests_coalesce(self, mock_stdout):
+        """
+        Function: Request coalescing
+        Params: mock_stdout
+        Brief: Test that concurrent fetches of one city make a single API call and share its result
+        """
+        group = SingleFlight()
+        with MockWeatherServer(delay=0.2) as server, patch('weather.in_flight_requests', group):
+            results = self.run_threads(100, lambda: fetch_weather_data("London"))
+            others = self.run_threads(4, lambda: fetch_weather_data("Paris"))
+        self.assertEqual(server.requests, ["London", "Paris"])
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(results[0]["name"], "London")
+        self.assertEqual(others[3]["name"], "Paris")
+        self.assertEqual(group.stats(), {'started': 2, 'shared': 102})
+        self.assertEqual(group.calls, {})
+
+    def test_errors_are_shared(self):
+        """
+        Function: Coalesced errors
+        Params: None
+        Brief: Test that every waiting caller receives the leader's exception
+        """
+        group = SingleFlight()
+        def failing():
+            time.sleep(0.1)
+            raise requests.exceptions.ConnectionError("down")
+
+        def call():
+            try:
+                return group.do("key", failing)
+            except requests.exceptions.ConnectionError as e:
+                return str(e)
+
+        results = self.run_threads(10, call)
+        self.assertEqual(results, ["down"] * 10)
+        self.assertEqual(group.stats()['started'], 1)
+        self.assertEqual(group.do("key", lambda: "again"), "again")
+
+class TestCityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CityIndex()
+
+    def test_index_is_lazy(self):
+        """
+        Function: Lazy city index
+        Params: None
+        Brief: Test that the bundled file is only read on first lookup and has unique ids
+        """
+        self.assertIsNone(self.index.by_name)
+        entries = [entry for entries in self.index.load().values() for entry in entries]
+        self.assertEqual(len({entry['id'] for entry in entries}), len(entries))
+
+    def test_resolve(self):
+        """
+        Function: Resolving cities
+        Params: None
+        Brief: Test exact, country-qualified and accent-insensitive lookups
+        """
+        self.assertEqual(self.index.resolve(" LONDON ")['country'], 'GB')
+        self.assertEqual(self.index.resolve("London,ca")['id'], 6058560)
+        self.assertEqual(self.index.resolve("sao paulo")['name'], 'São Paulo')
+        with self.assertRaises(UnknownCityError) as context:
+            self.index.resolve("Lodnon")
+        self.assertEqual(context.exception.suggestions, ['London'])
+        with self.assertRaises(UnknownCityError):
+            self.index.resolve("Paris,DE")
+
+    def test_complete(self):
+        """
+        Function: Prefix lookup
+        Params: None
+        Brief: Test that prefix matches come back alphabetically and are limited
+        """
+        self.assertEqual([entry['name'] for entry in self.index.complete("lo")], ['London', 'London', 'Los Angeles'])
+        self.assertEqual(len(self.index.complete("", limit=4)), 4)
+        self.assertEqual(self.index.complete("xyz"), [])
+
+    def test_load_owm_city_list(self):
+        """
+        Function: OpenWeatherMap city list
+        Params: None
+        Brief: Test that city.list.json and its gzipped form load into the same index
+        """
+        cities = [
+            {"id": 3413829, "name": "Reykjavík", "state": "", "country": "IS", "coord": {"lon": -21.89541, "lat": 64.13548}},
+            {"id": 3133880, "name": "Tromsø", "state": "", "country": "NO", "coord": {"lon": 18.95508, "lat": 69.6489}},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name, opener in (("city.list.json", open), ("city.list.json.gz", gzip.open)):
+                path = os.path.join(tmp_dir, name)
+                with opener(path, 'wt', encoding='utf-8') as f:
+                    json.dump(cities, f)
+                index = CityIndex(path)
+                self.assertEqual(index.resolve("reykjavik"),
+                                 {'id': 3413829, 'name': 'Reykjavík', 'country': 'IS', 'lat': 64.13548, 'lon': -21.89541})
+                self.assertEqual([entry['id'] for entry in index.complete("tro")], [3133880])
+                self.assertTrue(index.full)
+                with MockWeatherServer() as server:
+                    with self.assertRaises(UnknownCityError) as context:
+                        request_weather_data("Reykjavk", index=index)
+                self.assertEqual(context.exception.suggestions, ['Reykjavík'])
+                self.assertEqual(server.requests, [])
+        self.assertFalse(self.index.full)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_fetch_by_id(self, mock_stdout):
+        """
+        Function: Requests by id
+        Params: mock_stdout
+        Brief: Test that indexed cities are requested by id, while the partial bundled index
+               requests other cities by name and only suggests names after a 404
+        """
+        cache = WeatherCache(ttl=60)
+        with MockWeatherServer(missing=["Lodnon"]) as server:
+            data = fetch_weather_data("london", cache=cache, index=self.index)
+            fetch_weather_data("London,GB", cache=cache, index=self.index)
+            houston = fetch_weather_data("Houston", cache=cache, index=self.index)
+            berlin = fetch_weather_data("Berlin,US", cache=cache, index=self.index)
+            missing = fetch_weather_data("Lodnon", cache=cache, index=self.index)
+            results = list(fetch_weather_batch(["Oslo", "Lodnon"], concurrency=2, index=self.index))
+        self.assertEqual(data['name'], '2643743')
+        self.assertEqual((houston['name'], berlin['name']), ('Houston', 'Berlin,US'))
+        self.assertIsNone(missing)
+        self.assertEqual(server.requests[:4], ['2643743', 'Houston', 'Berlin,US', 'Lodnon'])
+        self.assertEqual(sorted(server.requests[4:]), ['3143244', 'Lodnon'])
+        self.assertIn("Unknown city 'Lodnon'. Did you mean: London?", mock_stdout.getvalue())
+        self.assertEqual(sorted(error is None for _, _, error in results), [False, True])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
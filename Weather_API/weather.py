@@ -6,7 +6,24 @@ Date: 30 Dec 2024
 
 import requests
 import argparse
+import bisect
+import csv
+import difflib
+import gzip
+import hashlib
+import io
+import json
+import math
 import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 
 def clear_screen():
     if os.name == "nt":
@@ -21,49 +38,760 @@ AVAILABLE_OPTIONS = {
     'humidity': 'Humidity (%)',
     'wind_speed': 'Wind Speed (m/s)',
 }
+OPTION_FIELDS = {
+    'temperature': ('main', 'temp'),
+    'humidity': ('main', 'humidity'),
+    'wind_speed': ('wind', 'speed'),
+}
+OUTPUT_FORMATS = ('text', 'json', 'csv')
+
+UNITS = 'metric'
+DEFAULT_TIMEOUT = 10
+DEFAULT_CACHE_TTL = 600
+DEFAULT_RECORD_INTERVAL = 600
+CITIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cities.csv')
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'weather_api')
+
+def create_session(pool_size=16):
+    """
+    Function: Create session
+    Params: pool_size (int) - Keep-alive connections to keep
+    Brief: Pooled HTTP session for many requests
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def normalize_city(name):
+    """
+    Function: Normalize city
+    Params: name (str)
+    Brief: Case-, accent- and whitespace-insensitive form of a city name
+    """
+    name = ''.join(char for char in unicodedata.normalize('NFKD', name) if not unicodedata.combining(char))
+    return ' '.join(name.split()).casefold()
+
+class UnknownCityError(ValueError):
+    """
+    Class: UnknownCityError
+    Params: city (str), suggestions (list of str)
+    Brief: Raised when a city is not in the city index
+    """
+
+    def __init__(self, city, suggestions=()):
+        self.city = city
+        self.suggestions = list(suggestions)
+        message = f"Unknown city '{city}'."
+        if self.suggestions:
+            message += f" Did you mean: {', '.join(self.suggestions)}?"
+        super().__init__(message)
+
+class WeatherAPIError(Exception):
+    """
+    Class: WeatherAPIError
+    Params: city (str), status (int) - HTTP status code, message (str) - Message returned by the API
+    Brief: Raised when the API answers with anything other than 200
+    """
+
+    def __init__(self, city, status, message):
+        self.city = city
+        self.status = status
+        self.message = message
+        super().__init__(f"API error {status} for '{city}': {message}")
+
+class CityIndex:
+    """
+    Class: CityIndex
+    Params: path (str) - CSV with id, name, country, lat and lon columns, or the full OpenWeatherMap
+            city.list.json (optionally .json.gz) from https://bulk.openweathermap.org/sample/
+    Brief: Local city index with exact, prefix and fuzzy lookup. The file is read on first use,
+           so creating an index costs nothing. Cities sharing a name are kept in file order,
+           most prominent first in the bundled CSV. The bundled CSV only holds a few dozen large
+           cities, so only an index built from the OpenWeatherMap list is full enough to reject
+           unknown names.
+    """
+
+    def __init__(self, path=CITIES_PATH):
+        self.path = path
+        self.full = path.endswith(('.json', '.json.gz'))
+        self.lock = threading.Lock()
+        self.by_name = None
+        self.names = None
+
+    def load(self):
+        """
+        Function: Load index
+        Brief: Read the file once and return the name -> entries map
+        """
+        with self.lock:
+            if self.by_name is None:
+                by_name = {}
+                for entry in self.read_entries():
+                    by_name.setdefault(normalize_city(entry['name']), []).append(entry)
+                self.names = sorted(by_name)
+                self.by_name = by_name
+        return self.by_name
+
+    def read_entries(self):
+        """
+        Function: Read entries
+        Brief: Yield one entry dict per city from the CSV file or an OpenWeatherMap city.list.json(.gz)
+        """
+        if self.full:
+            opener = gzip.open if self.path.endswith('.gz') else open
+            with opener(self.path, 'rt', encoding='utf-8') as f:
+                for city in json.load(f):
+                    yield {'id': int(city['id']), 'name': city['name'], 'country': (city.get('country') or '').upper(),
+                           'lat': float(city['coord']['lat']), 'lon': float(city['coord']['lon'])}
+            return
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield {'id': int(row['id']), 'name': row['name'], 'country': row['country'].upper(),
+                       'lat': float(row['lat']), 'lon': float(row['lon'])}
+
+    def lookup(self, name, country=None):
+        """
+        Function: Lookup
+        Params: name (str), country (str or None) - ISO 3166 code
+        Brief: All entries named name, optionally only those in country
+        """
+        entries = self.load().get(normalize_city(name), [])
+        if country:
+            entries = [entry for entry in entries if entry['country'] == country.strip().upper()]
+        return entries
+
+    def resolve(self, query):
+        """
+        Function: Resolve
+        Params: query (str) - City name, optionally followed by ',<country code>'
+        Brief: Return the most prominent matching entry, raising UnknownCityError with suggestions
+        """
+        name, _, country = query.partition(',')
+        entries = self.lookup(name, country or None)
+        if not entries:
+            raise UnknownCityError(query, self.suggest(name))
+        return entries[0]
+
+    def complete(self, prefix, limit=10):
+        """
+        Function: Complete
+        Params: prefix (str), limit (int)
+        Brief: Entries whose name starts with prefix, alphabetically
+        """
+        by_name = self.load()
+        prefix = normalize_city(prefix)
+        matches = []
+        for name in self.names[bisect.bisect_left(self.names, prefix):]:
+            if not name.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.extend(by_name[name][:limit - len(matches)])
+        return matches
+
+    def suggest(self, name, limit=5):
+        """
+        Function: Suggest
+        Params: name (str), limit (int)
+        Brief: Names of the closest cities to a misspelled name. Only names with the same first
+               letter and a similar length are compared, which keeps the full OpenWeatherMap list fast.
+        """
+        by_name = self.load()
+        name = normalize_city(name)
+        if not name:
+            return []
+        start = bisect.bisect_left(self.names, name[0])
+        end = bisect.bisect_left(self.names, chr(ord(name[0]) + 1), start)
+        candidates = [candidate for candidate in self.names[start:end] if abs(len(candidate) - len(name)) <= 2]
+        matches = difflib.get_close_matches(name, candidates, n=limit, cutoff=0.75)
+        return [by_name[match][0]['name'] for match in matches]
+
+class WeatherCache:
+    """
+    Class: WeatherCache
+    Params: ttl (float) - seconds, max_size (int), directory (str or None)
+    Brief: Weather responses keyed by normalized (city, units), valid for ttl seconds.
+           An in-process LRU tier holds up to max_size entries; if directory is set,
+           entries are also kept there as one JSON file each and survive restarts.
+    """
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, max_size=256, directory=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(city, units=UNITS):
+        """
+        Function: Cache key
+        Params: city (str), units (str)
+        Brief: Case- and whitespace-insensitive key for a city
+        """
+        return f"{units}:{normalize_city(city)}"
+
+    def path(self, key):
+        """
+        Function: Entry path
+        Params: key (str)
+        Brief: File holding key in the disk tier
+        """
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def read_disk(self, key):
+        """
+        Function: Read disk entry
+        Params: key (str)
+        Brief: Return (data, stored_at) from the disk tier, or None if missing or unreadable
+        """
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry['key'] == key:
+                return entry['data'], entry['stored_at']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable weather cache entry for {key}: {e}")
+        return None
+
+    def write_disk(self, key, data, stored_at):
+        """
+        Function: Write disk entry
+        Params: key (str), data (dict), stored_at (float)
+        Brief: Store an entry in the disk tier atomically
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'stored_at': stored_at, 'data': data}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write weather cache entry for {key}: {e}")
+
+    def remember(self, key, data, stored_at):
+        """
+        Function: Remember entry
+        Params: key (str), data (dict), stored_at (float)
+        Brief: Store an entry as most recently used, evicting the least recently used one above max_size
+        """
+        self.entries[key] = (data, stored_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get(self, city, units=UNITS):
+        """
+        Function: Get entry
+        Params: city (str), units (str)
+        Brief: Return cached data for city if still fresh, else None
+        """
+        key = self.key(city, units)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.entries.pop(key, None)
+        entry = self.read_disk(key) if self.directory else None
+        with self.lock:
+            if entry is not None and now - entry[1] <= self.ttl:
+                self.remember(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[0]
+            self.misses += 1
+        return None
+
+    def put(self, city, data, units=UNITS):
+        """
+        Function: Put entry
+        Params: city (str), data (dict), units (str)
+        Brief: Cache data for city in both tiers
+        """
+        key = self.key(city, units)
+        stored_at = time.time()
+        with self.lock:
+            self.remember(key, data, stored_at)
+        if self.directory:
+            self.write_disk(key, data, stored_at)
+
+    def stats(self):
+        """
+        Function: Cache stats
+        Brief: Hit and miss counters as a dict
+        """
+        with self.lock:
+            return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self.entries)
+
+class SingleFlight:
+    """
+    Class: SingleFlight
+    Brief: Coalesces concurrent calls with the same key: the first caller runs the function,
+           later callers wait for it and receive the same result (or exception) object.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.started = 0
+        self.shared = 0
+
+    def do(self, key, function, *args):
+        """
+        Function: Do
+        Params: key (hashable), function (callable), args
+        Brief: Return function(*args), or the result of the call already in flight for key
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self.started += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        try:
+            call['result'] = function(*args)
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call['done'].set()
+
+    def stats(self):
+        """
+        Function: Single-flight stats
+        Brief: Calls started and calls that joined one in flight, as a dict
+        """
+        with self.lock:
+            return {'started': self.started, 'shared': self.shared}
+
+in_flight_requests = SingleFlight()
+
+def request_weather_data(city, session=None, timeout=DEFAULT_TIMEOUT, cache=None, index=None):
+    """
+    Function: Request data
+    Params: city (str) - City name, session (requests.Session or None), timeout (float), cache (WeatherCache or None),
+            index (CityIndex or None)
+    Brief: Fetch weather from cache or API, raising on network errors and WeatherAPIError on non-200
+           responses. Only successful responses are cached.
+           With an index the city is resolved locally and requested by id. A full index rejects
+           unknown cities with UnknownCityError and no request; a partial one, like the bundled
+           CSV, requests them by name and only suggests indexed cities once the API answers 404.
+           Concurrent requests for the same city share one API call through in_flight_requests.
+    """
+    query = {'q': city}
+    if index is not None:
+        try:
+            entry = index.resolve(city)
+        except UnknownCityError:
+            if index.full:
+                raise
+        else:
+            city = f"id:{entry['id']}"
+            query = {'id': entry['id']}
+    if cache is not None:
+        data = cache.get(city)
+        if data is not None:
+            return data
+    try:
+        return in_flight_requests.do(WeatherCache.key(city), call_weather_api, city, query, session, timeout, cache)
+    except WeatherAPIError as e:
+        if index is None or e.status != 404 or 'q' not in query:
+            raise
+        raise UnknownCityError(city, index.suggest(city.partition(',')[0])) from e
+
+def call_weather_api(city, query, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """
+    Function: Call API
+    Params: city (str) - Cache key, query (dict) - 'q' or 'id' parameter, session (requests.Session or None),
+            timeout (float), cache (WeatherCache or None)
+    Brief: Query the API once and store a successful response in cache.
+           Any other status raises WeatherAPIError carrying the API message.
+    """
+    params = dict(query, appid=API_KEY, units=UNITS)
+    if session is not None:
+        response = session.get(BASE_URL, params=params, timeout=timeout)
+    else:
+        response = requests.get(BASE_URL, params=params, timeout=timeout)
+    if response.status_code != 200:
+        try:
+            message = response.json().get('message')
+        except (ValueError, AttributeError):
+            message = None
+        raise WeatherAPIError(city, response.status_code, message or response.reason or 'no message')
+    data = response.json()
+    if cache is not None:
+        cache.put(city, data)
+    return data
 
-def fetch_weather_data(city):
+def fetch_weather_data(city, session=None, timeout=DEFAULT_TIMEOUT, cache=None, index=None):
     """
     Function: Fetch data
-    Params: city (str) - City name
-    Brief: Fetch weather from API
+    Params: city (str) - City name, session (requests.Session or None), timeout (float), cache (WeatherCache or None),
+            index (CityIndex or None)
+    Brief: Fetch weather from cache or API
     """
     try:
-        url = f'{BASE_URL}?q={city}&appid={API_KEY}&units=metric'
-        response = requests.get(url)
-        return response.json()
+        return request_weather_data(city, session, timeout, cache, index)
     
+    except (UnknownCityError, WeatherAPIError) as e:
+        print(f"Error: {e}")
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
     except Exception as e:
         print(f"Unexpected error: {e}")
     return None
 
+def read_cities(source):
+    """
+    Function: Read cities
+    Params: source (str or file) - Path, '-' for stdin, or open file
+    Brief: Yield city names, one per line, skipping blanks and '#' comments
+    """
+    if source == '-':
+        source = sys.stdin
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from read_cities(f)
+        return
+    for line in source:
+        city = line.strip()
+        if city and not city.startswith('#'):
+            yield city
+
+def fetch_weather_batch(cities, concurrency=16, timeout=DEFAULT_TIMEOUT, session=None, cache=None, index=None):
+    """
+    Function: Fetch batch
+    Params: cities (iterable of str), concurrency (int), timeout (float), session (requests.Session or None),
+            cache (WeatherCache or None), index (CityIndex or None)
+    Brief: Fetch many cities over one pooled session with at most concurrency requests in flight.
+           Yields (city, data, error) as each request completes; non-200 responses are errors.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {}
+            cities = iter(cities)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < concurrency * 2:
+                    city = next(cities, None)
+                    if city is None:
+                        exhausted = True
+                        break
+                    pending[executor.submit(request_weather_data, city, session, timeout, cache, index)] = city
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    city = pending.pop(future)
+                    try:
+                        yield city, future.result(), None
+                    except Exception as e:
+                        yield city, None, str(e)
+    finally:
+        if own_session:
+            session.close()
+
+def write_weather_jsonl(results, out):
+    """
+    Function: Write JSONL
+    Params: results (iterable of (city, data, error)), out (file)
+    Brief: Write one JSON object per city and return (total, failed) counts
+    """
+    total = failed = 0
+    for city, data, error in results:
+        total += 1
+        if error is None:
+            record = {'city': city, 'weather': data}
+        else:
+            failed += 1
+            record = {'city': city, 'error': error}
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+    return total, failed
+
+def run_batch(source, out, concurrency=16, timeout=DEFAULT_TIMEOUT, cache=None, index=None):
+    """
+    Function: Run batch
+    Params: source (str or file), out (file), concurrency (int), timeout (float), cache (WeatherCache or None),
+            index (CityIndex or None)
+    Brief: Fetch every city of source as JSONL into out and report cities/sec on stderr
+    """
+    start = time.perf_counter()
+    results = fetch_weather_batch(read_cities(source), concurrency, timeout, cache=cache, index=index)
+    total, failed = write_weather_jsonl(results, out)
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0.0
+    print(f"Fetched {total} cities in {elapsed:.2f}s ({rate:.1f} cities/sec), {failed} failed.", file=sys.stderr)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits ({stats['disk_hits']} from disk), {stats['misses']} misses.",
+              file=sys.stderr)
+    return total, failed
+
+def parse_options(option):
+    """
+    Function: Parse options
+    Params: option (str or list) - Option name, comma-separated names, or 'all'
+    Brief: Return the list of selected options in order, without duplicates.
+           Raises ValueError on an unknown option.
+    """
+    names = option.split(',') if isinstance(option, str) else option
+    options = []
+    for name in (name.strip() for name in names):
+        for selected in (AVAILABLE_OPTIONS if name == 'all' else [name]):
+            if selected not in AVAILABLE_OPTIONS:
+                raise ValueError(f"Invalid option '{selected}'. Choose from {', '.join(AVAILABLE_OPTIONS)} or 'all'.")
+            if selected not in options:
+                options.append(selected)
+    if not options:
+        raise ValueError("No option selected.")
+    return options
+
+def option_argument(value):
+    """
+    Function: Option argument
+    Params: value (str)
+    Brief: argparse type checking every option in value
+    """
+    try:
+        parse_options(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+def weather_values(data, options):
+    """
+    Function: Weather values
+    Params: data (dict), options (list)
+    Brief: Map each option to its value in the API response, None if missing
+    """
+    return {option: data.get(OPTION_FIELDS[option][0], {}).get(OPTION_FIELDS[option][1]) for option in options}
+
+def format_weather(data, options, fmt):
+    """
+    Function: Format weather
+    Params: data (dict), options (list), fmt (str) - 'json' or 'csv'
+    Brief: Render the selected values with the city name as one JSON object or a CSV header and row
+    """
+    record = {'city': data.get('name')}
+    record.update(weather_values(data, options))
+    if fmt == 'json':
+        return json.dumps(record, ensure_ascii=False)
+    if fmt == 'csv':
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(record.keys())
+        writer.writerow(record.values())
+        return out.getvalue().rstrip('\n')
+    raise ValueError(f"Unknown output format '{fmt}'. Choose from {', '.join(OUTPUT_FORMATS)}.")
+
+class WeatherHistory:
+    """
+    Class: WeatherHistory
+    Params: directory (str) - Root of the store
+    Brief: Append-only columnar weather history. Each city is a directory holding one file of
+           native float64 values per column: timestamp plus every option in OPTION_FIELDS
+           (NaN when missing). Rows are kept in timestamp order, so a time range is found by
+           bisecting the timestamp column and only that slice of a field is read.
+    """
+
+    COLUMNS = ('timestamp',) + tuple(OPTION_FIELDS)
+    TYPECODE = 'd'
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def city_dir(self, city):
+        """
+        Function: City directory
+        Params: city (str)
+        Brief: Directory of a city, named after its normalized name
+        """
+        name = re.sub(r'[^\w-]+', '_', normalize_city(city))
+        return os.path.join(self.directory, name)
+
+    def column_path(self, city, column):
+        """
+        Function: Column path
+        Params: city (str), column (str)
+        Brief: File holding one column of a city
+        """
+        return os.path.join(self.city_dir(city), f"{column}.f64")
+
+    def read_column(self, city, column, start=0, stop=None):
+        """
+        Function: Read column
+        Params: city (str), column (str), start (int), stop (int or None) - Row range
+        Brief: Read rows start:stop of a column without loading the rest of the file
+        """
+        values = array(self.TYPECODE)
+        path = self.column_path(city, column)
+        if not os.path.exists(path):
+            return values
+        if stop is None:
+            stop = os.path.getsize(path) // values.itemsize
+        if stop > start:
+            with open(path, 'rb') as f:
+                f.seek(start * values.itemsize)
+                values.fromfile(f, stop - start)
+        return values
+
+    def cities(self):
+        """
+        Function: Cities
+        Brief: Names of the city directories in the store
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def count(self, city):
+        """
+        Function: Row count
+        Params: city (str)
+        Brief: Number of complete rows of a city, taken from the timestamp column
+        """
+        path = self.column_path(city, 'timestamp')
+        return os.path.getsize(path) // array(self.TYPECODE).itemsize if os.path.exists(path) else 0
+
+    def last_timestamp(self, city):
+        """
+        Function: Last timestamp
+        Params: city (str)
+        Brief: Timestamp of the newest row, or None for an empty history
+        """
+        rows = self.count(city)
+        return self.read_column(city, 'timestamp', rows - 1, rows)[0] if rows else None
+
+    def append(self, city, data, timestamp=None):
+        """
+        Function: Append
+        Params: city (str), data (dict) - API response, timestamp (float or None)
+        Brief: Append one row from an API response, timestamped with its 'dt' field by default.
+               Observations not newer than the last row are skipped. Returns True if appended.
+        """
+        if timestamp is None:
+            timestamp = data.get('dt')
+        if timestamp is None:
+            timestamp = time.time()
+        last = self.last_timestamp(city)
+        if last is not None and timestamp <= last:
+            return False
+        rows = self.count(city)
+        os.makedirs(self.city_dir(city), exist_ok=True)
+        values = weather_values(data, OPTION_FIELDS)
+        row = dict(values, timestamp=timestamp)
+        # The timestamp column is written last: it defines the row count, so a partial
+        # append leaves extra field values that are truncated by the next append.
+        for column in self.COLUMNS[1:] + ('timestamp',):
+            value = row[column]
+            with open(self.column_path(city, column), 'ab') as f:
+                f.truncate(rows * array(self.TYPECODE).itemsize)
+                array(self.TYPECODE, [math.nan if value is None else value]).tofile(f)
+        return True
+
+    def query(self, city, column, start=None, end=None):
+        """
+        Function: Query
+        Params: city (str), column (str), start (float or None), end (float or None) - Timestamps
+        Brief: Return (timestamps, values) arrays of the rows with start <= timestamp <= end
+        """
+        if column not in self.COLUMNS:
+            raise ValueError(f"Unknown column '{column}'. Choose from {', '.join(self.COLUMNS)}.")
+        timestamps = self.read_column(city, 'timestamp')
+        first = 0 if start is None else bisect.bisect_left(timestamps, start)
+        last = len(timestamps) if end is None else bisect.bisect_right(timestamps, end)
+        if first >= last:
+            return array(self.TYPECODE), array(self.TYPECODE)
+        return timestamps[first:last], self.read_column(city, column, first, last)
+
+    def mean(self, city, column, start=None, end=None):
+        """
+        Function: Mean
+        Params: city (str), column (str), start (float or None), end (float or None)
+        Brief: Mean of a column over a time range ignoring missing values, None if there are none
+        """
+        values = [value for value in self.query(city, column, start, end)[1] if not math.isnan(value)]
+        return math.fsum(values) / len(values) if values else None
+
+def record_history(cities, history, rounds=1, interval=DEFAULT_RECORD_INTERVAL, concurrency=16,
+                   timeout=DEFAULT_TIMEOUT, cache=None, index=None):
+    """
+    Function: Record history
+    Params: cities (list of str), history (WeatherHistory), rounds (int) - 0 to run until interrupted,
+            interval (float) - Seconds between rounds, concurrency (int), timeout (float), cache (WeatherCache or None),
+            index (CityIndex or None)
+    Brief: Fetch every city each round and append successful responses to history.
+           Returns the number of appended rows.
+    """
+    appended = 0
+    done = 0
+    while True:
+        for city, data, error in fetch_weather_batch(cities, concurrency, timeout, cache=cache, index=index):
+            if error is not None or not data or 'main' not in data:
+                print(f"Skipping {city}: {error or 'no data'}", file=sys.stderr)
+            elif history.append(city, data):
+                appended += 1
+        done += 1
+        if rounds and done >= rounds:
+            return appended
+        time.sleep(interval)
+
 def display_weather_conditions(weather, wind, option):
     """
     Function: Display conditions
-    Params: weather (dict), wind (dict), option (str)
-    Brief: Display selected weather
+    Params: weather (dict), wind (dict), option (str or list)
+    Brief: Display selected weather, one line per option
     """
     try:
-        if option == 'temperature':
-            print(f"Temperature: {weather.get('temp', 'N/A')} °C")
-        elif option == 'humidity':
-            print(f"Humidity: {weather.get('humidity', 'N/A')} %")
-        elif option == 'wind_speed':
-            print(f"Wind Speed: {wind.get('speed', 'N/A')} m/s")
-        else:
+        try:
+            options = parse_options(option)
+        except ValueError:
             print("Invalid option selected. Choose 'temperature', 'humidity', or 'wind_speed'.")
+            return
+        for option in options:
+            if option == 'temperature':
+                print(f"Temperature: {weather.get('temp', 'N/A')} °C")
+            elif option == 'humidity':
+                print(f"Humidity: {weather.get('humidity', 'N/A')} %")
+            elif option == 'wind_speed':
+                print(f"Wind Speed: {wind.get('speed', 'N/A')} m/s")
     
     except KeyError as e:
         print(f"KeyError: Missing expected data for {e}")
     except Exception as e:
         print(f"Error displaying weather: {e}")
 
-def display_weather(data, option):
+def display_weather(data, option, fmt='text'):
     """
     Function: Process data
-    Params: data (dict), option (str)
+    Params: data (dict), option (str or list), fmt (str) - 'text', 'json' or 'csv'
     Brief: Process and display data
     """
     try:
@@ -75,8 +803,13 @@ def display_weather(data, option):
         if not weather or not wind:
             print("Error: Weather or wind data is missing.")
             return
-        display_weather_conditions(weather, wind, option)
+        if fmt == 'text':
+            display_weather_conditions(weather, wind, option)
+        else:
+            print(format_weather(data, parse_options(option), fmt))
     
+    except ValueError as e:
+        print(f"Error: {e}")
     except KeyError as e:
         print(f"KeyError: Missing expected key {e}")
     except TypeError as e:
@@ -91,8 +824,29 @@ def get_arguments():
     """
     try:
         parser = argparse.ArgumentParser(description="Fetch and display weather data.")
-        parser.add_argument("city", type=str, help="The city to fetch weather for.")
-        parser.add_argument("option", choices=AVAILABLE_OPTIONS.keys(), help="The weather parameter to display.")
+        parser.add_argument("city", type=str, nargs="?", help="The city to fetch weather for.")
+        parser.add_argument("option", nargs="?", type=option_argument,
+                            help=f"Weather parameters to display, comma-separated: {', '.join(AVAILABLE_OPTIONS)} or all.")
+        parser.add_argument("--format", dest="fmt", choices=OUTPUT_FORMATS, default="text", help="Output format.")
+        parser.add_argument("--batch", metavar="FILE", help="File with one city per line ('-' for stdin); prints JSONL.")
+        parser.add_argument("--output", metavar="FILE", help="Write batch JSONL here instead of stdout.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight in batch mode.")
+        parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-request timeout in seconds.")
+        parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL, help="Seconds a cached response stays valid.")
+        parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory of the on-disk response cache.")
+        parser.add_argument("--no-cache", action="store_true", help="Always query the API.")
+        parser.add_argument("--city-index", nargs="?", const=CITIES_PATH, metavar="FILE",
+                            help="Resolve cities in a local index and request them by id. The bundled cities.csv "
+                                 "only lists large cities, so other names are still requested by name; pass "
+                                 "OpenWeatherMap's city.list.json(.gz) to also reject unknown names without a request.")
+        parser.add_argument("--find", metavar="PREFIX", help="List indexed cities starting with PREFIX.")
+        parser.add_argument("--history", metavar="DIR", help="Directory of the columnar weather history.")
+        parser.add_argument("--record", action="store_true",
+                            help="Append the city (or --batch cities) to --history instead of displaying it.")
+        parser.add_argument("--rounds", type=int, default=1, help="Recording rounds, 0 to run until interrupted.")
+        parser.add_argument("--interval", type=float, default=DEFAULT_RECORD_INTERVAL, help="Seconds between recording rounds.")
+        parser.add_argument("--days", type=float,
+                            help="Display the mean of each option over the last DAYS days from --history.")
         return parser.parse_args()
     
     except argparse.ArgumentTypeError as e:
@@ -109,13 +863,54 @@ def main():
     """
     try:
         args = get_arguments()
+        cache = None if args.no_cache else WeatherCache(ttl=args.cache_ttl, directory=args.cache_dir)
+        index = CityIndex(args.city_index) if args.city_index else None
+        if args.find is not None:
+            for entry in (index or CityIndex()).complete(args.find):
+                print(f"{entry['name']},{entry['country']}\tid={entry['id']}\tlat={entry['lat']}\tlon={entry['lon']}")
+            return
+        if args.record or args.days is not None:
+            if not args.history:
+                print("Error: --history is required with --record and --days.")
+                return
+            history = WeatherHistory(args.history)
+        if args.record:
+            cities = list(read_cities(args.batch)) if args.batch else [args.city] if args.city else []
+            if not cities:
+                print("Error: A city or --batch file is required with --record.")
+                return
+            appended = record_history(cities, history, args.rounds, args.interval, args.concurrency, args.timeout,
+                                      cache, index)
+            print(f"Appended {appended} rows to {args.history}.")
+            return
+        if args.days is not None:
+            if not args.city:
+                print("Error: City is required with --days.")
+                return
+            start = time.time() - args.days * 86400
+            for option in parse_options(args.option or 'all'):
+                mean = history.mean(args.city, option, start)
+                value = 'N/A' if mean is None else f"{mean:.2f}"
+                print(f"Mean {AVAILABLE_OPTIONS[option]} over the last {args.days:g} days: {value}")
+            return
+        if args.batch:
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as out:
+                    run_batch(args.batch, out, args.concurrency, args.timeout, cache, index)
+            else:
+                run_batch(args.batch, sys.stdout, args.concurrency, args.timeout, cache, index)
+            return
+        if not args.city or not args.option:
+            print("Error: City and option are required unless --batch is given.")
+            return
         if not args.city.strip():
             print("Error: City name cannot be empty.")
             return
-        data = fetch_weather_data(args.city)
+        data = fetch_weather_data(args.city, timeout=args.timeout, cache=cache, index=index)
         if data:
-            clear_screen()
-            display_weather(data, args.option)
+            if args.fmt == 'text':
+                clear_screen()
+            display_weather(data, args.option, args.fmt)
         else:
             print("Failed to retrieve weather data.")
     except requests.exceptions.RequestException as e:
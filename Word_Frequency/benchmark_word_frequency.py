@@ -0,0 +1,207 @@
+"""
+Benchmarks for word_frequency_count: tokenizers, input readers, stop-word packs and heavy hitters.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from word_frequency_count import HeavyHitters, clean_text, filter_words, stop_words, TOKENIZERS
+from word_frequency_count import read_file, count_word_frequencies, stream_word_counts, mmap_word_counts
+from word_frequency_count import tokenize_classic, load_stop_words
+
+NEWFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "newfile.txt")
+
+def zipf_words(num_words, vocabulary_size, seed=0):
+    """
+    Function: zipf_words
+    Params: num_words (int), vocabulary_size (int), seed (int)
+    Brief: Generate a Zipf-distributed list of synthetic words.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"w{rank}" for rank in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    return rng.choices(vocabulary, weights=weights, k=num_words)
+
+def log_lines(seed=0):
+    """
+    Function: log_lines
+    Params: seed (int)
+    Brief: Endlessly generate synthetic application log lines, mostly timestamps, IDs and numbers.
+    """
+    rng = random.Random(seed)
+    messages = ["request served", "cache miss for key", "user login failed", "connection closed by peer",
+                "retrying upstream call", "запрос обработан"]
+    while True:
+        yield (f"2024-01-{rng.randint(1, 31):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:"
+               f"{rng.uniform(0, 60):06.3f}Z {rng.choice(['INFO', 'WARN', 'ERROR'])} "
+               f"req={rng.getrandbits(128):032x} user={rng.randint(1, 10**6)} {rng.choice(messages)} "
+               f"latency_ms={rng.randint(1, 5000)} bytes={rng.randint(0, 10**7)}\n")
+
+def measure(function, *args):
+    """
+    Function: measure
+    Params: function (callable), args
+    Brief: Run function and return (result, seconds, peak traced bytes).
+           Time and memory are taken from separate runs, tracing slows Python down.
+    """
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    result = function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def bench_heavy_hitters(num_words, vocabulary_size, top_n, budgets, batch_size=100000):
+    """
+    Function: bench_heavy_hitters
+    Params: num_words (int), vocabulary_size (int), top_n (int), budgets (list), batch_size (int)
+    Brief: Compare the approximate top-N mode with the exact Counter in accuracy and memory.
+    """
+    words = zipf_words(num_words, vocabulary_size)
+
+    def exact():
+        return Counter(words)
+
+    def approximate(budget):
+        heavy_hitters = HeavyHitters(budget)
+        for i in range(0, len(words), batch_size):
+            heavy_hitters.update(words[i:i + batch_size])
+        return heavy_hitters
+
+    word_counts, seconds, peak = measure(exact)
+    expected = word_counts.most_common(top_n)
+    print(f"exact Counter: {seconds:.2f}s, peak {peak / 2**20:.1f} MiB, {len(word_counts)} distinct words")
+    for budget in budgets:
+        heavy_hitters, seconds, peak = measure(approximate, budget)
+        results = heavy_hitters.most_common(top_n)
+        recall = len({word for word, _ in expected} & {word for word, _, _ in results}) / top_n
+        worst = max(abs(estimate - word_counts[word]) / word_counts[word] for word, estimate, _ in results)
+        print(f"budget {budget / 2**20:.1f} MiB: {seconds:.2f}s, peak {peak / 2**20:.1f} MiB, "
+              f"recall@{top_n} {recall:.2f}, max relative error {worst:.4f}")
+
+def bench_tokenizers(file_path, scale, rounds=3):
+    """
+    Function: bench_tokenizers
+    Params: file_path (str), scale (int), rounds (int)
+    Brief: Compare tokens/sec of clean_text + filter_words with the fused tokenizers.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        text = file.read() * scale
+    candidates = {"clean_text + filter_words": lambda text: filter_words(clean_text(text), stop_words)}
+    for name, tokenize in TOKENIZERS.items():
+        candidates[f"tokenize_{name}"] = lambda text, tokenize=tokenize: tokenize(text, stop_words)
+    print(f"tokenizing {len(text) / 2**20:.1f} MiB ({os.path.basename(file_path)} x{scale})")
+    for name, tokenize in candidates.items():
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            tokens = tokenize(text)
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        print(f"{name}: {len(tokens)} tokens, {len(tokens) / best:,.0f} tokens/sec")
+
+def bench_readers(file_path, scale):
+    """
+    Function: bench_readers
+    Params: file_path (str), scale (int)
+    Brief: Compare time and Python heap peak of read_file, streaming and mmap input backends,
+           on prose and on a log of the same size. Mapped pages live in the page cache and are
+           not counted by tracemalloc.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        text = file.read()
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as tmp:
+        for _ in range(scale):
+            tmp.write(text)
+            tmp.write("\n")
+    text_path = tmp.name
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".log", delete=False) as tmp:
+        lines = log_lines()
+        while tmp.tell() < os.path.getsize(text_path):
+            tmp.write(next(lines))
+    log_path = tmp.name
+    try:
+        backends = {
+            "read_file": lambda path: count_word_frequencies(filter_words(clean_text(read_file(path)), stop_words)),
+            "stream_word_counts": lambda path: stream_word_counts(path, stop_words),
+            "mmap_word_counts": lambda path: mmap_word_counts(path, stop_words),
+        }
+        for label, path in (("text", text_path), ("log", log_path)):
+            print(f"reading {os.path.getsize(path) / 2**20:.1f} MiB of {label}")
+            for name, backend in backends.items():
+                _, seconds, peak = measure(backend, path)
+                print(f"{name}: {seconds:.2f}s, peak {peak / 2**20:.1f} MiB")
+    finally:
+        os.remove(text_path)
+        os.remove(log_path)
+
+def bench_stop_words(file_path, scale, num_stop_words, rounds=3):
+    """
+    Function: bench_stop_words
+    Params: file_path (str), scale (int), num_stop_words (int), rounds (int)
+    Brief: Compare stop-word filtering strategies with a large synthetic pack,
+           and the cost of loading packs cold versus from the cache.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        text = file.read() * scale
+    real_words = sorted(set(tokenize_classic(text[:100000], frozenset())))
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "big.txt"), "w", encoding="utf-8") as pack:
+            pack.write("\n".join(real_words[::3] + [f"стоп{i}" for i in range(num_stop_words)]))
+        start = time.perf_counter()
+        big_pack = load_stop_words(["big"], directory)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        load_stop_words(["big"], directory)
+        cached = time.perf_counter() - start
+    print(f"{len(big_pack)} stop words: cold load {cold * 1000:.2f} ms, cached load {cached * 1000:.4f} ms")
+    as_list = sorted(big_pack)
+    candidates = {
+        "filter_words with a set": lambda: filter_words(clean_text(text), set(big_pack)),
+        "tokenize, then separate filter pass": lambda: [word for word in tokenize_classic(text, frozenset())
+                                                         if word not in big_pack],
+        "tokenize_classic with frozenset": lambda: tokenize_classic(text, big_pack),
+        "tokenize_classic with list (1/10 text)": lambda: tokenize_classic(text[:len(text) // 10], as_list),
+    }
+    for name, candidate in candidates.items():
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            tokens = candidate()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        print(f"{name}: {len(tokens)} tokens, {best:.3f}s")
+
+def get_arguments():
+    """
+    Function: get_arguments
+    Brief: Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Word frequency benchmarks.")
+    parser.add_argument("--words", type=int, default=2000000, help="Number of synthetic words.")
+    parser.add_argument("--vocabulary", type=int, default=500000, help="Number of distinct synthetic words.")
+    parser.add_argument("--top-n", type=int, default=20, help="Size of the compared top list.")
+    parser.add_argument("--scale", type=int, default=1000, help="Times newfile.txt is repeated for tokenizer runs.")
+    parser.add_argument("--stop-words", type=int, default=5000, help="Size of the synthetic stop-word pack.")
+    return parser.parse_args()
+
+def main():
+    """
+    Function: main
+    Brief: Run all benchmarks.
+    """
+    args = get_arguments()
+    bench_tokenizers(NEWFILE_PATH, args.scale)
+    bench_readers(NEWFILE_PATH, args.scale * 10)
+    bench_stop_words(NEWFILE_PATH, args.scale, args.stop_words)
+    bench_heavy_hitters(args.words, args.vocabulary, args.top_n, [2**20, 4 * 2**20, 16 * 2**20])
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,19 @@
+import importlib
+import io
+import os
+import tempfile
 import unittest
+from collections import Counter
 from unittest.mock import patch, mock_open
 from word_frequency_count import clean_text, read_file, filter_words, count_word_frequencies, print_most_common_words
+from word_frequency_count import split_tail, count_stream, stream_word_counts
+from word_frequency_count import split_byte_ranges, merge_counters, parallel_word_counts, collect_files
+from word_frequency_count import tokenize_classic, tokenize_unicode, get_tokenizer
+from word_frequency_count import mmap_word_counts, count_words, main
+from word_frequency_count import read_stop_word_pack, load_stop_words, available_languages
+import word_frequency_count
+from word_frequency_count import WordIndex, NgramCounter, count_ngrams, print_most_common_ngrams
+from word_frequency_count import CountMinSketch, SpaceSaving, HeavyHitters, approximate_word_counts, print_approximate_words
 
 
 stop_words = set([
@@ -65,5 +78,503 @@ class TestWordFrequencyFunctions(unittest.TestCase):
         mock_print.assert_any_call("тест: 2")
         mock_print.assert_any_call("python: 2")
 
+    def test_split_tail(self):
+        """
+        Function: test_split_tail
+        Brief: Test that an unfinished trailing word is held back.
+        """
+        self.assertEqual(split_tail("один два тр"), ("один два ", "тр"))
+        self.assertEqual(split_tail("один два\n"), ("один два\n", ""))
+        self.assertEqual(split_tail("слово"), ("", "слово"))
+        self.assertEqual(split_tail("один\u3000два"), ("один\u3000", "два"))
+
+    def test_long_run_flushes_tail(self):
+        """
+        Function: test_long_run_flushes_tail
+        Brief: Test that a run without whitespace is flushed once it exceeds max_tail.
+        """
+        chunks = ["тест " + "я" * 6] + ["я" * 6] * 3 + [" мир"]
+        batches = list(word_frequency_count.iter_word_batches(chunks, stop_words, max_tail=10))
+        self.assertEqual([word for batch in batches for word in batch], ["тест", "я" * 12, "я" * 12, "мир"])
+
+    def test_count_stream_matches_full_text(self):
+        """
+        Function: test_count_stream_matches_full_text
+        Brief: Test that chunked counting equals counting the whole text for any chunk size.
+        """
+        text = "Это тест на Python, и не был забыт!\nТест python — тест.   Забыт"
+        expected = count_word_frequencies(filter_words(clean_text(text), stop_words))
+        for size in (1, 2, 3, 7, len(text)):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual(count_stream(chunks, stop_words), expected)
+
+    def test_stream_word_counts(self):
+        """
+        Function: test_stream_word_counts
+        Brief: Test streaming a real file in small chunks.
+        """
+        text = "Привет мир привет\nмир тест " * 50
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as tmp:
+            tmp.write(text)
+        try:
+            word_counts = stream_word_counts(tmp.name, stop_words, chunk_size=5)
+        finally:
+            os.remove(tmp.name)
+        self.assertEqual(word_counts, count_word_frequencies(filter_words(clean_text(text), stop_words)))
+
+class TestTokenizers(unittest.TestCase):
+
+    def test_tokenize_classic_matches_pipeline(self):
+        """
+        Function: test_tokenize_classic_matches_pipeline
+        Brief: Test that the fused tokenizer equals clean_text + filter_words.
+        """
+        texts = [
+            "Это тест на Python и не был забыт",
+            "Hello, World! Don't STOP — «Класон» 1500 м, ЧМ-1975 и Олимпиаде-1972.",
+            "",
+        ]
+        for text in texts:
+            self.assertEqual(tokenize_classic(text, stop_words), filter_words(clean_text(text), stop_words))
+
+    def test_tokenize_unicode(self):
+        """
+        Function: test_tokenize_unicode
+        Brief: Test that the Unicode policy splits on non-ASCII punctuation and digits.
+        """
+        text = "«Класон» — чемпион ЧМ-1975, Don't"
+        self.assertEqual(tokenize_unicode(text, stop_words), ["класон", "чемпион", "чм", "don"])
+
+    def test_get_tokenizer(self):
+        """
+        Function: test_get_tokenizer
+        Brief: Test resolving tokenizer policies.
+        """
+        self.assertIs(get_tokenizer("classic"), tokenize_classic)
+        self.assertIs(get_tokenizer(tokenize_unicode), tokenize_unicode)
+        with self.assertRaises(ValueError):
+            get_tokenizer("missing")
+
+    def test_count_stream_with_policy(self):
+        """
+        Function: test_count_stream_with_policy
+        Brief: Test streaming counts with a non-default tokenizer.
+        """
+        word_counts = count_stream(["«тест» тест—тест"], stop_words, tokenizer="unicode")
+        self.assertEqual(word_counts, Counter({"тест": 3}))
+
+class TestStopWordPacks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp_dir.name, "xx.txt"), "w", encoding="utf-8") as file:
+            file.write("# comment\nFoo\nbar\n\n")
+        with open(os.path.join(self.tmp_dir.name, "yy.txt"), "w", encoding="utf-8") as file:
+            file.write("baz\nbar\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_stop_word_pack(self):
+        """
+        Function: test_read_stop_word_pack
+        Brief: Test reading a pack skips comments and blank lines and lowercases words.
+        """
+        self.assertEqual(read_stop_word_pack("xx", self.tmp_dir.name), frozenset({"foo", "bar"}))
+
+    def test_load_stop_words_is_cached(self):
+        """
+        Function: test_load_stop_words_is_cached
+        Brief: Test that a language combination is merged once and then served from the cache.
+        """
+        first = load_stop_words(["yy", "xx"], self.tmp_dir.name)
+        self.assertEqual(first, frozenset({"foo", "bar", "baz"}))
+        self.assertIsInstance(first, frozenset)
+        self.assertIs(load_stop_words(["xx", "yy", "xx"], self.tmp_dir.name), first)
+        self.assertEqual(available_languages(self.tmp_dir.name), ["xx", "yy"])
+
+    def test_bundled_packs(self):
+        """
+        Function: test_bundled_packs
+        Brief: Test the packs shipped with the module.
+        """
+        self.assertIn("en", available_languages())
+        self.assertIn("ru", available_languages())
+        packs = load_stop_words(["ru", "en"])
+        self.assertIn("the", packs)
+        self.assertIn("что", packs)
+        self.assertEqual(tokenize_classic("The cat and что кот", packs), ["cat", "кот"])
+
+    @patch("builtins.print")
+    def test_main_with_lang(self, mock_print):
+        """
+        Function: test_main_with_lang
+        Brief: Test selecting stop-word packs from the command line.
+        """
+        path = os.path.join(self.tmp_dir.name, "text.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("foo foo foo baz word")
+        self.assertEqual(main([path, "--lang", "xx", "yy", "--stop-words-dir", self.tmp_dir.name,
+                               "--top-n", "1", "--no-clear"]), 0)
+        mock_print.assert_any_call("word: 1")
+        self.assertEqual(main([path, "--lang", "zz", "--stop-words-dir", self.tmp_dir.name, "--no-clear"]), 1)
+
+class TestParallelWordFrequency(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        texts = [
+            "Йёран Класон выступал на Олимпийских играх, занял 20 место.\n" * 40,
+            "Тест python тест, забыт был забыт. Класон — чемпион!\r\n" * 25,
+            "",
+            "один два три один два один " * 60,
+        ]
+        for i, text in enumerate(texts):
+            with open(os.path.join(self.tmp_dir.name, f"part{i}.txt"), "w", encoding="utf-8") as file:
+                file.write(text)
+        self.file_paths = collect_files([self.tmp_dir.name])
+        serial = Counter()
+        for path in self.file_paths:
+            text = read_file(path)
+            serial.update(filter_words(clean_text(text), stop_words))
+        self.serial = serial
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_count_words_library_api(self):
+        """
+        Function: test_count_words_library_api
+        Brief: Test counting paths, directories and open text/binary streams.
+        """
+        self.assertEqual(count_words([self.tmp_dir.name], stop_words).most_common(), self.serial.most_common())
+        self.assertEqual(count_words(self.file_paths, stop_words, workers=2), self.serial)
+        self.assertEqual(count_words(self.file_paths, stop_words, use_mmap=True), self.serial)
+        text = read_file(self.file_paths[1])
+        expected = count_word_frequencies(filter_words(clean_text(text), stop_words))
+        self.assertEqual(count_words(io.StringIO(text), stop_words, chunk_size=5), expected)
+        self.assertEqual(count_words([io.BytesIO(text.encode("utf-8"))], stop_words, chunk_size=5), expected)
+        self.assertEqual(count_words(self.file_paths[1], stop_words), expected)
+
+    @patch("os.system")
+    def test_import_has_no_side_effects(self, mock_system):
+        """
+        Function: test_import_has_no_side_effects
+        Brief: Test that importing the module neither reads files nor shells out.
+        """
+        with patch("builtins.open") as mock_open_file, patch("builtins.print") as mock_print:
+            importlib.reload(word_frequency_count)
+        mock_system.assert_not_called()
+        mock_open_file.assert_not_called()
+        mock_print.assert_not_called()
+
+    @patch("builtins.print")
+    def test_main_cli(self, mock_print):
+        """
+        Function: test_main_cli
+        Brief: Test the command-line entry point.
+        """
+        self.assertEqual(main([self.tmp_dir.name, "--top-n", "1", "--no-clear"]), 0)
+        word, count = self.serial.most_common(1)[0]
+        mock_print.assert_any_call("Top 1 catchwords:")
+        mock_print.assert_any_call(f"{word}: {count}")
+        self.assertEqual(main([os.path.join(self.tmp_dir.name, "missing.txt"), "--no-clear"]), 1)
+
+    def test_mmap_matches_serial(self):
+        """
+        Function: test_mmap_matches_serial
+        Brief: Test that bytes-level counting of memory-mapped files equals the serial path.
+        """
+        word_counts = merge_counters(mmap_word_counts(path, stop_words, window_size=16) for path in self.file_paths)
+        self.assertEqual(word_counts.most_common(), self.serial.most_common())
+        for path in self.file_paths:
+            with open(path, "r", encoding="utf-8") as file:
+                text = file.read()
+            self.assertEqual(mmap_word_counts(path, stop_words, window_size=8, tokenizer="unicode"),
+                             Counter(tokenize_unicode(text, stop_words)))
+
+    def test_mmap_log_lines(self):
+        """
+        Function: test_mmap_log_lines
+        Brief: Test that dropping numbers and IDs at the bytes level keeps mmap counts exact on logs.
+        """
+        line = ("2024-01-01T12:00:00Z ERROR req=3f2a-9b1c user=42 Запрос отклонён, retry in 5s "
+                "x1 ab «кавычки» naïve café e2e\n")
+        path = os.path.join(self.tmp_dir.name, "app.log")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(line * 20)
+        for window_size in (16, 4096):
+            self.assertEqual(mmap_word_counts(path, stop_words, window_size=window_size),
+                             stream_word_counts(path, stop_words))
+
+    def test_mmap_caps_long_runs(self):
+        """
+        Function: test_mmap_caps_long_runs
+        Brief: Test that a run without whitespace is flushed once it exceeds max_tail, on a character boundary.
+        """
+        path = os.path.join(self.tmp_dir.name, "run.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("тест " + "ё" * 40 + " мир")
+        word_counts = mmap_word_counts(path, stop_words, window_size=8, max_tail=20)
+        self.assertEqual(word_counts["тест"], 1)
+        self.assertEqual(word_counts["мир"], 1)
+        self.assertEqual(sum(len(word) * count for word, count in word_counts.items() if set(word) == {"ё"}), 40)
+
+    def test_split_byte_ranges(self):
+        """
+        Function: test_split_byte_ranges
+        Brief: Test that byte ranges cover the file and end on whitespace.
+        """
+        path = self.file_paths[0]
+        with open(path, "rb") as file:
+            data = file.read()
+        ranges = split_byte_ranges(path, 7)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertTrue(data[end:end + 1].isspace())
+
+    def test_merge_counters(self):
+        """
+        Function: test_merge_counters
+        Brief: Test tree reduction of partial counters.
+        """
+        parts = [Counter({"a": 1}), Counter({"b": 2}), Counter({"a": 3, "c": 1}), Counter({"d": 1}), Counter({"b": 1})]
+        merged = merge_counters(parts)
+        self.assertEqual(merged, Counter({"a": 4, "b": 3, "c": 1, "d": 1}))
+        self.assertEqual(list(merged), ["a", "b", "c", "d"])
+        self.assertEqual(merge_counters([]), Counter())
+
+    def test_parallel_matches_serial(self):
+        """
+        Function: test_parallel_matches_serial
+        Brief: Test that the process pool output is identical to the serial path.
+        """
+        word_counts = parallel_word_counts(self.file_paths, stop_words, workers=4, chunk_size=16)
+        self.assertEqual(word_counts, self.serial)
+        self.assertEqual(word_counts.most_common(), self.serial.most_common())
+
+    @patch("builtins.print")
+    def test_parallel_printed_output(self, mock_print):
+        """
+        Function: test_parallel_printed_output
+        Brief: Test that printed top words are the same for serial and parallel counts.
+        """
+        print_most_common_words(self.serial, top_n=5)
+        serial_calls = mock_print.call_args_list[:]
+        mock_print.reset_mock()
+        print_most_common_words(parallel_word_counts(self.file_paths, stop_words, workers=3, chunk_size=32), top_n=5)
+        self.assertEqual(mock_print.call_args_list, serial_calls)
+
+class TestApproximateWordFrequency(unittest.TestCase):
+
+    def setUp(self):
+        self.words = []
+        for rank in range(1, 301):
+            self.words.extend([f"слово{rank}"] * (3000 // rank))
+
+    def test_count_min_sketch_never_undercounts(self):
+        """
+        Function: test_count_min_sketch_never_undercounts
+        Brief: Test that Count-Min estimates are upper bounds within the error bound.
+        """
+        sketch = CountMinSketch(width=64, depth=4)
+        exact = Counter(self.words)
+        for word, count in exact.items():
+            sketch.add(word, count)
+        self.assertEqual(sketch.total, len(self.words))
+        for word, count in exact.items():
+            self.assertGreaterEqual(sketch.estimate(word), count)
+        self.assertEqual(sketch.memory_bytes(), 64 * 4 * 8)
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        """
+        Function: test_space_saving_keeps_heavy_hitters
+        Brief: Test that Space-Saving keeps frequent words and bounds their error.
+        """
+        table = SpaceSaving(capacity=50)
+        for word in self.words:
+            table.add(word)
+        exact = Counter(self.words)
+        self.assertLessEqual(len(table.counts), 50)
+        for word, count, error in table.most_common(5):
+            self.assertLessEqual(count - error, exact[word])
+            self.assertGreaterEqual(count, exact[word])
+        self.assertEqual([word for word, _, _ in table.most_common(3)], ["слово1", "слово2", "слово3"])
+
+    def test_heavy_hitters_top_n(self):
+        """
+        Function: test_heavy_hitters_top_n
+        Brief: Test approximate top-N against the exact Counter.
+        """
+        heavy_hitters = HeavyHitters(memory_budget=64 * 1024)
+        for i in range(0, len(self.words), 1000):
+            heavy_hitters.update(self.words[i:i + 1000])
+        exact = Counter(self.words)
+        results = heavy_hitters.most_common(5)
+        self.assertEqual([word for word, _, _ in results], [word for word, _ in exact.most_common(5)])
+        for word, estimate, error in results:
+            self.assertLessEqual(estimate - error, exact[word])
+            self.assertGreaterEqual(estimate, exact[word])
+
+    @patch("builtins.print")
+    def test_print_approximate_words(self, mock_print):
+        """
+        Function: test_print_approximate_words
+        Brief: Test printing approximate words from streamed chunks.
+        """
+        chunks = ["Тест python тест, за", "был тест"]
+        heavy_hitters = approximate_word_counts(chunks, stop_words, memory_budget=64 * 1024)
+        print_approximate_words(heavy_hitters, top_n=2)
+        mock_print.assert_any_call("Top 2 catchwords (approximate):")
+        mock_print.assert_any_call("тест: 3 ±0")
+
+class TestNgramCounter(unittest.TestCase):
+
+    def test_ngrams_across_chunks(self):
+        """
+        Function: test_ngrams_across_chunks
+        Brief: Test that n-grams are counted the same however the stream is chunked.
+        """
+        text = "красный кот видит красный кот и синий кот"
+        whole = count_ngrams([text], stop_words, orders=(2, 3))
+        chunked = count_ngrams([text[i:i + 4] for i in range(0, len(text), 4)], stop_words, orders=(2, 3))
+        self.assertEqual(whole.most_common(2, 1), [(("красный", "кот"), 2)])
+        self.assertEqual(whole.most_common(3, 1), [(("красный", "кот", "видит"), 1)])
+        self.assertEqual(chunked.most_common(2, 10), whole.most_common(2, 10))
+        self.assertEqual(chunked.most_common(3, 10), whole.most_common(3, 10))
+        self.assertEqual(whole.unigrams["кот"], 3)
+
+    def test_cooccurrence_window(self):
+        """
+        Function: test_cooccurrence_window
+        Brief: Test unordered co-occurrence pairs within a sliding window.
+        """
+        ngram_counter = NgramCounter(orders=(), window=3)
+        ngram_counter.update(["aa", "bb", "cc", "aa"])
+        pairs = dict(ngram_counter.most_common_pairs(10))
+        self.assertEqual(pairs, {("aa", "bb"): 2, ("aa", "cc"): 2, ("bb", "cc"): 1})
+
+    def test_break_sequence(self):
+        """
+        Function: test_break_sequence
+        Brief: Test that no n-gram spans a sequence break.
+        """
+        ngram_counter = NgramCounter(orders=(2,))
+        ngram_counter.update(["aa", "bb"])
+        ngram_counter.break_sequence()
+        ngram_counter.update(["cc", "dd"])
+        self.assertEqual(dict(ngram_counter.most_common(2, 10)), {("aa", "bb"): 1, ("cc", "dd"): 1})
+
+    @patch("builtins.print")
+    def test_print_most_common_ngrams(self, mock_print):
+        """
+        Function: test_print_most_common_ngrams
+        Brief: Test printing n-grams and co-occurrences.
+        """
+        ngram_counter = count_ngrams(["тест python тест python"], stop_words, orders=(2,), window=2)
+        print_most_common_ngrams(ngram_counter, top_n=1)
+        mock_print.assert_any_call("Top 1 2-grams:")
+        mock_print.assert_any_call("тест python: 2")
+        mock_print.assert_any_call("Top 1 co-occurrences (window 2):")
+        mock_print.assert_any_call("тест + python: 3")
+
+class TestWordIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.corpus = os.path.join(self.tmp_dir.name, "corpus")
+        os.mkdir(self.corpus)
+        self.db_path = os.path.join(self.tmp_dir.name, "index.sqlite")
+        self.write("a.txt", "тест python тест был")
+        self.write("b.txt", "python забыт python")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name, text, mtime_ns=None):
+        path = os.path.join(self.corpus, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def test_incremental_update(self):
+        """
+        Function: test_incremental_update
+        Brief: Test that only changed files are recounted and totals follow by delta.
+        """
+        index = WordIndex(self.db_path, stop_words)
+        self.assertEqual(index.update([self.corpus]), (2, 0))
+        self.assertEqual(index.word_counts(), Counter({"python": 3, "тест": 2, "был": 1, "забыт": 1}))
+        self.assertEqual(index.update([self.corpus]), (0, 0))
+
+        self.write("a.txt", "тест тест тест новый", mtime_ns=10**18)
+        os.remove(os.path.join(self.corpus, "b.txt"))
+        self.write("c.txt", "новый")
+        self.assertEqual(index.update([self.corpus]), (2, 1))
+        self.assertEqual(index.word_counts(), Counter({"тест": 3, "новый": 2}))
+        self.assertEqual(list(index.word_counts(top_n=1)), ["тест"])
+        index.close()
+
+    def test_index_persists_and_rebuilds_on_new_stop_words(self):
+        """
+        Function: test_index_persists_and_rebuilds_on_new_stop_words
+        Brief: Test that the index survives reopening and resets when stop words change.
+        """
+        index = WordIndex(self.db_path, stop_words)
+        index.update([self.corpus])
+        index.close()
+
+        index = WordIndex(self.db_path, stop_words)
+        self.assertEqual(index.update([self.corpus]), (0, 0))
+        index.close()
+
+        index = WordIndex(self.db_path, stop_words | {"python"})
+        self.assertEqual(index.update([self.corpus]), (2, 0))
+        self.assertNotIn("python", index.word_counts())
+        index.close()
+
+    @patch("os.system")
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_report_only_counts_requested_paths(self, mock_stdout, mock_system):
+        """
+        Function: test_report_only_counts_requested_paths
+        Brief: Test that files indexed by an earlier run with other inputs are not reported.
+        """
+        a_path = self.write("a.txt", "alpha alpha alpha")
+        b_path = self.write("b.txt", "beta beta")
+        self.assertEqual(main([a_path, "--index", self.db_path, "--no-clear"]), 0)
+        self.assertIn("alpha: 3", mock_stdout.getvalue())
+        mock_stdout.seek(0)
+        mock_stdout.truncate()
+        self.assertEqual(main([b_path, "--index", self.db_path, "--no-clear"]), 0)
+        self.assertIn("beta: 2", mock_stdout.getvalue())
+        self.assertNotIn("alpha", mock_stdout.getvalue())
+
+        index = WordIndex(self.db_path, stop_words)
+        self.assertEqual(index.word_counts(), Counter({"alpha": 3, "beta": 2}))
+        self.assertEqual(index.word_counts(paths=[self.corpus + "/../corpus/a.txt"]), Counter({"alpha": 3}))
+        self.assertEqual(index.word_counts(top_n=1, paths=[a_path, b_path]), Counter({"alpha": 3}))
+        index.close()
+
+    def test_whole_index_reads_stored_totals(self):
+        """
+        Function: test_whole_index_reads_stored_totals
+        Brief: Test that requesting every indexed file reads the totals instead of summing per file.
+        """
+        index = WordIndex(self.db_path, stop_words)
+        index.update([self.corpus])
+        statements = []
+        index.connection.set_trace_callback(statements.append)
+        paths = collect_files([self.corpus])
+        self.assertEqual(index.word_counts(paths=paths), Counter({"python": 3, "тест": 2, "был": 1, "забыт": 1}))
+        self.assertFalse(any("SUM(" in statement for statement in statements))
+        self.assertEqual(index.word_counts(paths=paths[:1]), Counter({"тест": 2, "python": 1, "был": 1}))
+        self.assertTrue(any("SUM(" in statement for statement in statements))
+        index.close()
+
 if __name__ == "__main__":
     unittest.main()
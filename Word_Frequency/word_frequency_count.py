@@ -5,7 +5,19 @@ Date: 30 Dec 2024
 """
 
 import string
-from collections import Counter
+import argparse
+import codecs
+import functools
+import hashlib
+import heapq
+import math
+import mmap
+import re
+import sqlite3
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import os 
 
 def clear_screen():
@@ -14,19 +26,64 @@ def clear_screen():
     else:
         os.system("clear")
 
-stop_words = set([
+stop_words = frozenset([
     'он', 'бою', 'на', 'всегда', 'в', 'для', 'о', 'по', 'это', 'или', 'быть', 'забыл', 'добавить', 'подсказку', 
     'потому', 'что', 'опилки', 'вместо', 'мозгов', 'не'
 ])
 
+STOP_WORDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stop_words")
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WINDOW_SIZE = 4 * 1024 * 1024
+WHITESPACE = re.compile(r"\s")
+WHITESPACE_BYTES = re.compile(rb"[\t\n\x0b\x0c\r\x1c-\x1f ]")
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+PUNCTUATION_BYTES = string.punctuation.encode("ascii")
+# Whitespace-delimited byte tokens the classic tokenizer can keep: two or more bytes, each an
+# ASCII letter or part of a non-ASCII character. Digits, IDs and timestamps never match.
+CLASSIC_WORD_BYTES = re.compile(rb"(?<!\S)[A-Za-z\x80-\xff]{2,}(?!\S)")
+UNICODE_WORD = re.compile(r"[^\W\d_]+")
+
+def read_stop_word_pack(language, directory=STOP_WORDS_DIR):
+    """
+    Function: read_stop_word_pack
+    Params: language (str), directory (str)
+    Brief: Read <directory>/<language>.txt, one stop word per line, '#' starts a comment line.
+    """
+    path = os.path.join(directory, f"{language}.txt")
+    with open(path, "r", encoding="utf-8") as file:
+        return frozenset(line.strip().lower() for line in file if line.strip() and not line.startswith("#"))
+
+def available_languages(directory=STOP_WORDS_DIR):
+    """
+    Function: available_languages
+    Params: directory (str)
+    Brief: List the stop-word packs present in directory.
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".txt"))
+
+@functools.lru_cache(maxsize=None)
+def _load_stop_words(languages, directory):
+    return frozenset().union(*(read_stop_word_pack(language, directory) for language in languages))
+
+def load_stop_words(languages, directory=STOP_WORDS_DIR):
+    """
+    Function: load_stop_words
+    Params: languages (iterable of str), directory (str)
+    Brief: Return the union of the given packs as one frozenset. Each language
+           combination is read from disk once and cached for the process lifetime.
+    """
+    return _load_stop_words(tuple(sorted(set(languages))), os.path.abspath(directory))
+
 def clean_text(text):
     """
     Function: clean_text
     Params: text (str)
     Brief: Remove punctuation and convert text to lowercase.
     """
-    translator = str.maketrans('', '', string.punctuation)
-    text = text.translate(translator)
+    text = text.translate(PUNCTUATION_TABLE)
     return text.lower()
 
 def read_file(file_path):
@@ -39,6 +96,50 @@ def read_file(file_path):
         text = file.read()
     return text
 
+def read_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Function: read_chunks
+    Params: file_path (str), chunk_size (int)
+    Brief: Yield file contents in chunks of at most chunk_size characters.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def read_stream_chunks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Function: read_stream_chunks
+    Params: stream (file object), chunk_size (int)
+    Brief: Yield text chunks of an open text or binary stream, decoding bytes as UTF-8.
+    """
+    decoder = None
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            decoder = decoder or codecs.getincrementaldecoder("utf-8")()
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    if decoder:
+        chunk = decoder.decode(b"", final=True)
+        if chunk:
+            yield chunk
+
+def split_tail(text):
+    """
+    Function: split_tail
+    Params: text (str)
+    Brief: Split text into (head, tail) where tail is a word that may continue in the next chunk.
+    """
+    match = WHITESPACE.search(text[::-1])
+    end = len(text) - match.start() if match else 0
+    return text[:end], text[end:]
+
 def filter_words(text, stop_words):
     """
     Function: filter_words
@@ -51,6 +152,44 @@ def filter_words(text, stop_words):
     
     return filtered_words
 
+def tokenize_classic(text, stop_words):
+    """
+    Function: tokenize_classic
+    Params: text (str), stop_words (set)
+    Brief: Fused clean_text + filter_words: lowercase once, drop ASCII punctuation,
+           keep alphabetic words longer than one letter that are not stop words.
+    """
+    return [word for word in text.lower().translate(PUNCTUATION_TABLE).split()
+            if len(word) > 1 and word.isalpha() and word not in stop_words]
+
+def tokenize_unicode(text, stop_words):
+    """
+    Function: tokenize_unicode
+    Params: text (str), stop_words (set)
+    Brief: Split lowercase text on every non-letter character, including Unicode
+           punctuation such as «», — and digits glued to words.
+    """
+    return [word for word in UNICODE_WORD.findall(text.lower())
+            if len(word) > 1 and word not in stop_words]
+
+TOKENIZERS = {
+    'classic': tokenize_classic,
+    'unicode': tokenize_unicode,
+}
+
+def get_tokenizer(policy):
+    """
+    Function: get_tokenizer
+    Params: policy (str or callable)
+    Brief: Resolve a tokenization policy name, or pass through a tokenize(text, stop_words) callable.
+    """
+    if callable(policy):
+        return policy
+    try:
+        return TOKENIZERS[policy]
+    except KeyError:
+        raise ValueError(f"Unknown tokenizer '{policy}'. Choose one of: {', '.join(TOKENIZERS)}.")
+
 def count_word_frequencies(filtered_words):
     """
     Function: count_word_frequencies
@@ -60,6 +199,648 @@ def count_word_frequencies(filtered_words):
     word_counts = Counter(filtered_words)
     return word_counts
 
+def iter_word_batches(chunks, stop_words, tokenizer='classic', max_tail=DEFAULT_CHUNK_SIZE):
+    """
+    Function: iter_word_batches
+    Params: chunks (iterable of str), stop_words (set), tokenizer (str or callable), max_tail (int)
+    Brief: Yield lists of filtered words per chunk, joining words split across chunk boundaries.
+           A run without whitespace longer than max_tail characters is flushed as a token,
+           so minified or base64 lines do not grow the carried tail with the file.
+    """
+    tokenize = get_tokenizer(tokenizer)
+    tail = ""
+    for chunk in chunks:
+        head, tail = split_tail(tail + chunk)
+        if head:
+            yield tokenize(head, stop_words)
+        if len(tail) > max_tail:
+            yield tokenize(tail, stop_words)
+            tail = ""
+    if tail:
+        yield tokenize(tail, stop_words)
+
+def count_stream(chunks, stop_words, tokenizer='classic'):
+    """
+    Function: count_stream
+    Params: chunks (iterable of str), stop_words (set), tokenizer (str or callable)
+    Brief: Count word frequencies incrementally, joining words split across chunk boundaries.
+    """
+    word_counts = Counter()
+    for words in iter_word_batches(chunks, stop_words, tokenizer):
+        word_counts.update(words)
+    return word_counts
+
+def stream_word_counts(file_path, stop_words, chunk_size=DEFAULT_CHUNK_SIZE, tokenizer='classic'):
+    """
+    Function: stream_word_counts
+    Params: file_path (str), stop_words (set), chunk_size (int), tokenizer (str or callable)
+    Brief: Count word frequencies of a file without loading it into memory at once.
+    """
+    return count_stream(read_chunks(file_path, chunk_size), stop_words, tokenizer)
+
+def last_whitespace(data):
+    """
+    Function: last_whitespace
+    Params: data (bytes)
+    Brief: Return the index just past the last ASCII whitespace byte, or 0.
+    """
+    return max(data.rfind(byte) for byte in (b" ", b"\n", b"\t", b"\r", b"\x0b", b"\x0c")) + 1
+
+def utf8_boundary(data, index):
+    """
+    Function: utf8_boundary
+    Params: data (bytes), index (int)
+    Brief: Move index back to the start of the UTF-8 character it points into.
+    """
+    while index > 0 and 0x80 <= data[index] < 0xC0:
+        index -= 1
+    return index
+
+def mmap_word_counts(file_path, stop_words, window_size=DEFAULT_WINDOW_SIZE, tokenizer='classic',
+                     max_tail=DEFAULT_CHUNK_SIZE):
+    """
+    Function: mmap_word_counts
+    Params: file_path (str), stop_words (set), window_size (int), tokenizer (str or callable), max_tail (int)
+    Brief: Count words of a memory-mapped UTF-8 file at the bytes level, window by window.
+           Only distinct raw tokens are decoded and tokenized at the end, never the whole text.
+           With the classic tokenizer, tokens that can never be words (numbers, IDs,
+           timestamps) are dropped before counting. A run without whitespace longer than
+           max_tail bytes is counted as a token, as in iter_word_batches. The tokenizer must not join words across whitespace.
+    """
+    tokenize = get_tokenizer(tokenizer)
+    classic = tokenize is tokenize_classic
+    raw_counts = Counter()
+    size = os.path.getsize(file_path)
+    if size:
+        with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            tail = b""
+            for start in range(0, size, window_size):
+                data = tail + mapped[start:start + window_size]
+                cut = last_whitespace(data) if start + window_size < size else len(data)
+                if not cut and len(data) > max_tail:
+                    cut = utf8_boundary(data, len(data) - 1)
+                head, tail = data[:cut], data[cut:]
+                if classic:
+                    raw_counts.update(CLASSIC_WORD_BYTES.findall(head.translate(None, PUNCTUATION_BYTES)))
+                else:
+                    raw_counts.update(head.split())
+    word_counts = Counter()
+    for raw_word, count in raw_counts.items():
+        for word in tokenize(raw_word.decode("utf-8"), stop_words):
+            word_counts[word] += count
+    return word_counts
+
+def collect_files(paths):
+    """
+    Function: collect_files
+    Params: paths (list)
+    Brief: Expand directories into the regular files they contain, in sorted order.
+    """
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                file_paths.extend(os.path.join(root, name) for name in sorted(files))
+        else:
+            file_paths.append(path)
+    return file_paths
+
+def split_byte_ranges(file_path, range_size):
+    """
+    Function: split_byte_ranges
+    Params: file_path (str), range_size (int)
+    Brief: Split a file into byte ranges of about range_size, each ending on ASCII whitespace.
+           ASCII whitespace never occurs inside a UTF-8 sequence, so no word or character is cut.
+    """
+    size = os.path.getsize(file_path)
+    ranges = []
+    start = 0
+    with open(file_path, "rb") as file:
+        while start < size:
+            end = start + max(range_size, 1)
+            if end < size:
+                file.seek(end)
+                while True:
+                    block = file.read(64 * 1024)
+                    if not block:
+                        end = size
+                        break
+                    match = WHITESPACE_BYTES.search(block)
+                    if match:
+                        end += match.start()
+                        break
+                    end += len(block)
+            ranges.append((start, min(end, size)))
+            start = min(end, size)
+    return ranges
+
+def read_byte_range(file_path, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Function: read_byte_range
+    Params: file_path (str), start (int), end (int), chunk_size (int)
+    Brief: Yield decoded text chunks of the [start, end) byte range of a UTF-8 file.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = file.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            text = decoder.decode(data)
+            if text:
+                yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+_worker_stop_words = frozenset()
+
+def init_worker(stop_words):
+    """
+    Function: init_worker
+    Params: stop_words (set)
+    Brief: Pool initializer: ship the stop words to each worker once instead of with every task.
+    """
+    global _worker_stop_words
+    _worker_stop_words = stop_words
+
+def count_byte_range(task):
+    """
+    Function: count_byte_range
+    Params: task (tuple) - (file_path, start, end, stop_words, chunk_size, tokenizer)
+    Brief: Worker: count the words of one byte range into a partial Counter.
+           stop_words None means the set given to init_worker.
+    """
+    file_path, start, end, stop_words, chunk_size, tokenizer = task
+    if stop_words is None:
+        stop_words = _worker_stop_words
+    return count_stream(read_byte_range(file_path, start, end, chunk_size), stop_words, tokenizer)
+
+def merge_counters(counters):
+    """
+    Function: merge_counters
+    Params: counters (list of Counter)
+    Brief: Merge partial counters pairwise in a tree reduction.
+           Adjacent partials are merged left to right, so ties keep first-seen order.
+    """
+    counters = list(counters)
+    if not counters:
+        return Counter()
+    while len(counters) > 1:
+        merged = []
+        for i in range(0, len(counters) - 1, 2):
+            counters[i].update(counters[i + 1])
+            merged.append(counters[i])
+        if len(counters) % 2:
+            merged.append(counters[-1])
+        counters = merged
+    return counters[0]
+
+def parallel_word_counts(file_paths, stop_words, workers, chunk_size=DEFAULT_CHUNK_SIZE, tokenizer='classic'):
+    """
+    Function: parallel_word_counts
+    Params: file_paths (list), stop_words (set), workers (int), chunk_size (int), tokenizer (str or callable)
+    Brief: Count word frequencies of many files, or byte ranges of large ones, on a process pool.
+    """
+    total_size = sum(os.path.getsize(path) for path in file_paths)
+    range_size = max(chunk_size, total_size // (max(workers, 1) * 4))
+    ranges = [(path, start, end) for path in file_paths for start, end in split_byte_ranges(path, range_size)]
+    if workers <= 1 or len(ranges) <= 1:
+        return merge_counters(count_byte_range((path, start, end, stop_words, chunk_size, tokenizer))
+                              for path, start, end in ranges)
+    tasks = [(path, start, end, None, chunk_size, tokenizer) for path, start, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(stop_words,)) as executor:
+        partials = list(executor.map(count_byte_range, tasks))
+    return merge_counters(partials)
+
+class CountMinSketch:
+    """
+    Class: CountMinSketch
+    Params: width (int), depth (int)
+    Brief: Fixed-size frequency sketch. Estimates never undercount and overcount
+           by at most e / width * total with probability 1 - e^-depth.
+    """
+
+    def __init__(self, width, depth=4):
+        self.width = max(int(width), 1)
+        self.depth = max(int(depth), 1)
+        self.total = 0
+        self.tables = [array("Q", bytes(8 * self.width)) for _ in range(self.depth)]
+
+    def _indexes(self, word):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.width for i in range(self.depth)]
+
+    def add(self, word, count=1):
+        """
+        Function: add
+        Params: word (str), count (int)
+        Brief: Add count occurrences of word and return its new estimate.
+        """
+        self.total += count
+        estimate = None
+        for table, index in zip(self.tables, self._indexes(word)):
+            table[index] += count
+            if estimate is None or table[index] < estimate:
+                estimate = table[index]
+        return estimate
+
+    def estimate(self, word):
+        """
+        Function: estimate
+        Params: word (str)
+        Brief: Return an upper bound of the count of word.
+        """
+        return min(table[index] for table, index in zip(self.tables, self._indexes(word)))
+
+    def error_bound(self):
+        """
+        Function: error_bound
+        Brief: Return the maximum overcount expected with probability 1 - e^-depth.
+        """
+        return math.ceil(math.e / self.width * self.total)
+
+    def memory_bytes(self):
+        """
+        Function: memory_bytes
+        Brief: Return the size of the counter tables in bytes.
+        """
+        return sum(table.itemsize * len(table) for table in self.tables)
+
+class SpaceSaving:
+    """
+    Class: SpaceSaving
+    Params: capacity (int)
+    Brief: Space-Saving heavy-hitter table monitoring at most capacity words.
+           Every word with true count above total / capacity is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(int(capacity), 1)
+        self.counts = {}
+        self.errors = {}
+        self.heap = []
+
+    def add(self, word, count=1):
+        """
+        Function: add
+        Params: word (str), count (int)
+        Brief: Add count occurrences of word, evicting the smallest entry when full.
+        """
+        counts = self.counts
+        if word in counts:
+            counts[word] += count
+            return
+        if len(counts) < self.capacity:
+            counts[word] = count
+            self.errors[word] = 0
+            heapq.heappush(self.heap, (count, word))
+            return
+        heap = self.heap
+        while heap[0][0] != counts[heap[0][1]]:
+            heapq.heapreplace(heap, (counts[heap[0][1]], heap[0][1]))
+        minimum, evicted = heap[0]
+        del counts[evicted]
+        del self.errors[evicted]
+        counts[word] = minimum + count
+        self.errors[word] = minimum
+        heapq.heapreplace(heap, (minimum + count, word))
+
+    def most_common(self, top_n=None):
+        """
+        Function: most_common
+        Params: top_n (int or None)
+        Brief: Return (word, count, error) for the top_n monitored words.
+        """
+        items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        if top_n is not None:
+            items = items[:top_n]
+        return [(word, count, self.errors[word]) for word, count in items]
+
+class HeavyHitters:
+    """
+    Class: HeavyHitters
+    Params: memory_budget (int) - bytes
+    Brief: Approximate top-N counter: a Count-Min sketch and a Space-Saving table
+           sharing a fixed memory budget.
+    """
+
+    ENTRY_BYTES = 256
+    DEPTH = 4
+
+    def __init__(self, memory_budget):
+        half = max(int(memory_budget) // 2, 1)
+        self.sketch = CountMinSketch(half // (8 * self.DEPTH), self.DEPTH)
+        self.table = SpaceSaving(half // self.ENTRY_BYTES)
+
+    def update(self, words):
+        """
+        Function: update
+        Params: words (iterable of str)
+        Brief: Add a batch of words. Repeats within a batch are aggregated before hashing.
+        """
+        for word, count in Counter(words).items():
+            self.sketch.add(word, count)
+            self.table.add(word, count)
+
+    def most_common(self, top_n=5):
+        """
+        Function: most_common
+        Params: top_n (int)
+        Brief: Return (word, estimate, error) sorted by estimate. The true count
+               lies in [estimate - error, estimate].
+        """
+        results = []
+        for word, count, error in self.table.most_common():
+            estimate = min(count, self.sketch.estimate(word))
+            results.append((word, estimate, max(estimate - (count - error), 0)))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:top_n]
+
+    def memory_bytes(self):
+        """
+        Function: memory_bytes
+        Brief: Return the approximate memory used by the sketch and the table.
+        """
+        return self.sketch.memory_bytes() + len(self.table.counts) * self.ENTRY_BYTES
+
+def approximate_word_counts(chunks, stop_words, memory_budget, tokenizer='classic'):
+    """
+    Function: approximate_word_counts
+    Params: chunks (iterable of str), stop_words (set), memory_budget (int), tokenizer (str or callable)
+    Brief: Stream chunks into a HeavyHitters counter bounded by memory_budget bytes.
+    """
+    heavy_hitters = HeavyHitters(memory_budget)
+    for words in iter_word_batches(chunks, stop_words, tokenizer):
+        heavy_hitters.update(words)
+    return heavy_hitters
+
+def print_approximate_words(heavy_hitters, top_n=5):
+    """
+    Function: print_approximate_words
+    Params: heavy_hitters (HeavyHitters), top_n (int)
+    Brief: Print top N approximate words with their error bounds.
+    """
+    print(f"Top {top_n} catchwords (approximate):")
+    for word, estimate, error in heavy_hitters.most_common(top_n):
+        print(f"{word}: {estimate} ±{error}")
+
+class NgramCounter:
+    """
+    Class: NgramCounter
+    Params: orders (iterable of int), window (int or None)
+    Brief: Streaming n-gram and windowed co-occurrence counter. Words are interned
+           to integer ids and n-grams packed into a single int key, so memory grows
+           with distinct n-grams rather than with tuples of strings.
+    """
+
+    ID_BITS = 32
+
+    def __init__(self, orders=(2, 3), window=None):
+        self.orders = sorted(set(orders))
+        self.window = window
+        self.vocabulary = {}
+        self.words = []
+        self.unigrams = Counter()
+        self.ngrams = {order: Counter() for order in self.orders}
+        self.pairs = Counter()
+        self.history = deque(maxlen=max(self.orders + [window or 1]))
+
+    def _word_id(self, word):
+        word_id = self.vocabulary.get(word)
+        if word_id is None:
+            word_id = self.vocabulary[word] = len(self.words)
+            self.words.append(word)
+        return word_id
+
+    def update(self, words):
+        """
+        Function: update
+        Params: words (list of str)
+        Brief: Count unigrams, n-grams and co-occurrences of the next words of the stream.
+        """
+        self.unigrams.update(words)
+        history = self.history
+        max_order = self.orders[-1] if self.orders else 0
+        bits = self.ID_BITS
+        for word in words:
+            word_id = self._word_id(word)
+            if self.window:
+                for other in islice(history, max(len(history) - self.window + 1, 0), None):
+                    if other != word_id:
+                        low, high = (other, word_id) if other < word_id else (word_id, other)
+                        self.pairs[(low << bits) | high] += 1
+            history.append(word_id)
+            key = 0
+            size = len(history)
+            for order in range(1, min(max_order, size) + 1):
+                key |= history[size - order] << (bits * (order - 1))
+                counter = self.ngrams.get(order)
+                if counter is not None:
+                    counter[key] += 1
+
+    def break_sequence(self):
+        """
+        Function: break_sequence
+        Brief: Forget recent words so no n-gram spans the boundary, e.g. between files.
+        """
+        self.history.clear()
+
+    def _decode(self, key, order):
+        mask = (1 << self.ID_BITS) - 1
+        ids = [(key >> (self.ID_BITS * i)) & mask for i in range(order)]
+        return tuple(self.words[word_id] for word_id in reversed(ids))
+
+    def most_common(self, order, top_n=5):
+        """
+        Function: most_common
+        Params: order (int), top_n (int)
+        Brief: Return the top_n n-grams of the given order as (tuple of words, count).
+        """
+        return [(self._decode(key, order), count) for key, count in self.ngrams[order].most_common(top_n)]
+
+    def most_common_pairs(self, top_n=5):
+        """
+        Function: most_common_pairs
+        Params: top_n (int)
+        Brief: Return the top_n co-occurring word pairs as ((word, word), count).
+        """
+        return [(self._decode(key, 2), count) for key, count in self.pairs.most_common(top_n)]
+
+def count_ngrams(chunks, stop_words, orders=(2, 3), window=None, tokenizer='classic', ngram_counter=None):
+    """
+    Function: count_ngrams
+    Params: chunks (iterable of str), stop_words (set), orders (iterable of int), window (int or None),
+            tokenizer (str or callable), ngram_counter (NgramCounter or None)
+    Brief: Stream chunks into an NgramCounter in the same pass that filters the words.
+    """
+    if ngram_counter is None:
+        ngram_counter = NgramCounter(orders, window)
+    for words in iter_word_batches(chunks, stop_words, tokenizer):
+        ngram_counter.update(words)
+    return ngram_counter
+
+def print_most_common_ngrams(ngram_counter, top_n=5):
+    """
+    Function: print_most_common_ngrams
+    Params: ngram_counter (NgramCounter), top_n (int)
+    Brief: Print top N n-grams per order and top N co-occurring pairs.
+    """
+    for order in ngram_counter.orders:
+        if order < 2:
+            continue
+        print(f"Top {top_n} {order}-grams:")
+        for words, count in ngram_counter.most_common(order, top_n):
+            print(f"{' '.join(words)}: {count}")
+    if ngram_counter.window:
+        print(f"Top {top_n} co-occurrences (window {ngram_counter.window}):")
+        for (first, second), count in ngram_counter.most_common_pairs(top_n):
+            print(f"{first} + {second}: {count}")
+
+class WordIndex:
+    """
+    Class: WordIndex
+    Params: db_path (str), stop_words (set), tokenizer (str or callable)
+    Brief: Persistent SQLite index of per-file word counts keyed by path, mtime and size.
+           Only new or changed files are re-tokenized, aggregate totals are updated by delta.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER);
+        CREATE TABLE IF NOT EXISTS words (id INTEGER PRIMARY KEY, word TEXT UNIQUE, total INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS file_words (
+            file_id INTEGER, word_id INTEGER, count INTEGER, PRIMARY KEY (file_id, word_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS words_total ON words (total);
+    """
+
+    def __init__(self, db_path, stop_words, tokenizer='classic'):
+        self.stop_words = stop_words
+        self.tokenizer = tokenizer
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(self.SCHEMA)
+        self._check_signature()
+
+    def _signature(self):
+        tokenize = get_tokenizer(self.tokenizer)
+        key = "\n".join([f"{tokenize.__module__}.{tokenize.__qualname__}"] + sorted(self.stop_words))
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _check_signature(self):
+        signature = self._signature()
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row and row[0] == signature:
+            return
+        with self.connection:
+            self.connection.execute("DELETE FROM file_words")
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("DELETE FROM words")
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,))
+
+    def _remove_file(self, file_id):
+        self.connection.execute(
+            "UPDATE words SET total = total - (SELECT count FROM file_words WHERE file_id = ? AND word_id = words.id) "
+            "WHERE id IN (SELECT word_id FROM file_words WHERE file_id = ?)", (file_id, file_id))
+        self.connection.execute("DELETE FROM file_words WHERE file_id = ?", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add_file(self, path, mtime_ns, size, word_counts, word_ids):
+        cursor = self.connection.execute(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)", (path, mtime_ns, size))
+        file_id = cursor.lastrowid
+        new_words = []
+        for word in word_counts:
+            if word not in word_ids:
+                word_ids[word] = self.next_word_id
+                new_words.append((self.next_word_id, word))
+                self.next_word_id += 1
+        self.connection.executemany("INSERT INTO words (id, word, total) VALUES (?, ?, 0)", new_words)
+        self.connection.executemany("INSERT INTO file_words (file_id, word_id, count) VALUES (?, ?, ?)",
+                                    ((file_id, word_ids[word], count) for word, count in word_counts.items()))
+
+    def update(self, paths, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Function: update
+        Params: paths (list), chunk_size (int)
+        Brief: Re-index new or changed files under paths and drop deleted ones.
+               Returns (changed, removed) file counts.
+        """
+        known = {path: (file_id, mtime_ns, size) for file_id, path, mtime_ns, size
+                 in self.connection.execute("SELECT id, path, mtime_ns, size FROM files")}
+        seen = set()
+        changed = []
+        for path in collect_files(paths):
+            path = os.path.abspath(path)
+            seen.add(path)
+            stat = os.stat(path)
+            entry = known.get(path)
+            if entry and entry[1] == stat.st_mtime_ns and entry[2] == stat.st_size:
+                continue
+            changed.append((path, stat.st_mtime_ns, stat.st_size))
+        removed = [path for path in known if path not in seen and not os.path.exists(path)]
+        with self.connection:
+            for path in removed:
+                self._remove_file(known[path][0])
+            if changed:
+                word_ids = dict(self.connection.execute("SELECT word, id FROM words"))
+                self.next_word_id = max(word_ids.values(), default=0) + 1
+                deltas = Counter()
+                for path, mtime_ns, size in changed:
+                    if path in known:
+                        self._remove_file(known[path][0])
+                    word_counts = stream_word_counts(path, self.stop_words, chunk_size, self.tokenizer)
+                    self._add_file(path, mtime_ns, size, word_counts, word_ids)
+                    deltas.update(word_counts)
+                self.connection.executemany("UPDATE words SET total = total + ? WHERE id = ?",
+                                            ((count, word_ids[word]) for word, count in deltas.items()))
+        return len(changed), len(removed)
+
+    def word_counts(self, top_n=None, paths=None):
+        """
+        Function: word_counts
+        Params: top_n (int or None), paths (list or None)
+        Brief: Return aggregate counts as a Counter, optionally only the top_n words.
+               With paths, only the indexed files among those paths are counted,
+               otherwise every file in the index. The stored totals are read when paths
+               cover the whole index; only a real subset is summed per file.
+               Ties are ordered by first indexing, like Counter.most_common.
+        """
+        limit = "" if top_n is None else f" LIMIT {int(top_n)}"
+        if paths is not None:
+            requested = {os.path.abspath(path) for path in paths}
+            indexed = {path for (path,) in self.connection.execute("SELECT path FROM files")}
+            if indexed <= requested:
+                paths = None
+        if paths is None:
+            query = "SELECT word, total FROM words WHERE total > 0 ORDER BY total DESC, id"
+            return Counter(dict(self.connection.execute(query + limit)))
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS selected (path TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM selected")
+            self.connection.executemany("INSERT INTO selected (path) VALUES (?)",
+                                        ((path,) for path in requested))
+        query = ("SELECT words.word, SUM(file_words.count) AS total FROM file_words "
+                 "JOIN files ON files.id = file_words.file_id JOIN selected ON selected.path = files.path "
+                 "JOIN words ON words.id = file_words.word_id "
+                 "GROUP BY words.id HAVING total > 0 ORDER BY total DESC, words.id")
+        return Counter(dict(self.connection.execute(query + limit)))
+
+    def close(self):
+        """
+        Function: close
+        Brief: Close the database connection.
+        """
+        self.connection.close()
+
 def print_most_common_words(word_counts, top_n=5):
     """
     Function: print_most_common_words
@@ -71,20 +852,121 @@ def print_most_common_words(word_counts, top_n=5):
     for word, count in most_common_words:
         print(f"{word}: {count}")
 
-def main(file_path, top_n=5):
+def count_words(sources, stop_words=stop_words, tokenizer='classic', chunk_size=DEFAULT_CHUNK_SIZE,
+                workers=1, use_mmap=False):
+    """
+    Function: count_words
+    Params: sources (path, stream, or iterable of paths/streams), stop_words (set),
+            tokenizer (str or callable), chunk_size (int), workers (int), use_mmap (bool)
+    Brief: Library entry point: count words of files or open text/binary streams.
+           Directories are expanded, input is streamed, nothing is printed.
+    """
+    if isinstance(sources, (str, bytes, os.PathLike)) or hasattr(sources, "read"):
+        sources = [sources]
+    sources = [source if hasattr(source, "read") else os.fspath(source) for source in sources]
+    paths = [source for source in sources if not hasattr(source, "read")]
+    if len(paths) == len(sources) and (workers > 1 or use_mmap):
+        file_paths = collect_files(paths)
+        if use_mmap:
+            return merge_counters(mmap_word_counts(path, stop_words, tokenizer=tokenizer) for path in file_paths)
+        return parallel_word_counts(file_paths, stop_words, workers, chunk_size, tokenizer)
+    partials = []
+    for source in sources:
+        if hasattr(source, "read"):
+            partials.append(count_stream(read_stream_chunks(source, chunk_size), stop_words, tokenizer))
+        else:
+            for path in collect_files([source]):
+                partials.append(stream_word_counts(path, stop_words, chunk_size, tokenizer))
+    return merge_counters(partials)
+
+def report_words(paths, top_n=5, chunk_size=None, workers=1, memory_budget=None, tokenizer='classic',
+                 index_path=None, ngram_orders=None, window=None, use_mmap=False, stop_words=stop_words):
+    """
+    Function: report_words
+    Params: paths (list), top_n (int), chunk_size (int or None), workers (int),
+            memory_budget (int or None), tokenizer (str or callable), index_path (str or None),
+            ngram_orders (list or None), window (int or None), use_mmap (bool), stop_words (set)
+    Brief: Count the files or directories in paths and print the common words.
+           A memory_budget (bytes) prints approximate counts with error bounds,
+           an index_path only recounts files changed since the last run,
+           ngram_orders / window also print n-grams and co-occurring pairs.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    file_paths = collect_files(paths)
+    if not any(os.path.getsize(path) for path in file_paths):
+        return
+    if index_path:
+        index = WordIndex(index_path, stop_words, tokenizer)
+        try:
+            index.update(file_paths, chunk_size)
+            print_most_common_words(index.word_counts(top_n, paths=file_paths), top_n)
+        finally:
+            index.close()
+    elif memory_budget:
+        chunks = (chunk for path in file_paths for chunk in read_chunks(path, chunk_size))
+        print_approximate_words(approximate_word_counts(chunks, stop_words, memory_budget, tokenizer), top_n)
+    elif ngram_orders or window:
+        ngram_counter = NgramCounter(ngram_orders or (), window)
+        for path in file_paths:
+            count_ngrams(read_chunks(path, chunk_size), stop_words, tokenizer=tokenizer, ngram_counter=ngram_counter)
+            ngram_counter.break_sequence()
+        print_most_common_words(ngram_counter.unigrams, top_n)
+        print_most_common_ngrams(ngram_counter, top_n)
+    else:
+        word_counts = count_words(file_paths, stop_words, tokenizer, chunk_size, workers, use_mmap)
+        print_most_common_words(word_counts, top_n)
+
+def get_arguments(argv=None):
+    """
+    Function: get_arguments
+    Params: argv (list or None)
+    Brief: Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Count the most common words in text files.")
+    parser.add_argument("paths", nargs="+", help="Text files or directories of text files.")
+    parser.add_argument("--top-n", type=int, default=5, help="Number of words to print.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Read the input in chunks of this many characters.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    parser.add_argument("--approximate-mb", type=float, default=None,
+                        help="Approximate top words within this memory budget (MiB).")
+    parser.add_argument("--tokenizer", choices=TOKENIZERS.keys(), default="classic",
+                        help="Tokenization policy: 'classic' strips ASCII punctuation, 'unicode' splits on any non-letter.")
+    parser.add_argument("--index", default=None,
+                        help="SQLite index file; only new or changed files are recounted on re-runs.")
+    parser.add_argument("--ngrams", type=int, nargs="+", default=None, help="N-gram orders to count, e.g. 2 3.")
+    parser.add_argument("--window", type=int, default=None, help="Count word pairs co-occurring within this window.")
+    parser.add_argument("--mmap", action="store_true", help="Memory-map the input and count at the bytes level.")
+    parser.add_argument("--lang", nargs="+", default=None,
+                        help="Stop-word packs to load instead of the built-in list, e.g. ru en.")
+    parser.add_argument("--stop-words-dir", default=STOP_WORDS_DIR, help="Directory with <lang>.txt stop-word packs.")
+    parser.add_argument("--no-clear", action="store_true", help="Do not clear the terminal before printing.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Function: main
-    Params: file_path (str), top_n (int)
-    Brief: Main function to process the file and print common words.
+    Params: argv (list or None)
+    Brief: Command-line entry point: parse arguments and print the common words.
     """
-    text = read_file(file_path)
-    if text:
+    args = get_arguments(argv)
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        print(f"Error: No such file or directory: {', '.join(missing)}")
+        return 1
+    words_to_skip = stop_words
+    if args.lang:
+        try:
+            words_to_skip = load_stop_words(args.lang, args.stop_words_dir)
+        except OSError as e:
+            print(f"Error loading stop words: {e}. Available: {', '.join(available_languages(args.stop_words_dir))}")
+            return 1
+    if not args.no_clear:
         clear_screen()
-        cleaned_text = clean_text(text)
-        filtered_words = filter_words(cleaned_text, stop_words)
-        word_counts = count_word_frequencies(filtered_words)
-        print_most_common_words(word_counts, top_n)
+    memory_budget = int(args.approximate_mb * 1024 * 1024) if args.approximate_mb else None
+    report_words(args.paths, top_n=args.top_n, chunk_size=args.chunk_size, workers=args.workers,
+                 memory_budget=memory_budget, tokenizer=args.tokenizer, index_path=args.index,
+                 ngram_orders=args.ngrams, window=args.window, use_mmap=args.mmap, stop_words=words_to_skip)
+    return 0
 
-    
-file_path = '/home/usernamezero00/Desktop/myprojects/All_Projects/Word_Frequency/newfile.txt' 
-main(file_path, top_n=5)
+if __name__ == "__main__":
+    raise SystemExit(main())